@@ -5,23 +5,28 @@ import time
 import os
 import subprocess
 
-from threading import Thread
+from queue import Queue, Empty
+from threading import Thread, Timer
 from typing import Union, Callable
 
 from web3.gas_strategies.time_based import medium_gas_price_strategy
 
-from integration.eth_service import EthService
-from integration.integration.eth_connector import EthConnector
 from integration.ipfs_service import IpfsService
-from integration.integration.ipfs_connector import IpfsConnector
+from integration.fetch_scheduler import FetchScheduler
+from integration.nonce_manager import NonceManager
+from integration.transaction_stage import TransactionStage
+from integration.progress_reporter import ProgressReporter
+from integration.transaction_catalog import TransactionCatalog
 
 from core.manager import Manager
+from core.broker_services import BrokerServices
 from service.tools.key_tools import KeyTools
 
-from core.node.worker_node import WorkerNodeDelegate
+from core.node.worker_node import WorkerNode, WorkerNodeDelegate
 from core.node.worker_node_thread import WorkerNodeStateMachineThread, WorkerNodeStateDelegate
 
 from core.job.cognitive_job import CognitiveJob
+from core.job.job_context import JobContext
 from core.patterns.singleton import Singleton
 from core.patterns.pynode_logger import LogSocketHandler
 from core.processor.processor import Processor, ProcessorDelegate
@@ -34,13 +39,41 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
     WebAPI and Ethereum threads and provides delegate interfaces for capturing their output via callback functions.
     This is done via implementing `EthDelegate` and `WebDelegate` abstract classes.
     """
+
+    # worker node contract functions sent by pynode
+    worker_node_transactions = ('alive', 'acceptAssignment', 'processToDataValidation', 'reportInvalidData',
+                                'acceptValidData', 'processToCognition', 'provideResults', 'reportProgress')
+    # pandora contract functions sent by pynode
+    pandora_transactions = ('checkJobQueue',)
+    # state transaction expected after sent one, it is signed in advance
+    next_state_transactions = {'alive': 'acceptAssignment',
+                               'checkJobQueue': 'acceptAssignment',
+                               'acceptAssignment': 'processToDataValidation',
+                               'acceptValidData': 'processToCognition'}
+    # worker node states state transaction is valid in, failed transaction is repeated only in them
+    state_transaction_states = {'alive': (WorkerNode.OFFLINE,),
+                                'checkJobQueue': (WorkerNode.IDLE,),
+                                'acceptAssignment': (WorkerNode.ASSIGNED,),
+                                'processToDataValidation': (WorkerNode.READY_FOR_DATA_VALIDATION,),
+                                'acceptValidData': (WorkerNode.VALIDATING_DATA,),
+                                'reportInvalidData': (WorkerNode.VALIDATING_DATA,),
+                                'processToCognition': (WorkerNode.READY_FOR_COMPUTING,),
+                                'reportProgress': (WorkerNode.COMPUTING,),
+                                'provideResults': (WorkerNode.COMPUTING,)}
+    # state transaction sent right after other one, nonces keep their order, both are repeated on its failure
+    pipelined_state_transactions = {'provideResults': 'checkJobQueue'}
+    # state transaction sent on entering worker node state
+    entering_state_transactions = {WorkerNode.ASSIGNED: 'acceptAssignment',
+                                   WorkerNode.READY_FOR_DATA_VALIDATION: 'processToDataValidation',
+                                   WorkerNode.READY_FOR_COMPUTING: 'processToCognition'}
 # ----------------------------------------------------------------------------------------------------------
 # Initialization
 # ----------------------------------------------------------------------------------------------------------
     def __init__(self, eth_server: str, abi_path: str,
                  pandora: str,
                  node: str,
-                 ipfs_server: str, ipfs_port: int, data_dir: str):
+                 ipfs_server: str, ipfs_port: int, data_dir: str,
+                 account: str = None, services: BrokerServices = None, vault_name: str = None):
         Broker.get_instance()
         Thread.__init__(self, daemon=True)
 
@@ -57,13 +90,11 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
         self.abi_path = abi_path
         self.pandora = pandora
         self.node = node
+        self.account = account or self.manager.eth_worker_node_account
         self.ipfs_server = ipfs_server
         self.ipfs_port = ipfs_port
         self.data_dir = data_dir
 
-        # initial filtering current block number
-        self.current_block_number = 0
-
         # Init empty container for pandora
         self.pandora_container = None
         # Init empty container for cognitive job manager
@@ -75,21 +106,23 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
         self.worker_node_container = None
         self.worker_node_state_machine = None
         self.worker_node_event_thread = None
+        self.event_source = None
+        self.log_dispatcher = None
 
-        # Init empty containers for job
+        # Init empty containers for job, active job is the one worker node is assigned to
         self.job_id_hex = None
-        self.job_container = None
-        self.job_state_machine = None
-        self.job_state_event_thread = None
-        self.job_state_thread_flag = True
 
         # Init empty jobs and processor
-        self.jobs = {}
-        self.processors = {}
+        self.jobs = {}  # job id -> JobContext
+        self.processors = {}  # processor id -> Processor of all jobs
 
-        # init connectors
-        self.eth = EthService(strategic=EthConnector())
-        self.ipfs = IpfsService(strategic=IpfsConnector())
+        # connectors, caches and compute workers are shared by all worker nodes hosted by process
+        self.services = services or BrokerServices(nodes=[node])
+        self.eth = self.services.eth
+        self.ipfs = self.services.ipfs
+        self.compute_supervisor = self.services.compute_supervisor
+        self.services.register(self)
+        self.compute_retries = {}
 
         # init progress delegate
         self.send_progress = False
@@ -99,18 +132,22 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
         self.start_epoch_time = None
         self.finish_epoch_time = None
         self.time_per_epoch = None
-        self.sends_count = 1
-        self.send_progress_interval = 300  # set to 5min by default
-
-        self.local_password = None
-        self.key_tool = KeyTools()
+        self.progress_reporter = None
+
+        self.nonce_manager = None
+        self.gas_oracle = None
+        self.receipt_tracker = None
+        self.transaction_stage = None
+        self.transaction_catalog = TransactionCatalog()
+        self.key_tool = KeyTools(vault_name)
         print('Pandora broker initialize success')
 
 
 # ----------------------------------------------------------------------------------------------------------
 # Base connection and start pynode
 # ----------------------------------------------------------------------------------------------------------
-    def connect(self) -> bool:
+    def connect(self, start_events: bool = True) -> bool:
+        """ Without start events, logs dispatching is started and joined by owner of shared services """
         if self.eth is not None:
 
             # init base contracts containers
@@ -132,53 +169,76 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
             self.logger.info('Worker contract initialized success on address : ' + self.node)
             self.worker_node_container.web3.eth.setGasPriceStrategy(medium_gas_price_strategy)
             self.logger.info('Set gas price strategy to -> medium_gas_price_strategy')
+            # functions ABI is resolved and calldata without arguments is encoded once
+            for name in self.worker_node_transactions:
+                self.transaction_catalog.register(self.worker_node_container, name)
+            for name in self.pandora_transactions:
+                self.transaction_catalog.register(self.pandora_container, name)
+            # account nonces are allocated locally for pipelined transactions
+            self.nonce_manager = NonceManager(self.worker_node_container.web3,
+                                              self.worker_node_container.web3.toChecksumAddress(self.account))
+            # gas prices, receipts tracking and logs dispatching are started once per process
+            self.services.connect(self.worker_node_container.web3)
+            self.gas_oracle = self.services.gas_oracle
+            self.receipt_tracker = self.services.receipt_tracker
+            self.event_source = self.services.event_source
+            self.log_dispatcher = self.services.log_dispatcher
+            self.transaction_stage = TransactionStage(self.nonce_manager)
+            # training progress is sent from reporter thread, the latest value only
+            self.progress_reporter = ProgressReporter(self.send_progress_transaction,
+                                                      interval=self.manager.eth_progress_interval,
+                                                      gas_budget=self.manager.eth_progress_gas_budget)
+            self.progress_reporter.start()
+            self.manager.mark_startup_stage('contracts')
 
             # init worker contract owner account
             if self.key_tool.check_vault():
                 self.logger.info('Account vault is located')
-                vault_data = self.key_tool.obtain_key(self.manager.vault_key)
-                # split data to pass and p_key
-                try:
-                    self.local_password = vault_data.split("_", 1)[0]
-                    vault_account = vault_data.split("_", 1)[0]
-                    local_p_key = vault_data.split("_", 1)[1]
-                    if (vault_account.lower() in self.manager.eth_worker_node_account.lower()) and (local_p_key is not ''):
-                        self.logger.info('Vault check success')
-                    else:
-                        self.logger.info('Unable to unlock account vault.')
-                        self.logger.info('Please provide pynode configuration.')
-                        return False
-                except Exception:
-                    self.logger.info('Exception on unlock account vault.')
-                    return False
             else:
                 self.logger.info('Unable to locate account vault.')
                 self.logger.info('Please provide pynode configuration.')
                 return False
 
+            # vault is decrypted once, transactions are signed by in memory session account
+            if not self.key_tool.unlock(self.manager.vault_key, self.manager.vault_idle_timeout) \
+                    or self.key_tool.vault_account.lower() not in self.account.lower():
+                self.key_tool.lock()
+                self.logger.info('Unable to unlock account vault.')
+                self.logger.info('Please provide pynode configuration.')
+                return False
+            self.logger.info('Vault check success')
             self.logger.info('Worker account determination success')
+            self.manager.mark_startup_stage('vault')
             self.worker_node_state_machine = WorkerNodeStateMachineThread(contract_container=self.worker_node_container,
                                                                           delegate=self,
                                                                           address=self.node,
                                                                           contract=self.manager.eth_worker_contract,
-                                                                          state_delegate=self)
+                                                                          state_delegate=self,
+                                                                          log_dispatcher=self.log_dispatcher)
             self.logger.info('Event listener for worker node creation startup success, alive : '
                              + str(self.worker_node_state_machine.alive()))
             self.logger.info('Worker node state event thread listener initialize success')
-            # process current worker node state after worker node event thread is initialized
-            current_worker_node_state = self.worker_node_state_machine.process_state()
+            # worker node state is read at the block events are dispatched after, no event is missed or repeated
+            resume_block = self.services.resume_block()
+            current_worker_node_state = self.worker_node_state_machine.process_state(block_identifier=resume_block)
             self.logger.info('Worker node state machine initialized success with state : '
-                             + str(current_worker_node_state))
+                             + str(current_worker_node_state) + ' at block ' + str(resume_block))
+            if current_worker_node_state == WorkerNode.IDLE:
+                self.prepare_state_transaction('acceptAssignment')
+            if start_events:
+                self.services.start_events()
+                self.manager.mark_startup_stage('first state')
+                self.log_startup_breakdown()
             # start main broker thread
             super().start()
             self.logger.info("Broker started successfully")
+            if not start_events:
+                return True
             # ----------------------------------------------------------------------------------
             # JOIN WORKER EVENTS CHANGE LISTENER to main process
             # ----------------------------------------------------------------------------------
             if self.mode == "0":  # join threads only in production mode
                 self.worker_node_state_machine.get_worker_node_event_thread().join()
-                if self.job_state_event_thread:
-                    self.job_state_event_thread.join()
             return True
         else:
             self.logger.info('Pynode eth connector not instantiated. exit')
@@ -187,45 +247,65 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
     def disconnect(self):
         super().join()
 
+    def log_startup_breakdown(self):
+        breakdown = self.manager.startup_breakdown()
+        self.logger.info('Startup time breakdown : '
+                         + ', '.join('%s %.2fs' % (stage, seconds) for stage, seconds in breakdown)
+                         + ', total %.2fs' % sum(seconds for _, seconds in breakdown))
+
 # ----------------------------------------------------------------------------------------------------------
 # JOB and PROCESSOR initialization
 # ----------------------------------------------------------------------------------------------------------
     # job address is necessary ADD it to method call parameters
     def init_cognitive_job(self) -> bool:
         if self.job_id_hex not in self.jobs:  # to avoid double init
-            self.job_state_machine = CognitiveJob(job_controller_container=self.job_controller_container,
-                                                  delegate=self)
-            current_job_state = self.job_state_machine.process_state(job_id_hex=self.job_id_hex)
+            job = JobContext(self.job_id_hex)
+            job.state_machine = CognitiveJob(job_controller_container=self.job_controller_container,
+                                             delegate=self)
+            current_job_state = job.state_machine.process_state(job_id_hex=self.job_id_hex)
             self.logger.info('Cognition job state machine initialized success with state : '
                              + str(current_job_state))
-            self.jobs[self.job_id_hex] = self.job_id_hex  # set job index to fobs list
+            self.jobs[self.job_id_hex] = job  # set job context to jobs list
 
             # job state loop init
-            self.job_state_thread_flag = True
-            filter_on_job = self.job_controller_container.events.JobStateChanged.createFilter(fromBlock='latest')
-            self.job_state_event_thread = Thread(target=self.job_filter_thread_loop,
-                                                 args=(filter_on_job, 2),
-                                                 daemon=True)
-            self.job_state_event_thread.start()
-            status = self.job_state_event_thread.is_alive()
+            job_events = Queue()
+            # only events of current job are routed to job listener
+            job.watch = self.log_dispatcher.watch(
+                address=self.job_controller_container.address,
+                event_abi=self.job_controller_container.events.JobStateChanged._get_event_abi(),
+                callback=job_events.put,
+                argument_filters={'jobId': self.worker_node_container.web3.toBytes(hexstr=self.job_id_hex)})
+            job.listen(self.job_filter_thread_loop, job_events, 2)
+            status = job.event_thread.is_alive()
             self.logger.info('Event listener for job states on job controller creation startup success, alive : '
                              + str(status))
             self.logger.info('Cognitive job state event thread listener initialize success')
         return True
 
-    # TODO for multiprocess cognition need to rebuild processor init flow
     def init_processor(self) -> Processor:
         # get kernel and dataset
         # prepare processor for calculating data
         if self.ipfs is not None:
+            # job setup reads are batched, block number is read by the first batch and the following reads
+            # are pinned to it for mutual consistency, every next batch depends on results of previous one
+            block = None
             # init job container if empty
             if not self.job_id_hex:
-                self.job_id_hex = self.worker_node_container.web3.toHex(self.worker_node_container.call().activeJob())
+                active_job_calls = [self.worker_node_container.functions.activeJob()]
+                block, (active_job,) = self.eth.call_batch_with_block(active_job_calls)
+                self.job_id_hex = self.worker_node_container.web3.toHex(active_job)
                 self.init_cognitive_job()
+            job = self.jobs[self.job_id_hex]
 
             try:
-                kernel_address = self.job_controller_container.call().getCognitiveJobDetails(self.job_id_hex)[0]
-                dataset_address = self.job_controller_container.call().getCognitiveJobDetails(self.job_id_hex)[1]
+                details_calls = [self.job_controller_container.functions.getCognitiveJobDetails(self.job_id_hex)]
+                if block is None:
+                    block, (job_details,) = self.eth.call_batch_with_block(details_calls)
+                else:
+                    job_details = self.eth.call_batch(details_calls, block)[0]
+                kernel_address = job_details[0]
+                dataset_address = job_details[1]
+                workers = job_details[4]
             except Exception as ex:
                 self.logger.error("Exception initializing job internal contract")
                 self.logger.error(ex.args)
@@ -246,13 +326,12 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
                 self.logger.error(ex.args)
 
             # get kernel and dataset addresses
-            kernel_ipfs_address = kernel_container.call().ipfsAddress()
-            dataset_ipfs_address = dataset_container.call().ipfsAddress()
+            kernel_ipfs_address, dataset_ipfs_address = self.eth.call_batch(
+                [kernel_container.functions.ipfsAddress(), dataset_container.functions.ipfsAddress()], block)
             self.logger.info('Kernel ipfs address : ' + str(kernel_ipfs_address))
             self.logger.info('Dataset ipfs address : ' + str(dataset_ipfs_address))
 
             # determinate batch for current job
-            workers = self.job_controller_container.call().getCognitiveJobDetails(self.job_id_hex)[4]
             batch = None
             for idx, w in enumerate(workers):
                 if self.node.lower() == w.lower():
@@ -268,21 +347,48 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
                               port=self.ipfs_port,
                               data_dir=self.data_dir)
             self.logger.info('IPFS connection instantiated success')
-            # load kernel and dataset root files
-            self.ipfs.download_file(kernel_ipfs_address.decode("utf-8"))
-            self.logger.info('Kernel datafile download success...')
-            self.ipfs.download_file(dataset_ipfs_address.decode("utf-8"))
-            self.logger.info('Dataset datafile download success...')
-
-            processor_id = '%s:%s' % (self.node, self.job_id_hex)
+            # job files are placed into job own workspace, cleaned up independently of other jobs
+            job.create_workspace(os.path.join(os.getcwd(), 'jobs'))
+            # job files are fetched concurrently, kernel and dataset files are scheduled
+            # as soon as their root files are landed and parsed
+            if job.fetch_scheduler is not None:
+                job.fetch_scheduler.shutdown()
+            job.fetch_scheduler = FetchScheduler(strategic=self.ipfs,
+                                                 workers=self.manager.ipfs_fetch_workers,
+                                                 directory=job.workspace)
+            job_ipfs = IpfsService(strategic=job.fetch_scheduler)
+
+            processor_id = self.processor_id(job.job_id_hex)
             # processor initialization
-            processor = Processor(ipfs_api=self.ipfs,
+            processor = Processor(ipfs_api=job_ipfs,
                                   processor_id=processor_id,
-                                  delegate=self)
+                                  delegate=self,
+                                  workspace=job.workspace,
+                                  job_id_hex=job.job_id_hex)
+            job.processors[processor_id] = processor
             self.processors[processor_id] = processor
             processor.run()
-            processor.prepare(kernel_file=self.read_file(kernel_ipfs_address),
-                              dataset_file=self.read_file(dataset_ipfs_address),
+
+            root_files = {}
+
+            def on_kernel_landed(file_path: str):
+                root_files['kernel'] = self.read_file(file_path)
+                processor.prefetch_kernel(root_files['kernel'])
+
+            def on_dataset_landed(file_path: str):
+                root_files['dataset'] = self.read_file(file_path)
+                processor.prefetch_dataset(root_files['dataset'], batch)
+
+            # load kernel and dataset root files (served from local blob cache if present)
+            job_ipfs.prefetch(kernel_ipfs_address.decode("utf-8"), on_landed=on_kernel_landed)
+            job_ipfs.prefetch(dataset_ipfs_address.decode("utf-8"), on_landed=on_dataset_landed)
+            job_ipfs.download_file(kernel_ipfs_address.decode("utf-8"))
+            self.logger.info('Kernel datafile download success...')
+            job_ipfs.download_file(dataset_ipfs_address.decode("utf-8"))
+            self.logger.info('Dataset datafile download success...')
+
+            processor.prepare(kernel_file=root_files['kernel'],
+                              dataset_file=root_files['dataset'],
                               batch=batch)
             return processor
 
@@ -310,34 +416,35 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
         self.logger.info("Contract WorkerNode changed its state from %s to %s",
                          worker_state_table[state_old].name,
                          worker_state_table[state_new].name)
+        # transactions signed in advance for not taken path are dropped
+        self.transaction_stage.discard(keep=self.entering_state_transactions.get(state_new))
         self.worker_node_state_machine.state(state_new)
+        if state_new == WorkerNode.IDLE:
+            self.prepare_state_transaction('acceptAssignment')
 
-    # job state filter loop
-    def job_filter_thread_loop(self, event_filter, pool_interval):
-        while self.job_state_thread_flag:
+    # job state events loop
+    def job_filter_thread_loop(self, job: JobContext, events: Queue, pool_interval):
+        while job.listening:
             try:
-                if event_filter:
-                    for event in event_filter.get_new_entries():
-                        event_job_id = self.worker_node_container.web3.toHex(event['args']['jobId'])
-                        if event_job_id == self.job_id_hex:
-                            self.on_cognitive_job_state_change(event)
-                    time.sleep(pool_interval)
-                else:
-                    # https://github.com/ethereum/web3.py/issues/354
-                    event_filter = self.job_container.events.StateChanged.createFilter(fromBlock='latest')
+                event = events.get(timeout=pool_interval)
+            except Empty:
+                continue
+            try:
+                self.on_cognitive_job_state_change(job, event)
             except Exception as ex:
                 self.logger.info('Exception on job event handler.')
                 self.logger.info(ex.args)
+        self.log_dispatcher.unwatch(job.watch)
 
-    def on_cognitive_job_state_change(self, event: dict):
-        job_state_table = self.job_state_machine.state_table
+    def on_cognitive_job_state_change(self, job: JobContext, event: dict):
+        job_state_table = job.state_machine.state_table
         state_old = event['args']['oldState']
         state_new = event['args']['newState']
         self.logger.info("Contract Cognitive job changed its state from %s to %s",
                          job_state_table[state_old].name,
                          job_state_table[state_new].name)
         # strange behavior of states (on TESLA MACHINE)
-        self.job_state_machine.state = state_new
+        job.state_machine.state = state_new
 
 
 # ----------------------------------------------------------------------------------------------------------
@@ -345,11 +452,10 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
 # ----------------------------------------------------------------------------------------------------------
     def create_cognitive_job(self):
         self.logger.info('CALL - create_cognitive_job')
-        # if job_container currently initialized skip initialization (optimize job initialization)
-        # job container assigns to None value on job complete
-        if self.job_container:
-            self.logger.info('Job container inited. return')
-            return
+        if self.manager.processor_warm_up == 'True':
+            # job is assigned, keras/tensorflow is loaded by compute workers while job files are awaited
+            self.compute_supervisor.warm_up()
+        # active job is read on every assignment, previous job context may be still committing its results
         job_id = self.worker_node_container.call().activeJob()
         if self.check_job_id(job_id) is None:
             self.logger.info("Job ID is invalid, cant determinate job")
@@ -363,129 +469,197 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
     def start_validating(self):
         self.logger.info('CALL - start_validating')
         self.logger.info("Starting validating data")
-        try:
-            processor = self.init_processor()
-        except Exception as ex:
-            self.logger.error("Error during processor initialization: %s", type(ex))
-            self.logger.error(ex.args)
-            self.processor_load_failure(None)
+        # job files are loaded off worker node state thread, events are processed meanwhile
+        self.worker_node_state_machine.submit(self.init_processor, self.on_validating_processor_ready)
+
+    def on_validating_processor_ready(self, processor: Union[Processor, None], error: Exception):
+        if error is not None or not processor:
+            self.logger.error("Error during processor initialization: %s", type(error))
+            self.logger.error(getattr(error, 'args', None))
+            # job context is released by id of processor which was not created
+            self.processor_load_failure(self.processor_id(self.job_id_hex))
             return
-        processor.load()
+        if self.worker_node_state_machine.current_state() != WorkerNode.VALIDATING_DATA:
+            self.logger.info('Worker node left validating state, processor loading skipped')
+            return
+        self.compute_supervisor.load(processor)
 
     def start_computing(self):
         self.logger.info('CALL - start_computing')
         self.logger.info("Starting computing cognitive job")
-        if not self.processors:  # if processors is empty init it
-            try:
-                processor = self.init_processor()
-            except Exception as ex:
-                self.logger.error("Error during processor initialization: %s", type(ex))
-                self.logger.error(ex.args)
-                self.processor_computing_failure(None)
-                return
-            # start computing after processor init
-            if processor:
-                processor.compute()
-            # if processor init false terminate job
+        job = self.jobs.get(self.job_id_hex)
+        processor = job.processor() if job is not None else None
+        if processor is None:  # if active job processor is not initialized init it
+            self.worker_node_state_machine.submit(self.init_processor, self.on_computing_processor_ready)
         else:
-            list(self.processors.values())[0].compute()
+            self.compute_supervisor.compute(processor)
+
+    def on_computing_processor_ready(self, processor: Union[Processor, None], error: Exception):
+        if error is not None or not processor:
+            self.logger.error("Error during processor initialization: %s", type(error))
+            self.logger.error(getattr(error, 'args', None))
+            processor_id = self.processor_id(self.job_id_hex)
+            self.release_job(processor_id)
+            self.processor_computing_failure(processor_id)
+            return
+        if self.worker_node_state_machine.current_state() != WorkerNode.COMPUTING:
+            self.logger.info('Worker node left computing state, computing skipped')
+            return
+        # start computing after processor init
+        if processor:
+            self.compute_supervisor.compute(processor)
+        # if processor init false terminate job
 
     def state_transact(self, name: str, *result_file):
         self.logger.info("Transact to worker node : " + name)
-        private_key = self.key_tool.obtain_key(self.manager.vault_key).split("_", 1)[1]
-        tx_status = 0
-        while tx_status == 0:
+        self.submit_state_transactions(self.state_transaction_names(name), *result_file)
+
+    def state_transaction_names(self, name: str) -> list:
+        # job queue check is pipelined right after results, it reverts when results transaction fails
+        names = [name]
+        if name in self.pipelined_state_transactions:
+            names.append(self.pipelined_state_transactions[name])
+        return names
+
+    def submit_state_transactions(self, names: list, *result_file):
+        # receipts are confirmed by receipt tracker, event processing is not blocked
+        for idx, tx_name in enumerate(names):
             try:
-                checksum_worker_node_account = self.worker_node_container.web3.toChecksumAddress(
-                    self.manager.eth_worker_node_account)
-                nonce = self.worker_node_container.web3.eth.getTransactionCount(checksum_worker_node_account,
-                                                                                "pending")
-                self.logger.info('Calculate gas estimation...')
-                gas_estimation = self.worker_node_container.web3.eth.generateGasPrice()
-                gas_estimation = int(gas_estimation + gas_estimation/2)
-                gas_price = self.worker_node_container.web3.eth.gasPrice
-                self.logger.info('Gas estimated : ' + str(gas_estimation))
-                raw_transaction = None
-                if name in 'alive':
-                    raw_transaction = self.worker_node_container.functions.alive() \
-                        .buildTransaction({
-                            'from': checksum_worker_node_account,
-                            'nonce': nonce,
-                            'gas': gas_estimation,
-                            'gasPrice': int(gas_price)})
-                if name in 'acceptAssignment':
-                    raw_transaction = self.worker_node_container.functions.acceptAssignment() \
-                        .buildTransaction({
-                            'from': checksum_worker_node_account,
-                            'nonce': nonce,
-                            'gas': gas_estimation,
-                            'gasPrice': int(gas_price)})
-                if name in 'processToDataValidation':
-                    raw_transaction = self.worker_node_container.functions.processToDataValidation() \
-                        .buildTransaction({
-                            'from': checksum_worker_node_account,
-                            'nonce': nonce,
-                            'gas': gas_estimation,
-                            'gasPrice': int(gas_price)})
-                if name in 'reportInvalidData':
-                    raw_transaction = self.worker_node_container.functions.reportInvalidData() \
-                        .buildTransaction({
-                            'from': checksum_worker_node_account,
-                            'nonce': nonce,
-                            'gas': gas_estimation,
-                            'gasPrice': int(gas_price)})
-                if name in 'acceptValidData':
-                    raw_transaction = self.worker_node_container.functions.acceptValidData() \
-                        .buildTransaction({
-                            'from': checksum_worker_node_account,
-                            'nonce': nonce,
-                            'gas': gas_estimation,
-                            'gasPrice': int(gas_price)})
-                if name in 'processToCognition':
-                    raw_transaction = self.worker_node_container.functions.processToCognition() \
-                        .buildTransaction({
-                            'from': checksum_worker_node_account,
-                            'nonce': nonce,
-                            'gas': gas_estimation,
-                            'gasPrice': int(gas_price)})
-                if name in 'provideResults':
-                    raw_transaction = self.worker_node_container.functions.provideResults(str.encode(result_file[0])) \
-                        .buildTransaction({
-                            'from': checksum_worker_node_account,
-                            'nonce': nonce,
-                            'gas': int(gas_estimation),
-                            'gasPrice': int(gas_price)})
-                if name in 'checkJobQueue':
-                    raw_transaction = self.pandora_container.functions.checkJobQueue() \
-                        .buildTransaction({
-                            'from': checksum_worker_node_account,
-                            'nonce': nonce,
-                            'gas': int(gas_estimation),
-                            'gasPrice': int(gas_price)})
-
-                if raw_transaction is not None:
-                    signed_transaction = self.worker_node_container.web3.eth.account.signTransaction(raw_transaction,
-                                                                                                     private_key)
-                    tx_hash = self.worker_node_container.web3.eth.sendRawTransaction(signed_transaction.rawTransaction)
-                    self.logger.info('TX_HASH : ' + tx_hash.hex())
-                    self.logger.info('Waiting for receipt...')
-                    transaction_receipt = self.worker_node_container.web3.eth.waitForTransactionReceipt(tx_hash,
-                                                                                                        timeout=300)
-                    if transaction_receipt:
-                        self.logger.info('TX_RECEIPT : ' + str(transaction_receipt))
-                        self.logger.info('TRANSACTION_STATUS = ' + str(transaction_receipt['status']))
-                        tx_status = transaction_receipt['status']
-                        if name in 'provideResults':
-                            self.state_transact('checkJobQueue')
-                    time.sleep(5)  # wait some time after transaction (nonce refreshing on node)
+                staged = self.transaction_stage.take(tx_name, self.gas_oracle.gas_price())
+                if staged is not None:
+                    raw_transaction, signed_transaction = staged
                 else:
-                    self.logger.info('Unknown state transaction. Skip.')
-                    tx_status = 1  # for unknown state transaction reason
+                    raw_transaction = self.build_state_transaction(tx_name, *result_file)
+                    if raw_transaction is None:
+                        continue
+                    signed_transaction = None
+                tx_hash = self.send_raw_transaction(raw_transaction, signed_transaction)
             except Exception as ex:
-                self.logger.error("Error executing %s transaction: %s", name, type(ex))
+                self.logger.error("Error executing %s transaction: %s", tx_name, type(ex))
                 self.logger.error(ex.args)
-                time.sleep(5)
-        return
+                # transactions after not sent one are repeated as well
+                self.retry_state_transactions(names[idx:], *result_file)
+                return
+            self.receipt_tracker.track(tx_hash, raw_transaction,
+                                       callback=lambda receipt, transaction, tx_name=tx_name:
+                                       self.on_state_transaction_receipt(tx_name, receipt, transaction, *result_file))
+        if names[-1] in self.next_state_transactions:
+            self.prepare_state_transaction(self.next_state_transactions[names[-1]])
+
+    def prepare_state_transaction(self, name: str):
+        """ Build and sign expected state transaction for the next nonce in background """
+        def prepare():
+            try:
+                raw_transaction = self.build_state_transaction(name, nonce=self.nonce_manager.peek())
+                if raw_transaction is None:
+                    return
+                signed_transaction = self.key_tool.sign_transaction(raw_transaction, self.manager.vault_key)
+                self.transaction_stage.stage(name, raw_transaction, signed_transaction)
+            except Exception as ex:
+                # transaction is built and signed on sending
+                self.logger.info('Unable to prepare %s transaction.', name)
+                self.logger.info(ex.args)
+        Thread(target=prepare, daemon=True).start()
+
+    def retry_state_transactions(self, names: list, *result_file):
+        timer = Timer(5, self.submit_state_transactions, args=(names,) + result_file)
+        timer.daemon = True
+        timer.start()
+
+    def on_state_transaction_receipt(self, name: str, receipt, transaction: Union[dict, None], *result_file):
+        if receipt is not None and receipt['status'] == 1:
+            self.logger.info('Transaction %s confirmed', name)
+            return
+        if receipt is None and transaction is not None and not self.is_nonce_mined(transaction['nonce']):
+            # transaction may still be pending, it is replaced at its nonce, so only one of them lands
+            self.logger.info('Transaction %s is not mined, replace it at nonce %s', name, transaction['nonce'])
+            self.replace_state_transaction(name, transaction, *result_file)
+            return
+        if receipt is not None:
+            # failure may be caused by gas estimated in other contract state
+            self.gas_oracle.invalidate(name)
+        if not self.is_state_transaction_expected(name):
+            self.logger.info('Transaction %s is not valid in current worker node state, stop repeating', name)
+            return
+        self.logger.info('Transaction %s failed, repeat', name)
+        self.retry_state_transactions(self.state_transaction_names(name), *result_file)
+
+    def replace_state_transaction(self, name: str, transaction: dict, *result_file):
+        """ Send state transaction at nonce of not mined one with higher gas price """
+        try:
+            raw_transaction = self.build_state_transaction(name, *result_file, nonce=transaction['nonce'])
+            raw_transaction['gasPrice'] = max(raw_transaction['gasPrice'],
+                                              int(transaction['gasPrice'] * self.receipt_tracker.gas_bump))
+            tx_hash = self.resend_transaction(raw_transaction)
+        except Exception as ex:
+            self.logger.error("Error replacing %s transaction: %s", name, type(ex))
+            self.logger.error(ex.args)
+            # nonce may be mined meanwhile, it is checked again before the next attempt
+            timer = Timer(5, self.on_state_transaction_receipt, args=(name, None, transaction) + result_file)
+            timer.daemon = True
+            timer.start()
+            return
+        self.logger.info('TX_HASH : ' + tx_hash.hex())
+        self.receipt_tracker.track(tx_hash, raw_transaction,
+                                   callback=lambda receipt, last_transaction:
+                                   self.on_state_transaction_receipt(name, receipt, last_transaction, *result_file))
+
+    def is_nonce_mined(self, nonce: int) -> bool:
+        try:
+            return self.nonce_manager.is_mined(nonce)
+        except Exception as ex:
+            # not mined transaction is replaced at the same nonce, it is safe on doubt
+            self.logger.info('Unable to read transactions count.')
+            self.logger.info(ex.args)
+            return False
+
+    def is_state_transaction_expected(self, name: str) -> bool:
+        """ Worker node state is read again, repeated transaction would revert in not matching state """
+        try:
+            state = self.worker_node_state_machine.read_state()
+        except Exception as ex:
+            self.logger.info('Unable to read worker node state.')
+            self.logger.info(ex.args)
+            return True
+        return state in self.state_transaction_states.get(name, ())
+
+    def build_state_transaction(self, name: str, *result_file, nonce: int = None) -> Union[dict, None]:
+        checksum_worker_node_account = self.worker_node_container.web3.toChecksumAddress(self.account)
+        if name not in self.transaction_catalog:
+            self.logger.info('Unknown state transaction. Skip.')
+            return None
+        if name == 'provideResults':
+            call = self.transaction_catalog.call(name, str.encode(result_file[0]))
+        elif name == 'reportProgress':
+            # progress sent along with state transactions is the final one
+            call = self.transaction_catalog.call(name, 100)
+        else:
+            call = self.transaction_catalog.call(name)
+        gas_limit = self.gas_oracle.gas_limit(name, call, checksum_worker_node_account)
+        gas_price = self.gas_oracle.gas_price()
+        self.logger.info('Gas limit : ' + str(gas_limit) + ', gas price : ' + str(gas_price))
+        return call.transaction({
+            'from': checksum_worker_node_account,
+            'nonce': self.nonce_manager.allocate() if nonce is None else nonce,
+            'gas': gas_limit,
+            'gasPrice': gas_price})
+
+    def send_raw_transaction(self, raw_transaction: dict, signed_transaction=None):
+        # nonce of transaction not accepted by node is returned to nonce manager
+        try:
+            if signed_transaction is None:
+                signed_transaction = self.key_tool.sign_transaction(raw_transaction, self.manager.vault_key)
+            tx_hash = self.worker_node_container.web3.eth.sendRawTransaction(signed_transaction.rawTransaction)
+        except Exception as ex:
+            self.nonce_manager.release(raw_transaction['nonce'], ex)
+            raise
+        self.logger.info('TX_HASH : ' + tx_hash.hex())
+        return tx_hash
+
+    def resend_transaction(self, raw_transaction: dict):
+        """ Resend transaction with the same nonce, used by receipt tracker for gas bumping """
+        signed_transaction = self.key_tool.sign_transaction(raw_transaction, self.manager.vault_key)
+        return self.worker_node_container.web3.eth.sendRawTransaction(signed_transaction.rawTransaction)
 
 # ----------------------------------------------------------------------------------------------------------
 # Cognitive job delegate methods
@@ -507,25 +681,57 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
     def processor_load_failure(self, processor_id: Union[str, None]):
         self.logger.info('Processor loading fail.')
         self.logger.info('Reporting invalid data')
+        self.release_job(processor_id)
         self.state_transact('reportInvalidData')
 
+    def processor_id(self, job_id_hex: str) -> str:
+        # processor id is prefixed by worker node, compute workers route its calls to broker of node
+        return '%s:%s' % (self.node, job_id_hex)
+
+    def release_job(self, processor_id: Union[str, None]):
+        # only finished job context is released, processors of other jobs are kept
+        processor = self.processors.pop(processor_id, None)
+        # job with failed processor initialization has no processor, it is found by id
+        job_id_hex = processor.job_id_hex if processor is not None else str(processor_id).split(':', 1)[-1]
+        job = self.jobs.pop(job_id_hex, None)
+        if job is None:
+            return
+        for job_processor_id in job.processors:
+            self.processors.pop(job_processor_id, None)
+        job.close()  # finalize job event listener loop
+        # results are already uploaded to IPFS node, job files are not needed anymore
+        job.remove_workspace()
+        if self.manager.eth_job_id_hex == job.job_id_hex:
+            self.manager.eth_job_id_hex = ''
+        self.logger.info('Job %s context cleaned up', job.job_id_hex)
+
     def processor_computing_complete(self, processor_id: str, results_file: str):
         self.logger.info('Processor computing complete.')
         self.logger.info('Providing results')
         self.logger.info('Result file address : ' + results_file)
 
         self.manager.set_complete_reset()
-        self.processors = {}  # re init processors list (while node working on one job per iteration)
-        self.job_container = None  # clean up job container for prevent calculating same data on next job
-        self.job_state_thread_flag = False  # finalize job event listener loop
-        self.job_state_event_thread = None
-        self.logger.info('Job container cleaned up')
-        self.transact_progress(100, True)
-        self.state_transact('provideResults', results_file)
+        self.compute_retries.pop(processor_id, None)
+        self.release_job(processor_id)
+        # pending intermediate progress is dropped, final one is sent right before results with the next nonce,
+        # receipts are confirmed by receipt tracker, supervisor dispatch thread is not blocked
+        self.progress_reporter.reset()
+        self.logger.info("Transact to worker node : reportProgress, provideResults")
+        self.submit_state_transactions(['reportProgress'] + self.state_transaction_names('provideResults'),
+                                       results_file)
 
     def processor_computing_failure(self, processor_id: Union[str, None]):
-        self.logger.critical("Can't complete computing, exiting in order to reboot and try to repeat the work.")
-        self.restart_pynode()
+        # failed compute worker is already replaced by warm spare, job is repeated on it
+        processor = self.processors.get(processor_id)
+        retries = self.compute_retries.get(processor_id, 0)
+        if processor is None or retries >= self.manager.compute_retries:
+            self.logger.critical("Can't complete computing, exiting in order to reboot and try to repeat the work.")
+            self.restart_pynode()
+            return
+        self.compute_retries[processor_id] = retries + 1
+        self.logger.error("Can't complete computing, repeat the work on compute worker (retry %s of %s)",
+                          retries + 1, self.manager.compute_retries)
+        self.compute_supervisor.compute(processor)
 
 # ----------------------------------------------------------------------------------------------------------
 # Kernel progress delegate methods
@@ -534,7 +740,7 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
         print('CALL : ON_TRAIN_BEGIN')
         self.start_training_time = time.time()
         self.send_progress = False
-        self.sends_count = 1
+        self.progress_reporter.reset()
         return
 
     def on_train_end(self, logs):
@@ -542,7 +748,6 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
         self.finish_training_time = time.time()
         self.logger.info('Total training time : ' + str(self.finish_training_time - self.start_training_time))
         self.send_progress = False
-        self.sends_count = 1
         return
 
     def on_epoch_begin(self, epoch, epochs, logs):
@@ -561,68 +766,44 @@ class Broker(Thread, Singleton, WorkerNodeDelegate, WorkerNodeStateDelegate, Pro
             self.logger.info('Time per epoch : ' + str(self.time_per_epoch))
             total_time = self.time_per_epoch * epochs
             self.logger.info('Total training time : ' + str(total_time))
-            if total_time > self.send_progress_interval:
+            if total_time > self.manager.eth_progress_interval:
                 self.send_progress = True
             self.logger.info('Send progress strategy enabled : ' + str(self.send_progress))
-            time.sleep(5)
             return
         if self.send_progress:
             current_percent = int(100/epochs * epoch)
             self.logger.info('Current percent : ' + str(current_percent))
-            if time.time() >= self.start_training_time + (self.send_progress_interval * self.sends_count):
-                self.logger.info("transact presents : " + str(current_percent) + '%')
-                Thread(target=self.transact_progress(current_percent, False), args=(), daemon=True).start()
-                self.sends_count += 1
-                self.logger.info('CURRENT MODIFIER VALUE : ' + str(self.sends_count))
+            # reporter sends the latest percent on its interval, training is not blocked
+            self.progress_reporter.report(current_percent)
         return
 
-    def transact_progress(self, percents, wait_receipt):
-        self.logger.info("Transact progress to worker node")
-        private_key = self.key_tool.obtain_key(self.manager.vault_key).split("_", 1)[1]
-        tx_status = 0
-        while tx_status == 0:
-            try:
-                nonce = self.worker_node_container.web3.eth.getTransactionCount(self.manager.eth_worker_node_account,
-                                                                                "pending")
-                self.logger.info('Calculate gas estimation...')
-                gas_estimation = self.worker_node_container.web3.eth.generateGasPrice()
-                gas_price = self.worker_node_container.web3.eth.gasPrice
-                self.logger.info('Gas estimated : ' + str(gas_estimation))
-                raw_transaction = self.worker_node_container.functions.reportProgress(percents) \
-                    .buildTransaction({'from': self.manager.eth_worker_node_account,
-                                       'nonce': nonce,
-                                       'gas': int(gas_estimation + gas_estimation/2),
-                                       'gasPrice': int(gas_price)})
-                signed_transaction = self.worker_node_container.web3.eth.account.signTransaction(raw_transaction,
-                                                                                                 private_key)
-                tx_hash = self.worker_node_container.web3.eth.sendRawTransaction(signed_transaction.rawTransaction)
-                self.logger.info('TX_HASH : ' + tx_hash.hex())
-                if wait_receipt:
-                    self.logger.info('Waiting for receipt...')
-                    transaction_receipt = self.worker_node_container.web3.eth.waitForTransactionReceipt(tx_hash,
-                                                                                                        timeout=300)
-                    if transaction_receipt:
-                        self.logger.info('TX_RECEIPT : ' + str(transaction_receipt))
-                        self.logger.info('TRANSACTION_STATUS = ' + str(transaction_receipt['status']))
-                        tx_status = transaction_receipt['status']
-                        time.sleep(2)  # wait some time after transaction (nonce refreshing on node)
-                    else:
-                        self.logger.info('Unknown state transaction. Skip.')
-                        tx_status = 1  # for unknown state transaction reason
-                        return
-                else:
-                    tx_status = 1
-            except Exception as ex:
-                self.logger.error("Error executing progress transaction: %s", type(ex))
-                self.logger.error(ex.args)
-                time.sleep(5)
-        return
+    def build_progress_transaction(self, percents) -> dict:
+        checksum_worker_node_account = self.worker_node_container.web3.toChecksumAddress(self.account)
+        call = self.transaction_catalog.call('reportProgress', percents)
+        gas_limit = self.gas_oracle.gas_limit('reportProgress', call, checksum_worker_node_account)
+        gas_price = self.gas_oracle.gas_price()
+        self.logger.info('Gas limit : ' + str(gas_limit) + ', gas price : ' + str(gas_price))
+        return call.transaction({'from': checksum_worker_node_account,
+                                 'nonce': self.nonce_manager.allocate(),
+                                 'gas': gas_limit,
+                                 'gasPrice': gas_price})
+
+    def send_progress_transaction(self, percents) -> int:
+        """ Send progress by reporter thread, returns max fee charged to progress gas budget """
+        self.logger.info("Transact progress to worker node : " + str(percents) + '%')
+        raw_transaction = self.build_progress_transaction(percents)
+        tx_hash = self.send_raw_transaction(raw_transaction)
+        # progress transaction is tracked anyway, stuck one would hold next nonces
+        self.receipt_tracker.track(tx_hash, raw_transaction)
+        return raw_transaction['gas'] * raw_transaction['gasPrice']
 
 # ----------------------------------------------------------------------------------------------------------
 # System methods
 # ----------------------------------------------------------------------------------------------------------
     def restart_pynode(self):
         """ Restart pynode due keras or tensorflow exception """
+        self.compute_supervisor.stop()
+        self.key_tool.lock()
         os.chdir(self.manager.primary_wd)
         script = os.path.join(self.manager.primary_wd, 'pynode.py')
         subprocess.Popen(
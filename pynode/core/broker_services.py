@@ -0,0 +1,113 @@
+import logging
+
+from threading import RLock
+
+from integration.eth_service import EthService
+from integration.integration.eth_connector import EthConnector
+from integration.ipfs_service import IpfsService
+from integration.integration.ipfs_connector import IpfsConnector
+from integration.gas_oracle import GasOracle
+from integration.receipt_tracker import ReceiptTracker
+from integration.event_source import EventSource
+from integration.log_dispatcher import LogDispatcher
+from integration.log_cursor import LogCursor
+from integration.integration.log_poller import LogPoller
+from integration.integration.log_subscriber import LogSubscriber
+
+from core.manager import Manager
+from core.patterns.pynode_logger import LogSocketHandler
+from core.processor.compute_worker import ComputeSupervisor
+
+
+class BrokerServices:
+    """
+    Connections and caches shared by brokers of all worker nodes hosted by pynode process: eth connections pool,
+    IPFS blob cache, compute workers, gas prices, receipts tracking and contract logs dispatching.
+    Every broker keeps its own account vault, nonces, transactions and state machines.
+    """
+
+    def __init__(self, nodes: list):
+        # Initializing logger object
+        self.logger = logging.getLogger("BrokerServices")
+        self.logger.addHandler(LogSocketHandler.get_instance())
+        self.manager = Manager.get_instance()
+        # logs cursor is checkpointed under every hosted worker node address
+        self.nodes = nodes
+
+        self.eth = EthService(strategic=EthConnector(pool_size=self.manager.eth_pool_size,
+                                                     sync_check_ttl=self.manager.eth_sync_check_ttl))
+        self.ipfs = IpfsService(strategic=IpfsConnector(cache_size=self.manager.ipfs_cache_size,
+                                                        gateway=self.manager.ipfs_gateway,
+                                                        chunk_size=self.manager.ipfs_chunk_size))
+        # keras computations run in supervised worker process, spare worker is pre-started
+        self.compute_supervisor = ComputeSupervisor(delegate=None)
+        self.compute_supervisor.start()
+
+        self.gas_oracle = None
+        self.receipt_tracker = None
+        self.event_source = None
+        self.log_dispatcher = None
+
+        self.__lock = RLock()
+        self.__brokers = {}  # worker node account -> broker signing its transactions
+        self.__resume_block = None
+        self.__events_started = False
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    def register(self, broker):
+        """ Route processors calls and transactions resending of broker worker node """
+        with self.__lock:
+            self.__brokers[broker.account.lower()] = broker
+        self.compute_supervisor.register_delegate(broker.node, broker)
+
+    def connect(self, web3):
+        """ Start services depending on eth connection, done by the first connected broker """
+        with self.__lock:
+            if self.gas_oracle is not None:
+                return
+            # gas price and limits are served from memory, refreshed in background
+            self.gas_oracle = GasOracle(web3,
+                                        refresh_interval=self.manager.eth_gas_refresh_interval,
+                                        max_age=self.manager.eth_gas_max_age,
+                                        default_gas_limit=self.manager.eth_gas_limit)
+            self.gas_oracle.start()
+            self.receipt_tracker = ReceiptTracker(web3,
+                                                  resend=self.resend_transaction,
+                                                  stuck_blocks=self.manager.eth_receipt_stuck_blocks,
+                                                  timeout_blocks=self.manager.eth_receipt_timeout_blocks)
+            self.receipt_tracker.start()
+            # contract events are pushed by node subscriptions if configured, polled otherwise
+            push = LogSubscriber(self.manager.eth_subscription_host) if self.manager.eth_subscription_host else None
+            self.event_source = EventSource(polling=LogPoller(web3, poll_interval=self.manager.eth_poll_interval),
+                                            push=push)
+            # logs of all watched events of all worker nodes are read once per block
+            self.log_dispatcher = LogDispatcher(web3, self.event_source,
+                                                cursor=LogCursor(self.manager.eth_log_cursor_file,
+                                                                 keys=self.nodes),
+                                                confirmations=self.manager.eth_confirmations,
+                                                replay_blocks=self.manager.eth_log_replay_blocks)
+
+    def resume_block(self) -> int:
+        """ Block all worker nodes states are read at, events are dispatched after it """
+        with self.__lock:
+            if self.__resume_block is None:
+                self.__resume_block = self.log_dispatcher.resume_block()
+            return self.__resume_block
+
+    def start_events(self):
+        """ Start logs dispatching once every hosted worker node watches its events """
+        with self.__lock:
+            if self.__events_started:
+                return
+            self.__events_started = True
+            self.log_dispatcher.start()
+            self.event_source.start()
+        self.logger.info('Worker node events source mode : ' + self.event_source.mode)
+
+    def resend_transaction(self, raw_transaction: dict):
+        # transaction is signed again by broker of its sender account
+        with self.__lock:
+            broker = self.__brokers[raw_transaction['from'].lower()]
+        return broker.resend_transaction(raw_transaction)
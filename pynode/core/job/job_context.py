@@ -0,0 +1,53 @@
+import os
+import shutil
+import logging
+
+from threading import Thread
+
+
+class JobContext:
+    """
+    Resources of one cognitive job: workspace directory with job files, job state machine and its events
+    listener, fetch scheduler and processors. Several job contexts are kept at once, so next job can be
+    validated while previous one commits its results.
+    """
+
+    def __init__(self, job_id_hex: str):
+        self.logger = logging.getLogger("JobContext")
+        self.job_id_hex = job_id_hex
+        self.workspace = ''
+        self.state_machine = None
+        self.watch = None
+        self.event_thread = None
+        self.listening = False
+        self.fetch_scheduler = None
+        self.processors = {}  # processor id -> Processor
+
+    def create_workspace(self, root: str) -> str:
+        self.workspace = os.path.join(os.path.abspath(root), self.job_id_hex)
+        os.makedirs(self.workspace, exist_ok=True)
+        self.logger.info('Job %s workspace : %s', self.job_id_hex, self.workspace)
+        return self.workspace
+
+    def listen(self, target, *args):
+        # job events are processed by own thread while context is listening
+        self.listening = True
+        self.event_thread = Thread(target=target, args=(self,) + args, daemon=True)
+        self.event_thread.start()
+
+    def processor(self):
+        return next(iter(self.processors.values()), None)
+
+    def remove_workspace(self):
+        """ Remove workspace directory with all job files, results file included """
+        if self.workspace and os.path.isdir(self.workspace):
+            shutil.rmtree(self.workspace, ignore_errors=True)
+            self.logger.info('Job %s workspace removed', self.job_id_hex)
+
+    def close(self):
+        """ Stop job listener and downloads, job files are cleaned up by its processor """
+        self.listening = False
+        if self.fetch_scheduler is not None:
+            self.fetch_scheduler.shutdown()
+            self.fetch_scheduler = None
+        self.processors = {}
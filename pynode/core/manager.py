@@ -1,3 +1,5 @@
+import time
+
 
 class Manager:
     """
@@ -11,6 +13,7 @@ class Manager:
 # Global Pynode settings CANT be changed while pynode is launched
 # ----------------------------------
     vault_key = None
+    vault_idle_timeout = 0                                  # seconds before signing session lock, 0 - never
     # pynode global
     pynode_start_on_launch = None
     pynode_config_file_path = None
@@ -24,15 +27,47 @@ class Manager:
     eth_pandora_contract = None
     eth_worker = None
     eth_worker_contract = None
+    eth_worker_nodes = []                                   # (worker node contract, owner account) hosted by process
     eth_job_controller_contract = None
     eth_job_id_hex = None
     eth_kernel_contract = None
     eth_dataset_contract = None
+    eth_pool_size = 10                                      # keep-alive connections per ethereum host
+    eth_sync_check_ttl = 60                                 # seconds between ethereum node sync checks
+    eth_gas_refresh_interval = 60                           # min seconds between background gas price refreshes
+    eth_gas_max_age = 300                                   # max age in seconds of served gas price
+    eth_gas_limit = 1000000                                 # gas limit for functions without gas estimation
+    eth_receipt_stuck_blocks = 8                            # blocks without receipt before gas price bump
+    eth_receipt_timeout_blocks = 40                         # blocks without receipt before transaction is repeated
+    eth_progress_interval = 300                             # min seconds between training progress reports
+    eth_progress_gas_budget = 0                             # max wei spent on progress reports per job, 0 unlimited
+    eth_subscription_host = None                            # ws:// or IPC path for pushed events, polling if empty
+    eth_poll_interval = 2                                   # seconds between block number polls
+    eth_confirmations = 1                                   # blocks on top of block before its events are processed
+    eth_log_cursor_file = 'log_cursor.json'                 # checkpoint of the last processed event log
+    eth_log_replay_blocks = 100                             # max blocks of logs replayed after checkpoint on restart
     # base global ipfs settings for fast access from any module
     ipfs_use = None
     ipfs_storage = None
     ipfs_host = None
     ipfs_port = None
+    ipfs_cache_size = 0                                     # bytes budget for local IPFS blob cache
+    ipfs_fetch_workers = 4                                  # concurrent job files downloads
+    ipfs_gateway = 'https://gateway.ipfs.io/ipfs/'          # public gateway fallback, empty - node only
+    ipfs_chunk_size = 1024 * 1024                           # streaming download chunk size in bytes
+    # base processor settings
+    dataset_load_mode = 'mmap'                              # 'mmap', 'memory' or 'stream' HDF5 datasets loading
+    batch_prefetch = 4                                      # batches read ahead of training/prediction
+    model_pool_size = 1024 * 1024 * 1024                    # bytes budget for compiled models pool
+    model_pool_recycle = 8                                  # stale models count for backend session recycling
+    compute_retries = 3                                     # job computing retries on replaced compute worker
+    processor_warm_up = 'True'                              # load processor stack in background on job assignment
+    prediction_processes = 1                                # processes sharing prediction rows, 1 - in compute worker
+    inference_tuning = 'True'                               # probe prediction settings while compute worker is idle
+    inference_tuning_file = 'inference_tuning.json'         # tuned settings by kernel, input shape and host
+    predict_batch_size = 0                                  # prediction batch size override, 0 - tuned
+    intra_op_threads = 0                                    # tensorflow intra-op threads override, 0 - tuned
+    inter_op_threads = 0                                    # tensorflow inter-op threads override, 0 - tuned
     # base settings for web socket launch
     web_socket_enable = False
     web_socket_host = None
@@ -75,6 +110,17 @@ class Manager:
     # variable for storing last result ipfs address
     job_result_ipfs_address = ''                            # '' - empty or address while job is in process
 
+    # variables for storing local IPFS blob cache statistics
+    ipfs_cache_hits = 0
+    ipfs_cache_misses = 0
+    ipfs_cache_evicted_bytes = 0
+
+    # variable for storing peak resident memory of last job processing
+    job_peak_resident_bytes = 0
+
+    # launch stages with their finish timestamps for startup time breakdown
+    startup_stages = []
+
     __instance = None
 
     def __init__(self):
@@ -123,6 +169,24 @@ class Manager:
         self.job_result_ipfs_address = address
         self.on_property_value_change()
 
+    def set_ipfs_cache_stats(self, hits: int, misses: int, evicted_bytes: int):
+        self.ipfs_cache_hits = hits
+        self.ipfs_cache_misses = misses
+        self.ipfs_cache_evicted_bytes = evicted_bytes
+        self.on_property_value_change()
+
+    def set_job_peak_resident_bytes(self, resident_bytes: int):
+        self.job_peak_resident_bytes = resident_bytes
+        self.on_property_value_change()
+
+    def mark_startup_stage(self, stage: str):
+        self.startup_stages.append((stage, time.time()))
+
+    def startup_breakdown(self) -> list:
+        # seconds spent on every launch stage since previous one
+        return [(stage, finished - self.startup_stages[idx - 1][1])
+                for idx, (stage, finished) in enumerate(self.startup_stages) if idx > 0]
+
     def set_complete_reset(self):
         self.job_contract_address = ''
         self.job_contract_state = ''
@@ -11,10 +11,10 @@ class StatefulContract(StateMachine):
         StateMachine.__init__(self, table=table)
         self.contract_container = contract_container
 
-    def process_state(self):
+    def process_state(self, block_identifier='latest'):
         state = 0
         try:
-            state = self.contract_container.call().currentState()
+            state = self.read_state(block_identifier)
         except Exception as ex:
             self.logger.info('Exception on process worker state.')
             self.logger.info(ex.args)
@@ -23,4 +23,5 @@ class StatefulContract(StateMachine):
         self.state = state
         return state
 
-
+    def read_state(self, block_identifier='latest') -> int:
+        return self.contract_container.functions.currentState().call(block_identifier=block_identifier)
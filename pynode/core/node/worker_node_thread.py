@@ -1,10 +1,13 @@
-import time
 import logging
 
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import Future
+from typing import Callable
+
 from core.node.worker_node import WorkerNode
-from threading import Thread
 from core.patterns.pynode_logger import LogSocketHandler
+from core.patterns.state_actor import StateActor
+from integration.log_dispatcher import LogDispatcher
 
 
 class WorkerNodeStateDelegate(metaclass=ABCMeta):
@@ -15,7 +18,8 @@ class WorkerNodeStateDelegate(metaclass=ABCMeta):
 
 class WorkerNodeStateMachineThread:
 
-    def __init__(self, contract_container, delegate, address, contract, state_delegate: WorkerNodeStateDelegate):
+    def __init__(self, contract_container, delegate, address, contract, state_delegate: WorkerNodeStateDelegate,
+                 log_dispatcher: LogDispatcher):
         # Initializing logger object
         self.logger = logging.getLogger("WorkerNodeStateMachineThread")
         self.logger.setLevel(logging.INFO)
@@ -27,15 +31,15 @@ class WorkerNodeStateMachineThread:
                                       address=address,
                                       contract=contract)
 
-        # int filter and filter thread
+        # subscribe to worker node state events, events are processed by state owner thread
         self.state_delegate = state_delegate
         self.worker_node_container = contract_container
-        self.current_block_number = None
-
-        self.filter_on_worker = contract_container.events.StateChanged.createFilter(fromBlock='latest')
-        self.worker_node_event_thread = Thread(target=self.worker_filter_thread_loop, daemon=True)
-        if not self.worker_node_event_thread.is_alive():
-            self.worker_node_event_thread.start()
+        self.worker_node_event_thread = StateActor(handler=self.on_worker_node_event, name='WorkerNodeState')
+        self.log_dispatcher = log_dispatcher
+        self.log_dispatcher.watch(address=contract_container.address,
+                                  event_abi=contract_container.events.StateChanged._get_event_abi(),
+                                  callback=self.worker_node_event_thread.post)
+        self.worker_node_event_thread.start()
 
     # -------------------------------------
     # thread methods
@@ -49,8 +53,11 @@ class WorkerNodeStateMachineThread:
     # -------------------------------------
     # state methods
     # -------------------------------------
-    def process_state(self):
-        return self.worker_node.process_state()
+    def process_state(self, block_identifier='latest'):
+        return self.worker_node.process_state(block_identifier)
+
+    def read_state(self, block_identifier='latest') -> int:
+        return self.worker_node.read_state(block_identifier)
 
     def state_table(self):
         return self.worker_node.state_table
@@ -58,66 +65,23 @@ class WorkerNodeStateMachineThread:
     def state(self, new_state):
         self.worker_node.state = new_state
 
+    def current_state(self) -> int:
+        return self.worker_node.state
+
+    def submit(self, work: Callable, on_done: Callable[[object, Exception], None]) -> Future:
+        """ Run long state callback work off state thread, on_done(result, error) is called by state thread """
+        return self.worker_node_event_thread.submit(work, on_done)
+
     # -------------------------------------
     # thread methods
     # -------------------------------------
-    def worker_filter_thread_loop(self):
-        past_block = self.worker_node_container.web3.eth.getBlock('latest')
-        past_block_number = past_block.number
-        last_call_time = 0
-        while True:
-            poll_interval, past_block, past_block_number = \
-                self.calculate_thread_sleep_interval(past_block=past_block, past_block_number=past_block_number)
-            try:
-                if self.filter_on_worker:
-                    if last_call_time + 120 < time.time():  # recreate filter object
-                        self.logger.info('work_filter recreated on object timeout')
-                        self.filter_on_worker = self.worker_node_container.events.StateChanged.createFilter(
-                            fromBlock=self.current_block_number - 2)
-                        # TODO make state reset to 0
-                        self.state(0)
-                        self.process_state()
-                    events = self.filter_on_worker.get_new_entries()
-                    last_call_time = time.time()
-                    for event in events:
-                        # validate current state and worker node address
-                        current_state = self.worker_node.state
-                        new_state = event['args']['newState']
-                        if current_state != new_state:
-                            self.state_delegate.on_worker_node_state_change(event)
-                else:
-                    self.logger.info('work_filter recreated on object null')
-                    self.filter_on_worker = self.worker_node_container.events.StateChanged.createFilter(
-                        fromBlock=self.current_block_number - 2)
-                    # TODO make state reset to 0
-                    self.state(0)
-                    self.process_state()
-            except Exception:
-                self.logger.info('work_filter recreated due timeout')
-                self.filter_on_worker = self.worker_node_container.events.StateChanged.createFilter(
-                    fromBlock=self.current_block_number - 2)
-                # TODO make state reset to 0
-                self.state(0)
-                self.process_state()
-            time.sleep(poll_interval)
-
-    def calculate_thread_sleep_interval(self, past_block, past_block_number):
-        # calculate sleep thread time
-        current_block = self.worker_node_container.web3.eth.getBlock('latest')
-        self.current_block_number = current_block.number
-        diff = self.current_block_number - past_block_number
-        if diff >= 1:
-            dynamic_poll_interval = current_block.timestamp - past_block.timestamp
-            poll_interval = dynamic_poll_interval / diff - 0.5
-            self.logger.info('POLL_INTERVAL : ' + str(dynamic_poll_interval) +
-                             ' sleep_time : ' + str(poll_interval) +
-                             ' block_number : ' + str(self.current_block_number))
-            past_block = self.worker_node_container.web3.eth.getBlock('latest')
-            past_block_number = past_block.number
-            return poll_interval, past_block, past_block_number
-        else:
-            return 5, past_block, past_block_number
-
-
-
-
+    def on_worker_node_event(self, event: dict):
+        try:
+            # validate current state and worker node address
+            current_state = self.worker_node.state
+            new_state = event['args']['newState']
+            if current_state != new_state:
+                self.state_delegate.on_worker_node_state_change(event)
+        except Exception as ex:
+            self.logger.info('Exception on worker node event handler.')
+            self.logger.info(ex.args)
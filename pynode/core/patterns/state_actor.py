@@ -0,0 +1,66 @@
+import logging
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from queue import Queue
+from threading import Thread
+from typing import Callable
+
+
+class StateActor(Thread):
+    """
+    Single owner thread of state machine. Events are posted to actor mailbox and handled one by one,
+    long running work of state callbacks is run by bounded executor, its result is posted back to mailbox,
+    so completion is handled by actor thread in order with events.
+    """
+
+    def __init__(self, handler: Callable[[object], None], max_workers: int = 2, name: str = 'StateActor'):
+        super().__init__(daemon=True, name=name)
+        self.logger = logging.getLogger("StateActor")
+        self.handler = handler
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.running = False
+        self.__mailbox = Queue()
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    def start(self):
+        self.running = True
+        super().start()
+
+    def stop(self):
+        self.running = False
+        self.__mailbox.put((None, ()))
+        self.executor.shutdown(wait=False)
+
+    def post(self, event):
+        """ Enqueue event for handler, called by any thread """
+        self.__mailbox.put((self.handler, (event,)))
+
+    def submit(self, work: Callable, on_done: Callable[[object, Exception], None]) -> Future:
+        """ Run work on executor, on_done(result, error) is called by actor thread """
+        future = self.executor.submit(work)
+        future.add_done_callback(lambda done: self.__mailbox.put((on_done, self.__outcome(done))))
+        return future
+
+    def pending(self) -> int:
+        return self.__mailbox.qsize()
+
+    def run(self):
+        while self.running:
+            callback, args = self.__mailbox.get()
+            if callback is None:
+                break
+            try:
+                callback(*args)
+            except Exception as ex:
+                self.logger.info('Exception on state actor message.')
+                self.logger.info(ex.args)
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    @staticmethod
+    def __outcome(future: Future) -> tuple:
+        error = future.exception()
+        return (None, error) if error is not None else (future.result(), None)
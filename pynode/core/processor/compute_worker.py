@@ -0,0 +1,429 @@
+import os
+import atexit
+import logging
+import importlib
+import multiprocessing
+import multiprocessing.forkserver
+
+from collections import deque
+from threading import Thread, RLock
+from multiprocessing.connection import wait
+
+from core.manager import Manager
+from core.patterns.pynode_logger import LogSocketHandler
+from core.processor.processor import Processor, ProcessorDelegate
+from core.processor.entities.kernel import ProgressDelegate, load_backend
+from core.processor.entities.prediction_pool import PredictionPool
+from core.processor.entities.inference_tuner import InferenceTuner
+
+
+# modules imported once by forkserver, compute workers are forked from it with processor stack imported
+PRELOADED_MODULES = ['core.processor.compute_worker']
+# manager values not passed to compute workers
+PRIVATE_SETTINGS = ('vault_key',)
+# seconds without commands before worker is considered idle and scheduled inference tuning is probed
+TUNING_IDLE_DELAY = 1
+
+# delegate calls which finish worker command processing
+TERMINAL_CALLS = ('processor_load_complete',
+                  'processor_load_failure',
+                  'processor_computing_complete',
+                  'processor_computing_failure')
+
+
+class WorkerDelegate(ProcessorDelegate, ProgressDelegate):
+    """
+    Delegate used inside compute worker process, forwards processor and progress calls to broker over pipe
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def send(self, target: str, method: str, **kwargs):
+        self.conn.send((target, method, kwargs))
+
+    def processor_load_complete(self, processor_id: str):
+        self.send('delegate', 'processor_load_complete', processor_id=processor_id)
+
+    def processor_load_failure(self, processor_id: str):
+        self.send('delegate', 'processor_load_failure', processor_id=processor_id)
+
+    def processor_computing_complete(self, processor_id: str, results_file: str):
+        self.send('delegate', 'processor_computing_complete', processor_id=processor_id, results_file=results_file)
+
+    def processor_computing_failure(self, processor_id: str):
+        self.send('delegate', 'processor_computing_failure', processor_id=processor_id)
+
+    def on_train_begin(self, logs):
+        self.send('delegate', 'on_train_begin', logs=logs)
+
+    def on_train_end(self, logs):
+        self.send('delegate', 'on_train_end', logs=logs)
+
+    def on_epoch_begin(self, epoch, epochs, logs):
+        self.send('delegate', 'on_epoch_begin', epoch=epoch, epochs=epochs, logs=logs)
+
+    def on_epoch_end(self, epoch, epochs, logs):
+        self.send('delegate', 'on_epoch_end', epoch=epoch, epochs=epochs, logs=logs)
+
+
+def worker_context():
+    """
+    Context of compute worker processes. Broker process runs many threads, forking it may copy locks
+    held by other threads, so workers are forked from single-threaded forkserver instead
+    """
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(PRELOADED_MODULES)
+    return context
+
+
+def start_worker_server():
+    """ Start forkserver of compute workers, must be called before any thread is started """
+    worker_context()
+    multiprocessing.forkserver.ensure_running()
+
+
+def worker_settings() -> dict:
+    """ Configured manager values, forkserver children start with manager class defaults only """
+    return {name: value for name, value in vars(Manager.get_instance()).items()
+            if name not in PRIVATE_SETTINGS and isinstance(value, (str, int, float, bool, list, tuple, dict))}
+
+
+def run_worker(conn, settings: dict = None):
+    """
+    Compute worker process main loop. Worker is forked from forkserver with processor modules imported,
+    keras/tensorflow backend is loaded by warm up or by the first job. Configuration is received from
+    broker process. Worker keeps its processors and compiled models pool between jobs until it is
+    replaced by supervisor.
+    """
+    manager = Manager.get_instance()
+    for name, value in (settings or {}).items():
+        setattr(manager, name, value)
+    # observed values and log records are published by broker process only
+    manager.web_socket_enable = 'False'
+    logger = logging.getLogger("ComputeWorker")
+    delegate = WorkerDelegate(conn)
+    tuner = InferenceTuner.get_instance()
+    ipfs_api = None
+    processors = {}
+
+    while True:
+        try:
+            # inference tuning is probed while worker waits for commands only, it is not competing with jobs
+            if tuner.pending and not conn.poll(TUNING_IDLE_DELAY):
+                tuner.tune_idle()
+            command = conn.recv()
+        except (EOFError, OSError):
+            # broker process is gone
+            break
+        finally:
+            tuner.interrupt()
+        name = command[0]
+        if name == 'stop':
+            break
+
+        if name == 'warm_up':
+            # heavy keras/tensorflow and h5py imports are done ahead of first job
+            load_backend()
+            importlib.import_module('h5py')
+            # prediction workers are spawned with their own backend ahead of first prediction
+            prediction_pool = PredictionPool.get_instance()
+            prediction_workers = 0
+            if prediction_pool.enabled:
+                try:
+                    prediction_pool.start()
+                    prediction_workers = prediction_pool.processes
+                except Exception as ex:
+                    # workers are started again by the first sharded prediction
+                    logger.error('Prediction workers start failure : %s', repr(ex))
+            logger.info('Compute worker %s warmed up', os.getpid())
+            delegate.send('supervisor', 'on_warmed_up', prediction_workers=prediction_workers)
+            continue
+
+        if name == 'prepare':
+            processor_id, job_id_hex, workspace, kernel_file, dataset_file, batch = command[1:]
+            if ipfs_api is None:
+                # results uploading only, job files are already landed into working directory by broker
+                from integration.ipfs_service import IpfsService
+                from integration.integration.ipfs_connector import IpfsConnector
+                ipfs_api = IpfsService(strategic=IpfsConnector(gateway=manager.ipfs_gateway,
+                                                               chunk_size=manager.ipfs_chunk_size))
+                ipfs_api.connect(server=manager.ipfs_host,
+                                 port=manager.ipfs_port,
+                                 data_dir=manager.ipfs_storage)
+            # processors of different jobs are kept at once, every job works in its own workspace
+            manager.eth_job_id_hex = job_id_hex
+            processor = Processor(ipfs_api=ipfs_api,
+                                  processor_id=processor_id,
+                                  delegate=delegate,
+                                  workspace=workspace,
+                                  job_id_hex=job_id_hex)
+            processor.prefetch_kernel(kernel_file)
+            processor.prefetch_dataset(dataset_file, batch)
+            processors[processor_id] = processor
+            logger.info('Compute worker %s prepared processor %s', os.getpid(), processor_id)
+            continue
+
+        processor = processors[command[1]]
+        if name == 'load':
+            processor.load()
+        elif name == 'compute':
+            processor.compute()
+            processors.pop(processor.id, None)
+        delegate.send('manager', 'set_job_peak_resident_bytes', resident_bytes=processor.peak_resident_bytes)
+    conn.close()
+
+
+class ComputeWorker:
+    """ Broker side handle of compute worker process """
+
+    def __init__(self, context, target=None, settings: dict = None):
+        self.conn, child_conn = context.Pipe()
+        # worker is not daemonic, so it can start prediction and tuning processes, supervisor stops it
+        self.process = context.Process(target=target or run_worker,
+                                       args=(child_conn, settings),
+                                       name='ComputeWorker',
+                                       daemon=False)
+        self.process.start()
+        child_conn.close()
+        # processors already prepared in worker
+        self.prepared = set()
+        # (command, processor_id) currently processed by worker
+        self.pending = None
+        # prediction workers started by warm up, None until worker is warmed up
+        self.prediction_workers = None
+
+    def send(self, *command):
+        self.conn.send(command)
+
+    def warm_up(self):
+        try:
+            self.send('warm_up')
+        except (BrokenPipeError, OSError):
+            pass
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self, timeout: float = 1):
+        # failed worker may hang inside tensorflow, so it is not waited for long
+        try:
+            self.send('stop')
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+
+
+class ComputeSupervisor(Thread):
+    """
+    Supervises compute worker processes running keras computations isolated from broker.
+    One worker is active and one pre-started spare is kept ready, so failed or crashed worker is
+    replaced by spare without restarting pynode, eth connections and event filters stay up.
+    Worker messages are dispatched to delegate on supervisor thread. Commands of all jobs are queued
+    and sent to active worker one by one, so jobs of several worker nodes hosted by one process share
+    CPU without oversubscription. Messages are routed to delegate registered for node of processor id.
+    """
+
+    def __init__(self, delegate: ProcessorDelegate = None, poll_interval: float = 1, worker_target=None):
+        super().__init__(daemon=True)
+        # Initializing logger object
+        self.logger = logging.getLogger("ComputeSupervisor")
+        self.logger.addHandler(LogSocketHandler.get_instance())
+        self.manager = Manager.get_instance()
+
+        self.delegate = delegate
+        self.poll_interval = poll_interval
+        self.context = worker_context()
+        # worker process main loop, replaced by tests
+        self.worker_target = worker_target or run_worker
+        self.running = False
+        self.replaced_workers = 0
+        # warm up requested, replacement spares are warmed up as soon as started
+        self.warm = False
+
+        self.__lock = RLock()
+        self.__active = None
+        self.__spare = None
+        self.__queue = deque()  # (command, processor) waiting for active worker
+        self.__delegates = {}  # worker node address -> delegate of its processors
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    def start(self):
+        with self.__lock:
+            self.__active = self.__new_worker()
+            self.__spare = self.__new_worker()
+        self.running = True
+        # not daemonic workers are stopped before multiprocessing joins them at exit
+        atexit.register(self.stop)
+        super().start()
+        self.logger.info('Compute worker %s started, spare worker %s',
+                         self.__active.process.pid, self.__spare.process.pid)
+
+    def stop(self):
+        self.running = False
+        with self.__lock:
+            for worker in (self.__active, self.__spare):
+                if worker is not None:
+                    worker.stop()
+            self.__active = None
+            self.__spare = None
+
+    @property
+    def active(self) -> ComputeWorker:
+        return self.__active
+
+    def warm_up(self):
+        """ Load processor stack in background inside active and spare workers """
+        with self.__lock:
+            if self.warm:
+                return
+            self.warm = True
+            for worker in (self.__active, self.__spare):
+                if worker is not None:
+                    worker.warm_up()
+
+    def register_delegate(self, node: str, delegate: ProcessorDelegate):
+        """ Calls of processors with id prefixed by node address are dispatched to delegate """
+        with self.__lock:
+            self.__delegates[node.lower()] = delegate
+
+    def queued(self) -> int:
+        with self.__lock:
+            return len(self.__queue)
+
+    def load(self, processor: Processor):
+        self.__submit('load', processor)
+
+    def compute(self, processor: Processor):
+        self.__submit('compute', processor)
+
+    def replace_worker(self, worker: ComputeWorker = None):
+        """ Promote pre-started spare to active worker, start new spare and stop replaced worker """
+        with self.__lock:
+            if worker is None:
+                worker = self.__active
+            if worker is not self.__active:
+                return
+            if self.__spare is not None and self.__spare.is_alive():
+                self.__active = self.__spare
+            else:
+                self.__active = self.__new_worker()
+            self.__spare = self.__new_worker()
+            if self.warm:
+                self.__spare.warm_up()
+            self.replaced_workers += 1
+        self.logger.info('Compute worker %s replaced by %s',
+                         worker.process.pid, self.__active.process.pid)
+        worker.stop()
+
+    def run(self):
+        while self.running:
+            worker = self.__active
+            if worker is None:
+                break
+            try:
+                ready = wait([worker.conn, worker.process.sentinel], timeout=self.poll_interval)
+            except OSError:
+                # pipe of replaced worker is closed
+                continue
+            if worker is not self.__active or not ready:
+                continue
+            if worker.conn in ready:
+                try:
+                    message = worker.conn.recv()
+                except (EOFError, OSError):
+                    self.__on_worker_crash(worker)
+                    continue
+                self.__dispatch(worker, message)
+            else:
+                self.__on_worker_crash(worker)
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __new_worker(self) -> ComputeWorker:
+        # configuration is read when worker is started, so replacement workers get current values
+        return ComputeWorker(self.context, self.worker_target, worker_settings())
+
+    def __submit(self, command: str, processor: Processor):
+        with self.__lock:
+            self.__queue.append((command, processor))
+            self.__send_next()
+
+    def __send_next(self):
+        # next queued command is sent when active worker finished the previous one
+        with self.__lock:
+            worker = self.__active
+            if worker is None or worker.pending is not None or not self.__queue:
+                return
+            command, processor = self.__queue.popleft()
+            worker.pending = (command, processor.id)
+            try:
+                if processor.id not in worker.prepared:
+                    worker.send('prepare',
+                                processor.id,
+                                processor.job_id_hex,
+                                processor.workspace,
+                                processor.kernel.json_kernel,
+                                processor.dataset.json_dataset,
+                                processor.dataset.batch_no)
+                    worker.prepared.add(processor.id)
+                worker.send(command, processor.id)
+            except (BrokenPipeError, OSError):
+                # worker is dead, crash is handled by supervisor thread
+                self.logger.error('Unable to submit %s to compute worker %s', command, worker.process.pid)
+
+    def __delegate_of(self, processor_id: str):
+        node = str(processor_id).split(':', 1)[0].lower()
+        with self.__lock:
+            return self.__delegates.get(node, self.delegate)
+
+    def __dispatch(self, worker: ComputeWorker, message: tuple):
+        target, method, kwargs = message
+        if target == 'manager':
+            getattr(self.manager, method)(**kwargs)
+            return
+        if target == 'supervisor':
+            getattr(self, '_ComputeSupervisor__' + method)(worker, **kwargs)
+            return
+        # progress calls have no processor id, they belong to processor of command in progress
+        pending = worker.pending
+        delegate = self.__delegate_of(kwargs.get('processor_id', pending[1] if pending else None))
+        if method in TERMINAL_CALLS:
+            worker.pending = None
+            if method in ('processor_computing_complete', 'processor_computing_failure'):
+                # worker drops processor after computing
+                worker.prepared.discard(kwargs['processor_id'])
+        if method == 'processor_computing_failure':
+            # keras/tensorflow state of failed worker is not trusted anymore
+            self.replace_worker(worker)
+        if method in TERMINAL_CALLS:
+            self.__send_next()
+        getattr(delegate, method)(**kwargs)
+
+    def __on_warmed_up(self, worker: ComputeWorker, prediction_workers: int):
+        worker.prediction_workers = prediction_workers
+        self.logger.info('Compute worker %s warmed up, prediction workers : %s',
+                         worker.process.pid, prediction_workers)
+
+    def __on_worker_crash(self, worker: ComputeWorker):
+        self.logger.critical('Compute worker %s crashed with exit code %s',
+                             worker.process.pid, worker.process.exitcode)
+        pending = worker.pending
+        self.replace_worker(worker)
+        # queued commands are continued by replacement worker
+        self.__send_next()
+        if pending is None:
+            return
+        command, processor_id = pending
+        delegate = self.__delegate_of(processor_id)
+        if command == 'load':
+            delegate.processor_load_failure(processor_id=processor_id)
+        else:
+            delegate.processor_computing_failure(processor_id=processor_id)
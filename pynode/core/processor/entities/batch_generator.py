@@ -0,0 +1,92 @@
+import math
+import numpy as np
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BatchGenerator:
+    """
+    Endless batches generator for keras fit_generator/predict_generator.
+    Reads batches by row slices from array-like sources (ndarray, memmap or HDF5 dataset)
+    on background threads keeping `prefetch` batches ahead of consumer, batches order is preserved.
+    Shuffled rows are permuted over the whole range every epoch like keras does for arrays,
+    rows of a batch are read by sorted runs of consecutive indices.
+    """
+
+    def __init__(self, x, y=None, batch_size: int = 32, start: int = 0, stop: int = None,
+                 shuffle: bool = False, prefetch: int = 4, workers: int = 2):
+        self.x = x
+        self.y = y
+        self.batch_size = max(int(batch_size or 32), 1)  # keras default batch size
+        self.start = start
+        self.stop = x.shape[0] if stop is None else stop
+        self.shuffle = shuffle
+        self.prefetch = max(prefetch, 1)
+        self.workers = max(workers, 1)
+        self.__batches = self.__generate()
+
+    @property
+    def steps(self) -> int:
+        # batches count per epoch
+        return int(math.ceil((self.stop - self.start) / self.batch_size))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.__batches)
+
+    def close(self):
+        self.__batches.close()
+
+    def read_batch(self, step: int, order: np.ndarray = None):
+        """ Batch of contiguous rows, or of epoch rows permutation when order is given """
+        begin = step * self.batch_size
+        end = min(begin + self.batch_size, self.stop - self.start)
+        if order is None:
+            # contiguous slice reading keeps HDF5 and memory-mapped sources effective
+            x = np.asarray(self.x[self.start + begin:self.start + end])
+            y = np.asarray(self.y[self.start + begin:self.start + end]) if self.y is not None else None
+            return x if y is None else (x, y)
+        rows = order[begin:end]
+        # rows are read in increasing order and put back into permutation order
+        positions = np.argsort(np.argsort(rows))
+        rows = np.sort(rows)
+        x = self.read_rows(self.x, rows)[positions]
+        y = self.read_rows(self.y, rows)[positions] if self.y is not None else None
+        return x if y is None else (x, y)
+
+    @staticmethod
+    def read_rows(source, rows: np.ndarray) -> np.ndarray:
+        # sorted rows are read by slices of consecutive indices
+        runs = np.split(rows, np.flatnonzero(np.diff(rows) != 1) + 1)
+        return np.concatenate([np.asarray(source[run[0]:run[-1] + 1]) for run in runs])
+
+    def __generate(self):
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        pending = deque()
+        try:
+            while True:
+                # new epoch, rows of whole range are shuffled
+                steps = list(range(self.steps))
+                order = self.start + np.random.permutation(self.stop - self.start) if self.shuffle else None
+                for step in steps:
+                    pending.append(executor.submit(self.read_batch, step, order))
+                    if len(pending) > self.prefetch:
+                        yield pending.popleft().result()
+                if not steps:
+                    return
+                # keep prefetching over epochs boundary, drain only on close
+                while len(pending) > self.prefetch:
+                    yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def split(rows: int, validation_split) -> int:
+        # index of first validation row, validation data is taken from the end like keras does
+        validation_split = float(validation_split or 0)
+        return int(rows * (1. - validation_split))
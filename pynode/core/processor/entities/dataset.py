@@ -1,14 +1,18 @@
-import h5py
+import os
 import logging
 import numpy as np
 
+from functools import partial
+
 from core.manager import Manager
+from core.patterns.exceptions import DataInconsistencyError
 from core.patterns.pynode_logger import LogSocketHandler
+from core.processor.entities.dataset_loader import DatasetLoader
 
 
 class Dataset:
 
-    def __init__(self, dataset_file, ipfs_api, batch_no: int):
+    def __init__(self, dataset_file, ipfs_api, batch_no: int, workspace: str = ''):
         # Initializing logger object
         self.logger = logging.getLogger("Kernel")
         self.logger.addHandler(LogSocketHandler.get_instance())
@@ -35,10 +39,80 @@ class Dataset:
         self.validation_split = 0
         self.shuffle = False
         self.initial_epoch = 0
+        self.parse_result = None
 
         self.ipfs_api = ipfs_api
+        # job files directory, files are placed there under their addresses
+        self.workspace = workspace
+        # on-disk dtype preserving loader, memory-maps data when possible
+        self.loader = DatasetLoader(mode=self.manager.dataset_load_mode)
 
     def init_dataset(self):
+        if not self.parse_dataset():
+            return False
+
+        # try to get train_x dataset
+        if self.train_x_address:
+            try:
+                self.logger.info("Downloading train_x file %s", self.train_x_address)
+                self.ipfs_api.download_file(self.train_x_address, directory=self.workspace)
+            except Exception as ex:
+                self.logger.error("Can't download data file from IPFS: %s", type(ex))
+                self.logger.error(ex.args)
+                return False
+
+        # try to get train_y dataset
+        if self.train_y_address:
+            try:
+                self.logger.info("Downloading train_y file %s", self.train_y_address)
+                self.ipfs_api.download_file(self.train_y_address, directory=self.workspace)
+            except Exception as ex:
+                self.logger.error("Can't download data file from IPFS: %s", type(ex))
+                self.logger.error(ex.args)
+                return False
+
+        # try to get dataset for prediction
+        if self.data_address:
+            try:
+                self.logger.info("Downloading data file %s", self.data_address)
+                self.ipfs_api.download_file(self.data_address, directory=self.workspace)
+            except Exception as ex:
+                self.logger.error("Can't download data file from IPFS: %s", type(ex))
+                self.logger.error(ex.args)
+                return False
+
+        return True
+
+    def prefetch(self):
+        # schedule dataset files downloading, headers are validated as soon as file lands
+        if self.parse_dataset():
+            for address, key in self.files():
+                self.ipfs_api.prefetch(address, on_landed=partial(self.validate_file, key=key))
+
+    def files(self) -> list:
+        # dataset files addresses with their structure variable names
+        files = [(self.train_x_address, 'train_x'),
+                 (self.train_y_address, 'train_y'),
+                 (self.data_address, 'batches')]
+        return [(address, key) for address, key in files if address]
+
+    def file_path(self, address: str) -> str:
+        return os.path.join(self.workspace, address)
+
+    def validate_file(self, file_path: str, key: str):
+        # open only HDF5 header and check expected structure variable
+        import h5py
+        with h5py.File(file_path, 'r') as h5f:
+            if key not in h5f:
+                raise DataInconsistencyError('Dataset file has no ' + key + ' structure variable', file_path)
+        self.logger.info("Dataset file %s header validated", file_path)
+
+    def parse_dataset(self) -> bool:
+        if self.parse_result is None:
+            self.parse_result = self.__parse_dataset()
+        return self.parse_result
+
+    def __parse_dataset(self) -> bool:
         # parse all incoming dataset data
         train_block = False
         batches_block = False
@@ -82,36 +156,6 @@ class Dataset:
             self.logger.error('Unable to parse train or batches block')
             return False
 
-        # try to get train_x dataset
-        if self.train_x_address:
-            try:
-                self.logger.info("Downloading train_x file %s", self.train_x_address)
-                self.ipfs_api.download_file(self.train_x_address)
-            except Exception as ex:
-                self.logger.error("Can't download data file from IPFS: %s", type(ex))
-                self.logger.error(ex.args)
-                return False
-
-        # try to get train_y dataset
-        if self.train_y_address:
-            try:
-                self.logger.info("Downloading train_y file %s", self.train_y_address)
-                self.ipfs_api.download_file(self.train_y_address)
-            except Exception as ex:
-                self.logger.error("Can't download data file from IPFS: %s", type(ex))
-                self.logger.error(ex.args)
-                return False
-
-        # try to get dataset for prediction
-        if self.data_address:
-            try:
-                self.logger.info("Downloading data file %s", self.data_address)
-                self.ipfs_api.download_file(self.data_address)
-            except Exception as ex:
-                self.logger.error("Can't download data file from IPFS: %s", type(ex))
-                self.logger.error(ex.args)
-                return False
-
         # check dataset params and set working mode
         if self.train_x_address and self.train_y_address:
             self.logger.info("Set computing mode to training")
@@ -122,16 +166,17 @@ class Dataset:
 
         return True
 
+    def shuffle_enabled(self) -> bool:
+        # shuffle option comes from dataset json as bool or string ('True', 'False', 'batch')
+        return str(self.shuffle).lower() in ('true', '1', 'batch')
+
     def read_dataset(self) -> np.ndarray:
         if self.dataset is not None:
             return self.dataset
 
         self.logger.info('Loading dataset...')
-        h5f = h5py.File(self.data_address, 'r')
         # magic internal variable can not be empty (for more easy performance named as structure variable)
-        h5ds = h5f['batches']
-        self.dataset = np.ndarray(shape=h5ds.shape)
-        h5ds.read_direct(dest=self.dataset)
+        self.dataset = self.loader.load(self.file_path(self.data_address), 'batches')
         return self.dataset
 
     def read_x_train_dataset(self) -> np.ndarray:
@@ -139,11 +184,8 @@ class Dataset:
             return self.train_x_dataset
 
         self.logger.info('Loading train_x dataset...')
-        h5f = h5py.File(self.train_x_address, 'r')
         # magic internal variable can not be empty (for more easy performance named as structure variable)
-        h5ds = h5f['train_x']
-        self.train_x_dataset = np.ndarray(shape=h5ds.shape)
-        h5ds.read_direct(dest=self.train_x_dataset)
+        self.train_x_dataset = self.loader.load(self.file_path(self.train_x_address), 'train_x')
         return self.train_x_dataset
 
     def read_y_train_dataset(self) -> np.ndarray:
@@ -151,11 +193,8 @@ class Dataset:
             return self.train_y_dataset
 
         self.logger.info('Loading train_y dataset...')
-        h5f = h5py.File(self.train_y_address, 'r')
         # magic internal variable can not be empty (for more easy performance named as structure variable)
-        h5ds = h5f['train_y']
-        self.train_y_dataset = np.ndarray(shape=h5ds.shape)
-        h5ds.read_direct(dest=self.train_y_dataset)
+        self.train_y_dataset = self.loader.load(self.file_path(self.train_y_address), 'train_y')
         return self.train_y_dataset
 
 
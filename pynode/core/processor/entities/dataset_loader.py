@@ -0,0 +1,137 @@
+import os
+import logging
+import itertools
+import numpy as np
+
+from core.patterns.pynode_logger import LogSocketHandler
+
+
+class DatasetLoader:
+    """
+    Loads HDF5 datasets keeping their on-disk dtype.
+    In mmap mode contiguous uncompressed datasets are memory-mapped by their file offset,
+    other layouts (chunked, compressed) are read chunk by chunk into preallocated array.
+    In stream mode such layouts are not read at all, open HDF5 dataset is returned for batch reading.
+    """
+
+    MODE_MMAP = 'mmap'
+    MODE_MEMORY = 'memory'
+    MODE_STREAM = 'stream'
+
+    # rows block size for reading not chunked datasets (in bytes)
+    read_block_size = 64 * 1024 * 1024
+
+    def __init__(self, mode: str = MODE_MMAP):
+        # Initializing logger object
+        self.logger = logging.getLogger("DatasetLoader")
+        self.logger.addHandler(LogSocketHandler.get_instance())
+        self.mode = mode
+        # bytes materialized in process memory by loader (memory-mapped data are not counted)
+        self.resident_bytes = 0
+        # files opened for streaming datasets, closed by close()
+        self.files = []
+
+    def load(self, file_path: str, key: str) -> np.ndarray:
+        import h5py
+        with h5py.File(file_path, 'r') as h5f:
+            h5ds = h5f[key]
+            if self.mode in (self.MODE_MMAP, self.MODE_STREAM):
+                offset = self.contiguous_offset(h5ds)
+                if offset is not None:
+                    self.logger.info('Memory-map %s %s %s from offset %s', key, h5ds.shape, h5ds.dtype, offset)
+                    return np.memmap(file_path, dtype=h5ds.dtype, mode='r', offset=offset, shape=h5ds.shape)
+            if self.mode == self.MODE_STREAM:
+                return self.open_stream(file_path, key)
+            self.logger.info('Read %s %s %s by chunks', key, h5ds.shape, h5ds.dtype)
+            data = self.read_chunked(h5ds)
+        self.resident_bytes += data.nbytes
+        return data
+
+    def open_stream(self, file_path: str, key: str):
+        # HDF5 dataset stays on disk, batches are read by slices
+        import h5py
+        h5f = h5py.File(file_path, 'r')
+        self.files.append(h5f)
+        h5ds = h5f[key]
+        self.logger.info('Stream %s %s %s from file', key, h5ds.shape, h5ds.dtype)
+        return h5ds
+
+    def close(self):
+        for h5f in self.files:
+            h5f.close()
+        self.files = []
+
+    @staticmethod
+    def contiguous_offset(h5ds):
+        # file offset of raw data or None when dataset can not be memory-mapped
+        if h5ds.chunks is not None or h5ds.compression is not None or h5ds.size == 0:
+            return None
+        if h5ds.dtype.hasobject:
+            return None
+        return h5ds.id.get_offset()
+
+    def read_chunked(self, h5ds) -> np.ndarray:
+        data = np.empty(shape=h5ds.shape, dtype=h5ds.dtype)
+        if data.size == 0:
+            return data
+        if h5ds.chunks is not None:
+            for chunk in self.chunk_slices(h5ds.shape, h5ds.chunks):
+                h5ds.read_direct(data, source_sel=chunk, dest_sel=chunk)
+        elif data.ndim == 0:
+            h5ds.read_direct(data)
+        else:
+            row_bytes = max(data.nbytes // data.shape[0], 1)
+            rows = max(self.read_block_size // row_bytes, 1)
+            for start in range(0, data.shape[0], rows):
+                block = np.s_[start:min(start + rows, data.shape[0])]
+                h5ds.read_direct(data, source_sel=block, dest_sel=block)
+        return data
+
+    @staticmethod
+    def chunk_slices(shape: tuple, chunks: tuple):
+        # selections of dataset chunks grid (h5py before 2.10 has no Dataset.iter_chunks)
+        ranges = [range(0, size, chunk) for size, chunk in zip(shape, chunks)]
+        for starts in itertools.product(*ranges):
+            yield tuple(slice(start, min(start + chunk, size))
+                        for start, chunk, size in zip(starts, chunks, shape))
+
+    @staticmethod
+    def process_resident_bytes() -> int:
+        # current resident set size of pynode process
+        try:
+            with open('/proc/self/statm') as statm:
+                return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            # not linux, use process peak value
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
+
+    @staticmethod
+    def process_peak_resident_bytes() -> int:
+        # resident set size high water mark of pynode process, kept by kernel between samples
+        try:
+            with open('/proc/self/status') as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
+
+    @staticmethod
+    def reset_peak_resident_bytes() -> bool:
+        # high water mark is reset to current resident set size (linux 4.0+), so peak is measured per job
+        try:
+            with open('/proc/self/clear_refs', 'w') as clear_refs:
+                clear_refs.write('5')
+            return True
+        except OSError:
+            return False
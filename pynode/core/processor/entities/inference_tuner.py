@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+import multiprocessing
+import numpy as np
+
+from collections import namedtuple
+
+from core.manager import Manager
+from core.patterns.pynode_logger import LogSocketHandler
+
+
+# prediction settings, 0 threads - tensorflow default
+InferenceSettings = namedtuple('InferenceSettings', ['batch_size', 'intra_op_threads', 'inter_op_threads'])
+
+
+def probe_throughput(json_model: str, rows: np.ndarray, batch_sizes: list, thread_counts: list) -> list:
+    """
+    Measure prediction rows per second of model for every (batch size, threads) pair, runs in spawned process
+    so probed sessions do not touch compute worker backend
+    """
+    import keras
+    import tensorflow as tf
+    throughputs = []
+    for threads in thread_counts:
+        keras.backend.clear_session()
+        keras.backend.set_session(tf.Session(config=tf.ConfigProto(intra_op_parallelism_threads=threads,
+                                                                   inter_op_parallelism_threads=1)))
+        model = keras.models.model_from_json(json_model)
+        for batch_size in batch_sizes:
+            # the first pass builds predict function and warms up allocator
+            model.predict(rows[:batch_size], batch_size=batch_size)
+            started = time.perf_counter()
+            model.predict(rows, batch_size=batch_size)
+            throughputs.append((batch_size, threads, rows.shape[0] / max(time.perf_counter() - started, 1e-9)))
+    return throughputs
+
+
+class InferenceTuner:
+    """
+    Process-wide tuner of prediction batch size and tensorflow threads. After the first job of kernel
+    its model throughput is probed on sample rows over candidate batch sizes while compute worker is idle,
+    probing is interrupted by the next command, so jobs are never delayed by probing and it is not competing
+    with job computing. Later jobs of kernel use tuned batch size. Backend session threads are one setting
+    of compute worker, they are tuned once per host with the first probed kernel, so pooled models are not
+    dropped by switching sessions between kernels. Tuned values are persisted to JSON file by
+    (kernel address, input shape, host) and host. Non zero values configured in pynode.ini override tuned ones.
+    """
+
+    __instance = None
+
+    def __init__(self, path: str = None, enabled: bool = True, overrides: InferenceSettings = None,
+                 batch_sizes: tuple = (32, 64, 128, 256, 512), thread_counts: tuple = None,
+                 probe_rows: int = 1024, timeout: float = 60):
+        if InferenceTuner.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            InferenceTuner.__instance = self
+        # Initializing logger object
+        self.logger = logging.getLogger("InferenceTuner")
+        self.logger.addHandler(LogSocketHandler.get_instance())
+        self.path = path
+        self.enabled = enabled
+        self.overrides = overrides or InferenceSettings(0, 0, 0)
+        self.batch_sizes = batch_sizes
+        self.thread_counts = thread_counts or self.default_thread_counts()
+        self.probe_rows = probe_rows
+        self.timeout = timeout  # probe budget in seconds
+        self.default = InferenceSettings(100, 0, 0)
+        self.probes = 0
+
+        self.__lock = threading.RLock()
+        self.__settings = None  # key -> settings loaded from file
+        self.__tuning = None  # thread of background tuning
+        self.__pending = None  # (key, json model, sample rows, thread counts) waiting for idle worker
+        self.__interrupted = threading.Event()
+        self.__attempted = set()  # keys probed by process, failed probes are not repeated
+
+    @staticmethod
+    def get_instance():
+        """ Static access method. """
+        if InferenceTuner.__instance is None:
+            manager = Manager.get_instance()
+            InferenceTuner(path=manager.inference_tuning_file,
+                           enabled=manager.inference_tuning == 'True',
+                           overrides=InferenceSettings(manager.predict_batch_size,
+                                                       manager.intra_op_threads,
+                                                       manager.inter_op_threads))
+        return InferenceTuner.__instance
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    def settings(self, kernel_address: str, rows) -> InferenceSettings:
+        """ Known settings of kernel prediction for rows, values not tuned yet are default ones """
+        settings = self.default
+        if self.enabled:
+            with self.__lock:
+                tuned = self.__load()
+                batch = tuned.get(self.key(kernel_address, rows.shape[1:]), {})
+                threads = tuned.get(self.threads_key(), {})
+            settings = InferenceSettings(batch.get('batch_size', settings.batch_size),
+                                         threads.get('intra_op_threads', settings.intra_op_threads),
+                                         threads.get('inter_op_threads', settings.inter_op_threads))
+        # configured values are applied over tuned ones
+        return InferenceSettings(*[override or value for override, value in zip(self.overrides, settings)])
+
+    @property
+    def pending(self) -> bool:
+        return self.__pending is not None
+
+    def tune_later(self, kernel_address: str, model_file: str, rows) -> bool:
+        """
+        Schedule tuning of kernel prediction for rows unless it is tuned, one kernel at a time.
+        Sample rows and model are read at once, job files may be removed before probing
+        """
+        if not self.enabled or all(self.overrides):
+            return False
+        key = self.key(kernel_address, rows.shape[1:])
+        with self.__lock:
+            if key in self.__load() or key in self.__attempted or self.__pending is not None:
+                return False
+            self.__attempted.add(key)
+            # threads already tuned or configured are not probed again, session threads stay the same
+            thread_counts = self.thread_counts
+            if self.threads_key() in self.__settings or self.overrides.intra_op_threads:
+                thread_counts = (self.settings(kernel_address, rows).intra_op_threads,)
+            try:
+                with open(model_file, 'r') as json_file:
+                    json_model = json_file.read()
+            except OSError as ex:
+                self.logger.error('Inference tuning failure, kernel model is not read : %s', repr(ex))
+                return False
+            self.__pending = (key, json_model, np.array(rows[:self.probe_rows]), thread_counts)
+            return True
+
+    def tune_idle(self) -> threading.Thread:
+        """ Start scheduled tuning in background, called by compute worker waiting for commands """
+        with self.__lock:
+            if self.__pending is None or (self.__tuning is not None and self.__tuning.is_alive()):
+                return None
+            self.__interrupted.clear()
+            self.__tuning = threading.Thread(target=self.tune,
+                                             args=self.__pending,
+                                             name='InferenceTuner',
+                                             daemon=True)
+            self.__tuning.start()
+            return self.__tuning
+
+    def interrupt(self):
+        """ Stop probing when compute worker receives command, tuning is continued when worker is idle again """
+        tuning = self.__tuning
+        if tuning is None or not tuning.is_alive():
+            return
+        self.__interrupted.set()
+        tuning.join()
+
+    def tune(self, key: str, json_model: str, sample: np.ndarray, thread_counts: tuple) -> InferenceSettings:
+        started = time.time()
+        try:
+            throughputs = self.probe(json_model, sample, thread_counts)
+        except Exception as ex:
+            self.logger.error('Inference tuning failure, default settings are kept : %s', repr(ex))
+            self.__pending = None
+            return None
+        if throughputs is None:
+            self.logger.info('Inference tuning is interrupted by compute worker command')
+            return None
+        self.__pending = None
+        self.probes += 1
+        batch_size, threads, rows_per_second = max(throughputs, key=lambda throughput: throughput[2])
+        self.logger.info('Inference tuned in %.1fs : batch size %s, threads %s, %.0f rows/s',
+                         time.time() - started, batch_size, threads, rows_per_second)
+        with self.__lock:
+            self.__load()[key] = {'batch_size': batch_size}
+            self.__settings.setdefault(self.threads_key(), {'intra_op_threads': threads, 'inter_op_threads': 1})
+            self.__save()
+        return InferenceSettings(batch_size, threads, 1)
+
+    def probe(self, json_model: str, sample: np.ndarray, thread_counts: tuple) -> list:
+        """ Throughputs of (batch size, threads) pairs, None when probing is interrupted """
+        # tensorflow runtime is not fork safe, probe runs in clean interpreter
+        pool = multiprocessing.get_context('spawn').Pool(1)
+        try:
+            batch_sizes = [batch_size for batch_size in self.batch_sizes if batch_size <= sample.shape[0]] \
+                or [sample.shape[0]]
+            result = pool.apply_async(probe_throughput, (json_model, sample, batch_sizes, list(thread_counts)))
+            deadline = time.time() + self.timeout
+            while not self.__interrupted.wait(0.1):
+                if result.ready():
+                    return result.get()
+                if time.time() > deadline:
+                    raise multiprocessing.TimeoutError('Probe is not finished in %ss' % self.timeout)
+            return None
+        finally:
+            pool.terminate()
+
+    @staticmethod
+    def key(kernel_address: str, input_shape: tuple) -> str:
+        return '%s|%s|%s/%s' % (kernel_address, 'x'.join(str(size) for size in input_shape),
+                                socket.gethostname(), os.cpu_count())
+
+    @staticmethod
+    def threads_key() -> str:
+        return 'threads|%s/%s' % (socket.gethostname(), os.cpu_count())
+
+    @staticmethod
+    def default_thread_counts() -> tuple:
+        # powers of two up to cpu count and cpu count itself
+        cpu_count = os.cpu_count() or 1
+        counts = {cpu_count}
+        count = 1
+        while count < cpu_count:
+            counts.add(count)
+            count *= 2
+        return tuple(sorted(counts))
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __load(self) -> dict:
+        if self.__settings is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as tuning_file:
+                    self.__settings = json.load(tuning_file)
+            except (OSError, TypeError, ValueError):
+                self.__settings = {}
+        return self.__settings
+
+    def __save(self):
+        if not self.path:
+            return
+        try:
+            # settings are replaced atomically
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as tuning_file:
+                json.dump(self.__settings, tuning_file, indent=1, sort_keys=True)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as ex:
+            self.logger.info('Unable to save inference tuning.')
+            self.logger.info(ex.args)
@@ -1,9 +1,14 @@
-import keras
+import os
+import json
 import logging
 
 from core.patterns.pynode_logger import LogSocketHandler
 from core.manager import Manager
 from .dataset import Dataset
+from .batch_generator import BatchGenerator
+from .model_pool import ModelPool
+from .prediction_pool import PredictionPool, PredictionModel
+from .inference_tuner import InferenceTuner
 from abc import ABCMeta, abstractmethod
 
 
@@ -25,31 +30,42 @@ class ProgressDelegate(metaclass=ABCMeta):
         pass
 
 
-class ProgressCallback(keras.callbacks.Callback):
-    def __init__(self, delegate: ProgressDelegate, epochs: int):
-        self.delegate = delegate
-        self.total_epochs = epochs
+def load_backend():
+    """ Import keras with tensorflow backend, heavy import is done on first use only """
+    import keras
+    return keras
 
-    def on_train_begin(self, logs):
-        self.delegate.on_train_begin(logs=logs)
 
-    def on_train_end(self, logs):
-        self.delegate.on_train_end(logs=logs)
+def progress_callback(delegate: ProgressDelegate, epochs: int):
+    keras = load_backend()
+
+    class ProgressCallback(keras.callbacks.Callback):
+        def __init__(self):
+            self.delegate = delegate
+            self.total_epochs = epochs
+
+        def on_train_begin(self, logs):
+            self.delegate.on_train_begin(logs=logs)
 
-    def on_epoch_begin(self, epoch, logs):
-        self.delegate.on_epoch_begin(epoch=epoch,
-                                     epochs=self.total_epochs,
-                                     logs=logs)
+        def on_train_end(self, logs):
+            self.delegate.on_train_end(logs=logs)
 
-    def on_epoch_end(self, epoch, logs):
-        self.delegate.on_epoch_end(epoch=epoch,
-                                   epochs=self.total_epochs,
-                                   logs=logs)
+        def on_epoch_begin(self, epoch, logs):
+            self.delegate.on_epoch_begin(epoch=epoch,
+                                         epochs=self.total_epochs,
+                                         logs=logs)
+
+        def on_epoch_end(self, epoch, logs):
+            self.delegate.on_epoch_end(epoch=epoch,
+                                       epochs=self.total_epochs,
+                                       logs=logs)
+
+    return ProgressCallback()
 
 
 class Kernel:
 
-    def __init__(self, kernel_file, ipfs_api, delegate: ProgressDelegate):
+    def __init__(self, kernel_file, ipfs_api, delegate: ProgressDelegate, workspace: str = ''):
         # Initializing logger object
         self.logger = logging.getLogger("Kernel")
         self.logger.addHandler(LogSocketHandler.get_instance())
@@ -57,13 +73,56 @@ class Kernel:
 
         self.json_kernel = kernel_file
         self.ipfs_api = ipfs_api
+        # job files directory, files are placed there under their addresses
+        self.workspace = workspace
         self.model_address = None
         self.weights_address = None
         self.model = None
+        # model pool key, set when model is taken from pool
+        self.pool_key = None
+        self.parse_result = None
+        # prediction batch size and backend threads, tuned for kernel model and dataset
+        self.inference_settings = None
 
         self.progress_delegate = delegate
 
     def init_kernel(self):
+        if not self.parse_kernel():
+            return False
+
+        try:
+            self.logger.info("Downloading model file %s", self.model_address)
+            self.ipfs_api.download_file(self.model_address, directory=self.workspace)
+            if self.weights_address:
+                self.logger.info("Downloading weights file %s", self.weights_address)
+                self.ipfs_api.download_file(self.weights_address, directory=self.workspace)
+            else:
+                self.logger.info("Weights address is empty, skip downloading")
+        except Exception as ex:
+            self.logger.error("Can't download kernel files from IPFS: %s", type(ex))
+            self.logger.error(ex.args)
+            return False
+
+        return True
+
+    def prefetch(self):
+        # schedule kernel files downloading, init_kernel waits for scheduled files
+        if self.parse_kernel():
+            for address in self.files():
+                self.ipfs_api.prefetch(address)
+
+    def files(self) -> list:
+        return [address for address in (self.model_address, self.weights_address) if address]
+
+    def file_path(self, address: str) -> str:
+        return os.path.join(self.workspace, address)
+
+    def parse_kernel(self) -> bool:
+        if self.parse_result is None:
+            self.parse_result = self.__parse_kernel()
+        return self.parse_result
+
+    def __parse_kernel(self) -> bool:
         # get main kernel params
         try:
             self.model_address = self.json_kernel['model']
@@ -90,63 +149,157 @@ class Kernel:
                 self.logger.error("Wrong weights address type : " + str(type(self.weights_address)))
                 self.weights_address = None
                 return False
+        return True
+
+    def apply_inference_settings(self, dataset: Dataset):
+        """ Take known prediction settings, backend session threads are applied before model reading """
+        self.inference_settings = InferenceTuner.get_instance().settings(self.model_address, dataset.dataset)
+        if not ModelPool.get_instance().configure_session(self.inference_settings.intra_op_threads,
+                                                          self.inference_settings.inter_op_threads):
+            self.logger.info('Backend session is used by other job, tuned threads are not applied')
+        return self.inference_settings
+
+    def tune_inference(self, dataset: Dataset):
+        """ Tune prediction settings in background after the first job of kernel, used by next jobs """
+        return InferenceTuner.get_instance().tune_later(self.model_address,
+                                                        self.file_path(self.model_address),
+                                                        dataset.dataset)
+
+    def is_prediction_sharded(self, dataset: Dataset) -> bool:
+        """ Prediction rows are split between prediction pool workers when there is a batch for every worker """
+        batch_size = (self.inference_settings or InferenceTuner.get_instance().default).batch_size
+        prediction_pool = PredictionPool.get_instance()
+        return prediction_pool.enabled and dataset.dataset.shape[0] >= prediction_pool.processes * batch_size
 
+    def validate_model(self) -> bool:
+        """ Check kernel architecture without building model, used when model is built by prediction workers """
         try:
-            self.logger.info("Downloading model file %s", self.model_address)
-            self.ipfs_api.download_file(self.model_address)
-            if self.weights_address:
-                self.logger.info("Downloading weights file %s", self.weights_address)
-                self.ipfs_api.download_file(self.weights_address)
-            else:
-                self.logger.info("Weights address is empty, skip downloading")
-        except Exception as ex:
-            self.logger.error("Can't download kernel files from IPFS: %s", type(ex))
+            with open(self.file_path(self.model_address), "r") as json_file:
+                json_model = json.load(json_file)
+        except (OSError, ValueError) as ex:
+            self.logger.error('Error reading kernel model')
             self.logger.error(ex.args)
             return False
-
+        if not isinstance(json_model, dict) or 'class_name' not in json_model or 'config' not in json_model:
+            self.logger.error('Kernel model is not keras model architecture')
+            return False
         return True
 
-    def read_model(self) -> str:
+    def read_model(self, dataset: Dataset = None):
+        """
+        Read kernel model, with dataset compiled model is taken from process-wide pool
+        (kernel address is IPFS content hash, so same address always means same architecture)
+        """
         if self.model is not None:
             return self.model
         self.logger.info('Loading kernel architecture...')
-        with open(self.model_address, "r") as json_file:
+        if dataset is None:
+            self.model = self.build_model()
+            return self.model
+
+        pool_key = (self.model_address, str(dataset.loss), str(dataset.optimizer))
+        self.model = ModelPool.get_instance().acquire(pool_key, build=lambda: self.build_model(dataset))
+        if self.model is not None:
+            self.pool_key = pool_key
+        return self.model
+
+    def build_model(self, dataset: Dataset = None):
+        with open(self.file_path(self.model_address), "r") as json_file:
             json_model = json_file.read()
 
+        keras = load_backend()
         try:
-            self.model = keras.models.model_from_json(json_model)
+            model = keras.models.model_from_json(json_model)
         except Exception as ex:
             self.logger.error('Error reading kernel model')
             self.logger.error(ex.args)
             return None
-        return self.model
+        if dataset is not None:
+            model.compile(loss=dataset.loss,
+                          optimizer=dataset.optimizer)
+            # build predict function in advance, pooled model is used from different processor threads
+            model._make_predict_function()
+        return model
+
+    def release_model(self, reusable: bool = True):
+        # return pooled model, models after training keep optimizer state and can not be reused
+        if self.pool_key is not None:
+            ModelPool.get_instance().release(self.pool_key, self.model, reusable=reusable)
+            self.pool_key = None
 
     def inference_prediction(self, dataset: Dataset):
         self.logger.info('Running prediction model inference...')
-        self.model.compile(loss=dataset.loss,
-                           optimizer=dataset.optimizer)
+        batch_size = (self.inference_settings or InferenceTuner.get_instance().default).batch_size
+        if self.is_prediction_sharded(dataset):
+            return self.sharded_prediction(PredictionPool.get_instance(), dataset, batch_size)
+        if self.pool_key is None:
+            self.model.compile(loss=dataset.loss,
+                               optimizer=dataset.optimizer)
         # check and load weights after model compile
         if self.weights_address:
             if self.weights_address != self.model_address:
-                self.model.load_weights(self.weights_address)
-        result = self.model.predict(dataset.dataset, batch_size=100)  # may be take from price ? (100 for test)
-        # tensorflow bug https://github.com/tensorflow/tensorflow/issues/14356
-        keras.backend.clear_session()
+                self.model.load_weights(self.file_path(self.weights_address))
+        # batches are read from disk ahead of prediction, results order follows batches order
+        generator = BatchGenerator(dataset.dataset,
+                                   batch_size=batch_size,
+                                   prefetch=self.manager.batch_prefetch)
+        try:
+            result = self.model.predict_generator(generator, steps=generator.steps)
+        finally:
+            generator.close()
+            self.release_model()
         return result
 
+    def sharded_prediction(self, prediction_pool: PredictionPool, dataset: Dataset, batch_size: int):
+        # row shards are predicted by pool workers holding their own models, model is not built in compute worker
+        self.logger.info('Prediction sharded across %s processes', prediction_pool.processes)
+        weights_file = None
+        if self.weights_address and self.weights_address != self.model_address:
+            weights_file = self.file_path(self.weights_address)
+        model = PredictionModel(key=(self.model_address, weights_file and self.weights_address),
+                                model_file=self.file_path(self.model_address),
+                                weights_file=weights_file)
+        try:
+            return prediction_pool.predict(model, dataset.dataset, batch_size, directory=self.workspace)
+        finally:
+            self.release_model()
+
     def inference_training(self, dataset: Dataset):
         self.logger.info('Running training model inference...')
-        self.model.compile(loss=dataset.loss,
-                           optimizer=dataset.optimizer)
-        callback_handler = ProgressCallback(self.progress_delegate, dataset.epochs)
-        self.model.fit(dataset.train_x_dataset,
-                       dataset.train_y_dataset,
-                       batch_size=dataset.batch_size,
-                       epochs=dataset.epochs,
-                       validation_split=dataset.validation_split,
-                       shuffle=dataset.shuffle,
-                       initial_epoch=dataset.initial_epoch,
-                       callbacks=[callback_handler])
+        if self.pool_key is None:
+            self.model.compile(loss=dataset.loss,
+                               optimizer=dataset.optimizer)
+        callback_handler = progress_callback(self.progress_delegate, dataset.epochs)
+        # validation rows are taken from the end of train data as keras validation_split does
+        split_at = BatchGenerator.split(dataset.train_x_dataset.shape[0], dataset.validation_split)
+        train_generator = BatchGenerator(dataset.train_x_dataset,
+                                         dataset.train_y_dataset,
+                                         batch_size=dataset.batch_size,
+                                         stop=split_at,
+                                         shuffle=dataset.shuffle_enabled(),
+                                         prefetch=self.manager.batch_prefetch)
+        validation_generator = None
+        if split_at < dataset.train_x_dataset.shape[0]:
+            validation_generator = BatchGenerator(dataset.train_x_dataset,
+                                                  dataset.train_y_dataset,
+                                                  batch_size=dataset.batch_size,
+                                                  start=split_at,
+                                                  prefetch=self.manager.batch_prefetch)
+        try:
+            # generators are not thread safe, single keras enqueuer worker, reading is parallel inside generator
+            self.model.fit_generator(train_generator,
+                                     steps_per_epoch=train_generator.steps,
+                                     epochs=dataset.epochs,
+                                     validation_data=validation_generator,
+                                     validation_steps=validation_generator.steps if validation_generator else None,
+                                     initial_epoch=dataset.initial_epoch,
+                                     callbacks=[callback_handler],
+                                     workers=1)
+        finally:
+            train_generator.close()
+            if validation_generator:
+                validation_generator.close()
+            self.release_model(reusable=False)
         # return model weights after model training
         return self.model
 
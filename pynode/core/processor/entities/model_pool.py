@@ -0,0 +1,171 @@
+import logging
+import threading
+
+from collections import OrderedDict
+
+from core.manager import Manager
+from core.patterns.pynode_logger import LogSocketHandler
+
+
+class PoolEntry:
+
+    def __init__(self, model, weights: list):
+        self.model = model
+        # weights right after model building, restored for every job before its own weights loading
+        self.initial_weights = weights
+        # live weights plus initial weights snapshot
+        self.size = 2 * sum(w.nbytes for w in weights)
+        self.busy = False
+
+
+class ModelPool:
+    """
+    Process-wide pool of compiled models reused across jobs.
+    Models are keyed by kernel IPFS address with compile options, evicted in LRU order by memory budget.
+    Evicted and invalidated models stay in backend graph, so session is recycled (cleared with
+    whole pool) when their number reaches recycle threshold.
+    """
+
+    __instance = None
+
+    def __init__(self, budget_bytes: int = 0, recycle_threshold: int = 8):
+        if ModelPool.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            ModelPool.__instance = self
+        # Initializing logger object
+        self.logger = logging.getLogger("ModelPool")
+        self.logger.addHandler(LogSocketHandler.get_instance())
+        self.budget_bytes = budget_bytes
+        self.recycle_threshold = recycle_threshold
+        self.hits = 0
+        self.misses = 0
+        # models left in backend graph after eviction or invalidation
+        self.stale_models = 0
+
+        # (intra-op, inter-op) threads of backend session, 0 - tensorflow default
+        self.session_threads = (0, 0)
+
+        self.__lock = threading.RLock()
+        self.__entries = OrderedDict()  # key -> PoolEntry, least recently used first
+
+    @staticmethod
+    def get_instance():
+        """ Static access method. """
+        if ModelPool.__instance is None:
+            manager = Manager.get_instance()
+            ModelPool(budget_bytes=manager.model_pool_size,
+                      recycle_threshold=manager.model_pool_recycle)
+        return ModelPool.__instance
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    @property
+    def total_bytes(self) -> int:
+        with self.__lock:
+            return sum(entry.size for entry in self.__entries.values())
+
+    def acquire(self, key: tuple, build):
+        """
+        Return compiled model with its initial weights for key, model is built by build() on miss.
+        Model stays reserved until release()
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and not entry.busy:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+                self.logger.info('Reuse compiled model %s', str(key))
+                entry.model.set_weights(entry.initial_weights)
+                entry.busy = True
+                return entry.model
+
+            self.misses += 1
+            if self.stale_models >= self.recycle_threshold:
+                self.recycle()
+            model = build()
+            if model is None:
+                return None
+            entry = PoolEntry(model, model.get_weights())
+            entry.busy = True
+            if key not in self.__entries:
+                self.__entries[key] = entry
+                self.__evict(keep=key)
+            else:
+                # same model is already used by another job, new one is not pooled
+                self.stale_models += 1
+            return model
+
+    def release(self, key: tuple, model, reusable: bool = True):
+        """ Return model to pool, not reusable models (with modified optimizer state) are dropped """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry.model is not model:
+                return
+            entry.busy = False
+            if not reusable:
+                self.logger.info('Invalidate compiled model %s', str(key))
+                self.__entries.pop(key)
+                self.stale_models += 1
+                return
+            self.__evict()
+
+    def recycle(self):
+        """ Clear backend session dropping all idle models, busy models are left until next recycle """
+        with self.__lock:
+            if any(entry.busy for entry in self.__entries.values()):
+                return
+            self.logger.info('Recycle backend session, stale models : %s, pooled models : %s',
+                             self.stale_models, len(self.__entries))
+            self.__entries.clear()
+            self.stale_models = 0
+            self.clear_session()
+            if self.session_threads != (0, 0):
+                # cleared session is replaced by default one, configured threads are kept
+                self.set_session(*self.session_threads)
+
+    def configure_session(self, intra_op_threads: int, inter_op_threads: int) -> bool:
+        """ Replace backend session by session with threads, pooled models are dropped with previous session """
+        with self.__lock:
+            if (intra_op_threads, inter_op_threads) == self.session_threads:
+                return True
+            if any(entry.busy for entry in self.__entries.values()):
+                return False
+            self.logger.info('Configure backend session threads : intra-op %s, inter-op %s',
+                             intra_op_threads, inter_op_threads)
+            self.__entries.clear()
+            self.stale_models = 0
+            self.clear_session()
+            self.set_session(intra_op_threads, inter_op_threads)
+            self.session_threads = (intra_op_threads, inter_op_threads)
+            return True
+
+    @staticmethod
+    def set_session(intra_op_threads: int, inter_op_threads: int):
+        import keras
+        import tensorflow as tf
+        keras.backend.set_session(tf.Session(config=tf.ConfigProto(intra_op_parallelism_threads=intra_op_threads,
+                                                                   inter_op_parallelism_threads=inter_op_threads)))
+
+    @staticmethod
+    def clear_session():
+        # tensorflow bug https://github.com/tensorflow/tensorflow/issues/14356
+        import keras
+        keras.backend.clear_session()
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __evict(self, keep: tuple = None):
+        total_bytes = sum(entry.size for entry in self.__entries.values())
+        for key in list(self.__entries.keys()):
+            if total_bytes <= self.budget_bytes:
+                break
+            entry = self.__entries[key]
+            if key == keep or entry.busy:
+                continue
+            self.__entries.pop(key)
+            total_bytes -= entry.size
+            self.stale_models += 1
+            self.logger.info('Evicted compiled model %s (%s bytes)', str(key), entry.size)
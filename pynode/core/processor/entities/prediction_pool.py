@@ -0,0 +1,209 @@
+import os
+import logging
+import threading
+import multiprocessing
+import numpy as np
+
+from collections import OrderedDict, namedtuple
+from multiprocessing.connection import wait
+
+from core.manager import Manager
+from core.patterns.pynode_logger import LogSocketHandler
+
+
+# kernel files of prediction, key is used for models caching inside prediction workers
+PredictionModel = namedtuple('PredictionModel', ['key', 'model_file', 'weights_file'])
+# memory-mapped rows shared by prediction workers without pickling
+SharedRows = namedtuple('SharedRows', ['path', 'dtype', 'shape', 'offset'])
+
+
+def run_prediction_worker(conn, threads: int, max_models: int):
+    """
+    Prediction worker process main loop. Worker is spawned, so its tensorflow runtime is not inherited
+    from compute worker. Models are kept between shards and jobs, the least recently used one is dropped.
+    """
+    import keras
+    import tensorflow as tf
+    keras.backend.set_session(tf.Session(config=tf.ConfigProto(intra_op_parallelism_threads=threads,
+                                                               inter_op_parallelism_threads=1)))
+    models = OrderedDict()  # model key -> model, least recently used first
+
+    while True:
+        try:
+            command = conn.recv()
+        except (EOFError, OSError):
+            # compute worker is gone
+            break
+        if command[0] == 'stop':
+            break
+        model_spec, shared, start, stop, batch_size = command[1:]
+        try:
+            model = models.pop(model_spec.key, None)
+            if model is None:
+                with open(model_spec.model_file, 'r') as json_file:
+                    model = keras.models.model_from_json(json_file.read())
+                if model_spec.weights_file:
+                    model.load_weights(model_spec.weights_file)
+                model._make_predict_function()
+            models[model_spec.key] = model
+            while len(models) > max_models:
+                models.popitem(last=False)
+            rows = np.memmap(shared.path, dtype=shared.dtype, mode='r', offset=shared.offset, shape=shared.shape)
+            conn.send(('result', model.predict(rows[start:stop], batch_size=batch_size)))
+            del rows
+        except Exception as ex:
+            conn.send(('error', repr(ex)))
+    conn.close()
+
+
+class PredictionWorker:
+    """ Compute worker side handle of prediction worker process """
+
+    def __init__(self, context, threads: int, max_models: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run_prediction_worker,
+                                       args=(child_conn, threads, max_models),
+                                       name='PredictionWorker',
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def send(self, *command):
+        self.conn.send(command)
+
+    def receive(self):
+        # result of sent shard, None when worker died
+        ready = wait([self.conn, self.process.sentinel])
+        if self.conn not in ready:
+            return None
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            return None
+
+    def stop(self, timeout: float = 1):
+        try:
+            self.send('stop')
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+
+
+class PredictionPool:
+    """
+    Process-wide pool of prediction workers evaluating row shards of one prediction on all CPU cores.
+    Rows are shared through memory-mapped file: memory-mapped dataset is used as is, other datasets are
+    written to job workspace once. Shards are contiguous row ranges, outputs are concatenated in rows order.
+    Workers are started ahead of first job and keep their models, so shards are computed by warm workers.
+    """
+
+    __instance = None
+
+    def __init__(self, processes: int = 1, threads: int = 0, max_models: int = 2):
+        if PredictionPool.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            PredictionPool.__instance = self
+        # Initializing logger object
+        self.logger = logging.getLogger("PredictionPool")
+        self.logger.addHandler(LogSocketHandler.get_instance())
+        self.processes = processes
+        # cores are divided between workers, 0 - by cpu count
+        self.threads = threads or max(1, (os.cpu_count() or 1) // max(1, processes))
+        self.max_models = max_models
+        # tensorflow runtime is not fork safe, workers are started from clean interpreter
+        self.context = multiprocessing.get_context('spawn')
+
+        self.__lock = threading.RLock()
+        self.__workers = []
+
+    @staticmethod
+    def get_instance():
+        """ Static access method. """
+        if PredictionPool.__instance is None:
+            manager = Manager.get_instance()
+            PredictionPool(processes=manager.prediction_processes)
+        return PredictionPool.__instance
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 1
+
+    def start(self):
+        with self.__lock:
+            while len(self.__workers) < self.processes:
+                self.__workers.append(PredictionWorker(self.context, self.threads, self.max_models))
+        self.logger.info('Prediction workers started : %s, threads per worker : %s', self.processes, self.threads)
+
+    def stop(self):
+        with self.__lock:
+            for worker in self.__workers:
+                worker.stop()
+            self.__workers = []
+
+    def predict(self, model: PredictionModel, rows, batch_size: int, directory: str = '') -> np.ndarray:
+        """ Predict rows by workers, rows are numpy array, memory-mapped array or HDF5 dataset """
+        with self.__lock:
+            self.start()
+            shared, temporary_file = self.share(rows, directory)
+            try:
+                shards = self.shards(shared.shape[0], len(self.__workers), batch_size)
+                workers = self.__workers[:len(shards)]
+                for worker, (start, stop) in zip(workers, shards):
+                    worker.send('predict', model, shared, start, stop, batch_size)
+                # every worker answers, so pipes are clean for the next prediction
+                answers = [worker.receive() for worker in workers]
+            finally:
+                if temporary_file:
+                    os.remove(temporary_file)
+            self.__replace_dead(workers, answers)
+            for answer in answers:
+                if answer is None:
+                    raise RuntimeError('Prediction worker crashed')
+                if answer[0] == 'error':
+                    raise RuntimeError('Prediction worker failure : ' + answer[1])
+            return np.concatenate([answer[1] for answer in answers])
+
+    @staticmethod
+    def shards(rows_count: int, count: int, batch_size: int) -> list:
+        """ Contiguous (start, stop) row ranges of whole batches, the last shard takes the rest """
+        batches = -(-rows_count // batch_size)
+        count = max(1, min(count, batches))
+        bounds = [min(rows_count, batch_size * (batches * index // count)) for index in range(count + 1)]
+        return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+    @staticmethod
+    def share(rows, directory: str = '') -> tuple:
+        """ Memory-mapped file of rows and temporary file to remove after prediction """
+        if isinstance(rows, np.memmap) and rows.filename and rows.flags['C_CONTIGUOUS'] \
+                and rows.base is not None and not isinstance(rows.base, np.ndarray):
+            return SharedRows(rows.filename, rows.dtype.str, rows.shape, rows.offset), None
+        path = os.path.join(directory or os.getcwd(), 'prediction_rows_%s.npy' % os.getpid())
+        shared = np.lib.format.open_memmap(path, mode='w+', dtype=rows.dtype, shape=rows.shape)
+        # rows are copied by blocks, HDF5 dataset is not read into memory at once
+        step = max(1, (64 * 1024 * 1024) // max(1, shared[:1].nbytes))
+        for start in range(0, rows.shape[0], step):
+            shared[start:start + step] = rows[start:start + step]
+        shared.flush()
+        description = SharedRows(path, shared.dtype.str, shared.shape, shared.offset)
+        del shared
+        return description, path
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __replace_dead(self, workers: list, answers: list):
+        for worker, answer in zip(workers, answers):
+            if answer is None:
+                self.logger.critical('Prediction worker %s crashed with exit code %s',
+                                     worker.process.pid, worker.process.exitcode)
+                self.__workers[self.__workers.index(worker)] = PredictionWorker(self.context, self.threads,
+                                                                               self.max_models)
+                worker.stop()
@@ -1,11 +1,11 @@
 import logging
-import h5py
 import os
 
 from abc import ABCMeta, abstractmethod
 from threading import Thread
 from core.processor.entities.kernel import Kernel
 from core.processor.entities.dataset import Dataset
+from core.processor.entities.dataset_loader import DatasetLoader
 from core.manager import Manager
 from core.patterns.pynode_logger import LogSocketHandler
 
@@ -30,7 +30,8 @@ class ProcessorDelegate(metaclass=ABCMeta):
 
 class Processor(Thread):
 
-    def __init__(self, ipfs_api, processor_id: str, delegate: ProcessorDelegate):
+    def __init__(self, ipfs_api, processor_id: str, delegate: ProcessorDelegate, workspace: str = '',
+                 job_id_hex: str = None):
         super().__init__()
         # Initializing logger object
         self.logger = logging.getLogger("Processor")
@@ -39,27 +40,48 @@ class Processor(Thread):
         # Configuring
         self.id = processor_id
         self.results_file = None
+        # job files directory, only its files are cleaned up after job
+        self.workspace = workspace
+        self.job_id_hex = job_id_hex if job_id_hex is not None else self.manager.eth_job_id_hex
         # variables for kernel and dataset objects
         self.kernel = None
         self.kernel_init_result = None
         self.dataset = None
         self.dataset_init_result = None
+        # peak resident memory sampled while job processing
+        self.peak_resident_bytes = 0
         # define delegate
         self.ipfs_api = ipfs_api
         self.delegate = delegate
         # root files pth
 
+    def prefetch_kernel(self, kernel_file):
+        # create kernel and schedule its files downloading
+        self.kernel = Kernel(kernel_file=kernel_file,
+                             ipfs_api=self.ipfs_api,
+                             delegate=self.delegate,
+                             workspace=self.workspace)
+        self.kernel.prefetch()
+
+    def prefetch_dataset(self, dataset_file, batch: int):
+        # create dataset and schedule its files downloading
+        self.dataset = Dataset(dataset_file=dataset_file,
+                               ipfs_api=self.ipfs_api,
+                               batch_no=batch,
+                               workspace=self.workspace)
+        self.dataset.prefetch()
+
     def prepare(self, kernel_file, dataset_file, batch: int) -> bool:
         try:
-            self.kernel = Kernel(kernel_file=kernel_file,
-                                 ipfs_api=self.ipfs_api,
-                                 delegate=self.delegate)
+            # entities may be already created by prefetch while job root files were landing
+            if self.kernel is None or self.kernel.json_kernel is not kernel_file:
+                self.prefetch_kernel(kernel_file)
+            if self.dataset is None or self.dataset.json_dataset is not dataset_file:
+                self.prefetch_dataset(dataset_file, batch)
+
             self.kernel_init_result = self.kernel.init_kernel()
             self.logger.info('Kernel init result : ' + str(self.kernel_init_result))
 
-            self.dataset = Dataset(dataset_file=dataset_file,
-                                   ipfs_api=self.ipfs_api,
-                                   batch_no=batch)
             self.dataset_init_result = self.dataset.init_dataset()
             self.logger.info('Dataset init result : ' + str(self.dataset_init_result))
         except Exception as ex:
@@ -75,6 +97,7 @@ class Processor(Thread):
         return False
 
     def load(self):
+        DatasetLoader.reset_peak_resident_bytes()
         if self.__load() is False:
             self.delegate.processor_load_failure(processor_id=self.id)
         else:
@@ -83,21 +106,37 @@ class Processor(Thread):
     def __load(self) -> bool:
         # load data sets for computing
         try:
-            # reading kernel data
-            self.kernel.read_model()
-            # prepare data for prediction or training
+            # prediction rows are read first, model is built in backend session tuned for them
             if self.dataset.process == 'predict':
                 self.dataset.read_dataset()
-            elif self.dataset.process == 'fit':
+                self.kernel.apply_inference_settings(self.dataset)
+            # reading kernel data, sharded prediction is computed by models of prediction workers
+            if self.dataset.process == 'predict' and self.kernel.is_prediction_sharded(self.dataset):
+                if not self.kernel.validate_model():
+                    return False
+            elif self.kernel.read_model(self.dataset) is None:
+                return False
+            # prepare data for training
+            if self.dataset.process == 'fit':
                 self.dataset.read_x_train_dataset()
                 self.dataset.read_y_train_dataset()
         except Exception as ex:
             self.logger.error("Error reading entities: %s", type(ex))
             self.logger.error(ex.args)
             return False
+        self.sample_resident_bytes()
+        self.logger.info('Dataset bytes loaded into memory : ' + str(self.dataset.loader.resident_bytes))
         return True
 
+    def sample_resident_bytes(self):
+        # peak since loading or computing start, memory released between samples is counted too
+        resident_bytes = DatasetLoader.process_peak_resident_bytes()
+        if resident_bytes > self.peak_resident_bytes:
+            self.peak_resident_bytes = resident_bytes
+            self.manager.set_job_peak_resident_bytes(resident_bytes)
+
     def compute(self):
+        DatasetLoader.reset_peak_resident_bytes()
         if self.__load() is False:
             self.delegate.processor_computing_failure(self.id)
             return
@@ -106,6 +145,8 @@ class Processor(Thread):
             if self.dataset.process == 'predict':
                 # return prediction result
                 out = self.kernel.inference_prediction(self.dataset)
+                # tuning is probed when compute worker is idle, the next jobs of kernel get tuned settings
+                self.kernel.tune_inference(self.dataset)
             elif self.dataset.process == 'fit':
                 # return model instance after training
                 out = self.kernel.inference_training(self.dataset)
@@ -115,12 +156,15 @@ class Processor(Thread):
             self.delegate.processor_computing_failure(self.id)
             return
 
+        self.sample_resident_bytes()
+        self.logger.info('Peak resident memory for job : ' + str(self.peak_resident_bytes))
         self.logger.info('Computing completed successfully, saving results to a file')
         self.commit_computing_result(out)
 
     def commit_computing_result(self, out):
-        self.results_file = str(self.manager.eth_job_id_hex) + '.out.h5'
+        self.results_file = os.path.join(self.workspace, str(self.job_id_hex) + '.out.h5')
         try:
+            import h5py
             if self.dataset.process == 'predict':
                 h5w = h5py.File(self.results_file, 'w')
                 h5w.create_dataset('dataset', data=out)
@@ -134,15 +178,27 @@ class Processor(Thread):
             return
         # need to return file address
         ipfs_result_address = self.ipfs_api.upload_file(self.results_file)
-        self.delegate.processor_computing_complete(self.id, ipfs_result_address)
         self.dataset.process = None
+        # workspace is removed by broker on computing complete, so processor files are cleaned up before
         self.clean_up()
+        self.delegate.processor_computing_complete(self.id, ipfs_result_address)
 
     def clean_up(self):
         # clean up files (out file temporary will not be deleted)
+        # downloaded files are links to local IPFS blob cache, cache directory stays untouched
         self.logger.info('Clean up data files')
-        for filename in os.listdir(os.getcwd()):
-            if 'out' not in filename:
-                os.remove(filename)
-        self.manager.eth_job_id_hex = ''
+        if self.kernel is not None:
+            self.kernel.release_model()
+        if self.dataset is not None:
+            self.dataset.loader.close()
+        if not self.workspace:
+            # files of other jobs and pynode itself may be in current directory, nothing is removed
+            self.logger.error('Processor has no job workspace, skip data files clean up')
+        else:
+            for filename in os.listdir(self.workspace):
+                file_path = os.path.join(self.workspace, filename)
+                if 'out' not in filename and os.path.isfile(file_path):
+                    os.remove(file_path)
+        if self.manager.eth_job_id_hex == self.job_id_hex:
+            self.manager.eth_job_id_hex = ''
         self.logger.info('Clean up complete')
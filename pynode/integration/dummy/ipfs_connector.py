@@ -9,7 +9,7 @@ class IpfsConnectorDummy(IpfsAbstract):
     def connect(self, server='localhost', port=5001, data_dir='../tmp'):
         pass
 
-    def download_file(self, file_address: str):
+    def download_file(self, file_address: str, directory: str = None):
         pass
 
     def upload_file(self, file_name: str):
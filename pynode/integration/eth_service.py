@@ -24,6 +24,18 @@ class EthAbstract(metaclass=ABCMeta):
     def transact(self, cb: Callable):
         pass
 
+    def block_number(self, contract):
+        # connectors without reads pinning read latest block
+        return 'latest'
+
+    def call_batch(self, calls: list, block_identifier='latest') -> list:
+        # connectors without batching issue contract function calls one by one
+        return [call.call(block_identifier=block_identifier) for call in calls]
+
+    def call_batch_with_block(self, calls: list) -> tuple:
+        # connectors without reads pinning read latest block
+        return 'latest', self.call_batch(calls)
+
 
 class EthService(EthAbstract):
 
@@ -49,3 +61,11 @@ class EthService(EthAbstract):
     def transact(self, cb: Callable):
         return self.strategy.transact(cb)
 
+    def block_number(self, contract):
+        return self.strategy.block_number(contract=contract)
+
+    def call_batch(self, calls: list, block_identifier='latest') -> list:
+        return self.strategy.call_batch(calls=calls, block_identifier=block_identifier)
+
+    def call_batch_with_block(self, calls: list) -> tuple:
+        return self.strategy.call_batch_with_block(calls=calls)
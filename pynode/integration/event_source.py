@@ -0,0 +1,130 @@
+import logging
+
+from abc import ABCMeta, abstractmethod
+from threading import RLock
+from typing import Callable, Union
+
+
+class Subscription:
+    """ Logs or new heads subscription, the same object is passed between event sources on fallback """
+
+    def __init__(self, kind: str, callback: Callable, address: Union[str, list] = None, topics: list = None):
+        self.kind = kind  # 'logs' or 'newHeads'
+        self.callback = callback
+        self.address = address
+        self.topics = topics
+        self.active = True
+        self.remote_id = None  # node subscription id of push event source
+
+    def notify(self, value):
+        if self.active:
+            self.callback(value)
+
+
+class EventSourceAbstract(metaclass=ABCMeta):
+
+    on_failure = None  # called by event source unable to deliver events anymore
+
+    @abstractmethod
+    def subscribe(self, subscription: Subscription):
+        pass
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription):
+        pass
+
+    @abstractmethod
+    def start(self, from_block: int = None) -> bool:
+        pass
+
+    @abstractmethod
+    def stop(self):
+        pass
+
+    @property
+    @abstractmethod
+    def last_block(self) -> Union[int, None]:
+        pass
+
+
+class EventSource:
+    """
+    Delivers contract logs and new block numbers pushed by node subscriptions (eth_subscribe over
+    WebSocket or IPC) when push source is configured and supported by node,
+    falls back to polling source on subscription error or connection loss without missing blocks.
+    """
+
+    logger = logging.getLogger("EventSource")
+
+    def __init__(self, polling: EventSourceAbstract, push: EventSourceAbstract = None):
+        self.polling = polling
+        self.push = push
+        self.active = None
+        self.__lock = RLock()
+        self.__subscriptions = []
+
+    @property
+    def mode(self) -> str:
+        return 'push' if self.active is not None and self.active is self.push else 'polling'
+
+    def subscribe_logs(self, address: Union[str, list], topics: list, callback: Callable) -> Subscription:
+        """ Callback receives formatted log entries of address matching topics """
+        return self.__subscribe(Subscription('logs', callback, address=address, topics=topics))
+
+    def subscribe_new_heads(self, callback: Callable[[int], None]) -> Subscription:
+        """ Callback receives number of every new block """
+        return self.__subscribe(Subscription('newHeads', callback))
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.__lock:
+            subscription.active = False
+            if subscription in self.__subscriptions:
+                self.__subscriptions.remove(subscription)
+            if self.active is not None:
+                self.active.unsubscribe(subscription)
+
+    def start(self):
+        with self.__lock:
+            if self.push is not None:
+                self.push.on_failure = self.__fallback
+                for subscription in self.__subscriptions:
+                    self.push.subscribe(subscription)
+                if self.push.start():
+                    self.active = self.push
+                    self.logger.info('Events are pushed by node subscriptions')
+                    return
+                self.logger.info('Node subscriptions are not available')
+            self.__start_polling(None)
+
+    def stop(self):
+        with self.__lock:
+            if self.active is not None:
+                self.active.stop()
+            self.active = None
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __subscribe(self, subscription: Subscription) -> Subscription:
+        with self.__lock:
+            self.__subscriptions.append(subscription)
+            if self.active is not None:
+                self.active.subscribe(subscription)
+        return subscription
+
+    def __fallback(self):
+        with self.__lock:
+            if self.active is not self.push:
+                return
+            self.push.stop()
+            last_block = self.push.last_block
+            self.logger.info('Node subscriptions lost, fallback to polling from block %s', last_block)
+            # logs of the last pushed block may be not delivered yet, it is polled again
+            self.__start_polling(last_block)
+
+    def __start_polling(self, from_block: Union[int, None]):
+        for subscription in self.__subscriptions:
+            self.polling.subscribe(subscription)
+        self.polling.start(from_block)
+        self.active = self.polling
+        self.logger.info('Events are polled')
@@ -0,0 +1,55 @@
+import logging
+
+from threading import Lock
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from integration.ipfs_service import IpfsAbstract
+
+
+class FetchScheduler(IpfsAbstract):
+    """
+    IPFS strategy wrapper downloading job files concurrently on a bounded worker pool.
+    Every address is fetched once per scheduler into its directory (job workspace), on_landed callback
+    (files parsing, headers validation) runs on the worker as soon as file lands, so dependent files
+    can be scheduled without waiting for the whole chain.
+    """
+
+    logger = logging.getLogger("FetchScheduler")
+
+    def __init__(self, strategic: IpfsAbstract, workers: int = 4, directory: str = None):
+        self.strategy = strategic
+        self.directory = directory
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+        self.__lock = Lock()
+        self.__fetches = {}  # address -> Future
+
+    def connect(self, server='localhost', port=5001, data_dir='../tmp'):
+        self.strategy.connect(server=server, port=port, data_dir=data_dir)
+
+    def prefetch(self, file_address: str, on_landed: Callable[[str], None] = None) -> Future:
+        with self.__lock:
+            future = self.__fetches.get(file_address)
+            if future is None:
+                self.logger.info('Schedule fetching of %s', file_address)
+                future = self.executor.submit(self.__fetch, file_address, on_landed)
+                self.__fetches[file_address] = future
+            return future
+
+    def download_file(self, file_address: str, directory: str = None):
+        # wait for scheduled file or fetch it right now, fetch errors are raised here
+        return self.prefetch(file_address).result()
+
+    def upload_file(self, file_name: str):
+        return self.strategy.upload_file(file_name=file_name)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    def __fetch(self, file_address: str, on_landed: Callable[[str], None]):
+        file_path = self.strategy.download_file(file_address=file_address, directory=self.directory) \
+            or file_address
+        self.logger.info('File %s landed', file_address)
+        if on_landed is not None:
+            on_landed(file_path)
+        return file_path
@@ -0,0 +1,104 @@
+import time
+import logging
+
+from threading import Thread, RLock
+
+
+class GasOracle(Thread):
+    """
+    Serves gas price and gas limits from memory.
+    Gas price (by web3 gas price strategy) and block gas limit are refreshed in background on new blocks,
+    no more often than refresh interval. Values older than max age are refreshed on demand.
+    Gas limits are estimated once per contract function and kept until invalidated.
+    """
+
+    logger = logging.getLogger("GasOracle")
+
+    def __init__(self, web3, refresh_interval: int = 60, max_age: int = 300, default_gas_limit: int = 1000000,
+                 gas_margin: float = 1.2, poll_interval: int = 5):
+        super().__init__(daemon=True)
+        self.web3 = web3
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.default_gas_limit = default_gas_limit
+        self.gas_margin = gas_margin
+        self.poll_interval = poll_interval
+        self.running = False
+
+        self.__lock = RLock()
+        self.__gas_price = None
+        self.__block_gas_limit = None
+        self.__block_number = None
+        self.__updated = 0
+        self.__estimates = {}  # function name -> gas estimate
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    def start(self):
+        self.running = True
+        super().start()
+
+    def stop(self):
+        self.running = False
+
+    def gas_price(self) -> int:
+        with self.__lock:
+            if self.__gas_price is None or time.time() - self.__updated > self.max_age:
+                self.refresh()
+            return self.__gas_price
+
+    def gas_limit(self, name: str, function, account: str) -> int:
+        """ Gas limit for contract function call, estimated once for function name """
+        with self.__lock:
+            estimate = self.__estimates.get(name)
+        if estimate is None:
+            try:
+                estimate = function.estimateGas({'from': account})
+            except Exception as ex:
+                # function may be not callable in current contract state
+                self.logger.info('Unable to estimate gas for %s, default limit is used', name)
+                self.logger.info(ex.args)
+                return self.__cap(self.default_gas_limit)
+            with self.__lock:
+                self.__estimates[name] = estimate
+            self.logger.info('Gas estimated for %s : %s', name, estimate)
+        return self.__cap(int(estimate * self.gas_margin))
+
+    def invalidate(self, name: str):
+        """ Drop cached estimate, e.g. after failed transaction """
+        with self.__lock:
+            self.__estimates.pop(name, None)
+
+    def refresh(self):
+        gas_price = self.web3.eth.generateGasPrice()
+        if gas_price is None:
+            # no gas price strategy is set, use node suggestion
+            gas_price = self.web3.eth.gasPrice
+        block = self.web3.eth.getBlock('latest')
+        with self.__lock:
+            self.__gas_price = int(gas_price)
+            self.__block_gas_limit = block['gasLimit']
+            self.__block_number = block['number']
+            self.__updated = time.time()
+        self.logger.info('Gas price refreshed on block %s : %s', block['number'], gas_price)
+
+    def run(self):
+        while self.running:
+            try:
+                block_number = self.web3.eth.blockNumber
+                if block_number != self.__block_number and time.time() - self.__updated >= self.refresh_interval:
+                    self.refresh()
+            except Exception as ex:
+                self.logger.info('Exception on gas price refreshing.')
+                self.logger.info(ex.args)
+            time.sleep(self.poll_interval)
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __cap(self, gas_limit: int) -> int:
+        # transaction can not exceed block gas limit
+        if self.__block_gas_limit:
+            return min(gas_limit, self.__block_gas_limit)
+        return gas_limit
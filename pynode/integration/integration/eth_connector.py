@@ -1,30 +1,172 @@
+import json
+import time
+import hashlib
 import logging
+import requests
+
+from requests.adapters import HTTPAdapter
+from threading import RLock
 from typing import Callable
 from integration.eth_service import EthAbstract
+from eth_abi import decode_abi
+from hexbytes import HexBytes
 from web3 import Web3, HTTPProvider
 from web3.middleware import geth_poa_middleware
+from web3.utils.abi import get_abi_output_types, map_abi_data
+from web3.utils.contracts import find_matching_fn_abi, prepare_transaction
+from web3.utils.normalizers import BASE_RETURN_NORMALIZERS
 from core.patterns.exceptions import EthConnectionException, EthIsNotInSyncException
 
 
+class PooledHTTPProvider(HTTPProvider):
+    """ HTTP provider posting JSON-RPC requests through its own keep-alive session with sized connections pool """
+
+    def __init__(self, endpoint_uri: str, pool_size: int = 10, timeout: int = 10):
+        super().__init__(endpoint_uri)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        request_kwargs = self.get_request_kwargs()
+        request_kwargs.setdefault('timeout', self.timeout)
+        response = self.session.post(self.endpoint_uri, data=request_data, **request_kwargs)
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+    def make_batch_request(self, requests_list: list) -> list:
+        """ Send (method, params) requests as one JSON-RPC batch, results are returned in requests order """
+        batch = [{'jsonrpc': '2.0', 'method': method, 'params': params, 'id': idx}
+                 for idx, (method, params) in enumerate(requests_list)]
+        request_kwargs = self.get_request_kwargs()
+        request_kwargs.setdefault('timeout', self.timeout)
+        response = self.session.post(self.endpoint_uri, data=json.dumps(batch), **request_kwargs)
+        response.raise_for_status()
+        results = sorted(response.json(), key=lambda item: item['id'])
+        for result in results:
+            if 'error' in result:
+                raise ValueError(result['error'])
+        return [result['result'] for result in results]
+
+
 class EthConnector(EthAbstract):
+    """
+    Web3 instances are shared by all connectors, one pooled provider per host.
+    Contracts are registered by (host, address, ABI hash), node sync state is checked once per TTL.
+    """
 
     logger = logging.getLogger("EthConnector")
 
+    web3 = None
+
+    __lock = RLock()
+    __providers = {}        # host -> Web3
+    __contracts = {}        # (host, checksum address, abi hash) -> contract
+    __sync_checks = {}      # host -> last successful sync check time
+    __abi_hashes = {}       # id(abi) -> (abi, abi hash)
+
+    def __init__(self, pool_size: int = 10, sync_check_ttl: int = 60):
+        self.pool_size = int(pool_size)
+        self.sync_check_ttl = int(sync_check_ttl)
+
     def init_contract(self, server_address: str, contract_address: str, contract_abi: str):
-        self.logger.info("Init eth connection...")
-        EthConnector.web3 = Web3(HTTPProvider(server_address))
-        # insert PoA(for example rinkeby) integration and check version
-        EthConnector.web3.middleware_stack.inject(geth_poa_middleware, layer=0)
+        web3 = self.get_web3(server_address)
+        self.check_sync(server_address, web3)
+        checksum_address = web3.toChecksumAddress(contract_address)
+        key = (server_address, checksum_address, self.abi_hash(contract_abi))
+        with EthConnector.__lock:
+            contract = EthConnector.__contracts.get(key)
+            if contract is None:
+                contract = web3.eth.contract(address=checksum_address, abi=contract_abi)
+                EthConnector.__contracts[key] = contract
+        EthConnector.web3 = web3
+        return contract
+
+    def get_web3(self, server_address: str) -> Web3:
+        with EthConnector.__lock:
+            web3 = EthConnector.__providers.get(server_address)
+            if web3 is None:
+                self.logger.info("Init eth connection...")
+                web3 = Web3(PooledHTTPProvider(server_address, pool_size=self.pool_size))
+                # insert PoA(for example rinkeby) integration and check version
+                web3.middleware_stack.inject(geth_poa_middleware, layer=0)
+                EthConnector.__providers[server_address] = web3
+            return web3
+
+    def check_sync(self, server_address: str, web3: Web3):
+        checked = EthConnector.__sync_checks.get(server_address)
+        if checked is not None and time.time() - checked < self.sync_check_ttl:
+            return
         try:
-            info = EthConnector.web3.eth.syncing
+            info = web3.eth.syncing
         except Exception as ex:
             raise EthConnectionException('Error connecting Ethereum node', ex)
 
         if info is not False:
             raise EthIsNotInSyncException('Ethereum node is not in synch', info)
-        contract = EthConnector.web3.eth.contract(address=EthConnector.web3.toChecksumAddress(contract_address),
-                                                  abi=contract_abi)
-        return contract
+        EthConnector.__sync_checks[server_address] = time.time()
+
+    def block_number(self, contract) -> int:
+        # reads of one job setup are pinned to this block
+        return contract.web3.eth.blockNumber
+
+    def call_batch(self, calls: list, block_identifier='latest') -> list:
+        """ Issue contract function calls as one JSON-RPC batch of eth_call requests """
+        if not calls:
+            return []
+        web3 = calls[0].web3
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+        return_data = web3.providers[0].make_batch_request([self.call_request(call, block_identifier)
+                                                            for call in calls])
+        return [self.decode_call_result(call, HexBytes(data)) for call, data in zip(calls, return_data)]
+
+    def call_batch_with_block(self, calls: list) -> tuple:
+        """
+        Read block number along with latest block calls in one JSON-RPC batch,
+        the following reads depending on call results are pinned to this block
+        """
+        web3 = calls[0].web3
+        return_data = web3.providers[0].make_batch_request([('eth_blockNumber', [])] +
+                                                           [self.call_request(call, 'latest') for call in calls])
+        return int(return_data[0], 16), [self.decode_call_result(call, HexBytes(data))
+                                         for call, data in zip(calls, return_data[1:])]
+
+    @staticmethod
+    def call_request(call, block_identifier) -> tuple:
+        transaction = prepare_transaction(call.contract_abi,
+                                          call.address,
+                                          call.web3,
+                                          fn_identifier=call.function_identifier,
+                                          fn_args=call.args,
+                                          fn_kwargs=call.kwargs,
+                                          transaction={'to': call.address})
+        return 'eth_call', [transaction, block_identifier]
+
+    @staticmethod
+    def decode_call_result(call, return_data: bytes):
+        # the same decoding as web3 applies for ContractFunction.call()
+        function_abi = find_matching_fn_abi(call.contract_abi, call.function_identifier, call.args, call.kwargs)
+        output_types = get_abi_output_types(function_abi)
+        output_data = decode_abi(output_types, return_data)
+        normalizers = list(BASE_RETURN_NORMALIZERS) + list(call._return_data_normalizers)
+        normalized_data = map_abi_data(normalizers, output_types, output_data)
+        if len(normalized_data) == 1:
+            return normalized_data[0]
+        return normalized_data
+
+    @staticmethod
+    def abi_hash(contract_abi) -> str:
+        # ABIs are loaded once on launch, hash is kept by ABI object identity
+        cached = EthConnector.__abi_hashes.get(id(contract_abi))
+        if cached is not None and cached[0] is contract_abi:
+            return cached[1]
+        digest = hashlib.sha1(json.dumps(contract_abi, sort_keys=True).encode('utf-8')).hexdigest()
+        EthConnector.__abi_hashes[id(contract_abi)] = (contract_abi, digest)
+        return digest
 
     def bind_event(self, contract, event: str, callback: Callable[[object], None]):
         self.logger.info("Bind event...")
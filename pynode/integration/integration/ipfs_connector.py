@@ -1,109 +1,102 @@
 import ipfsapi
 import os
-import requests
 import time
-import math
 import logging
-import sys
 
 from integration.ipfs_service import IpfsAbstract
+from integration.integration.ipfs_downloader import StreamingDownloader
+from integration.ipfs_cache import IpfsBlobCache
+from core.manager import Manager
 
 
 class IpfsConnector(IpfsAbstract):
 
     connector = None
     data_dir = None
-    chunk_size = 4096
 
     logger = logging.getLogger("IpfsConnector")
 
+    def __init__(self, cache_size: int = 0, gateway: str = 'https://gateway.ipfs.io/ipfs/',
+                 chunk_size: int = 1024 * 1024, gateway_timeout: int = 5):
+        # cache size in bytes, 0 disables blobs caching
+        self.cache_size = int(cache_size)
+        self.cache = None
+        # objects are streamed from configured node HTTP API, it resumes by offset argument and ignores ranges
+        self.node_url = None
+        self.downloader = StreamingDownloader(chunk_size=chunk_size, offset_param='offset')
+        # public gateway is fallback, empty disables it, missing object or slow gateway fails fast
+        self.gateway = gateway
+        self.gateway_downloader = StreamingDownloader(chunk_size=chunk_size,
+                                                      timeout=(gateway_timeout, 30),
+                                                      retries=0)
+
     def connect(self, server='localhost', port=5001, data_dir='../tmp'):
         self.connector = ipfsapi.connect(server, port)
+        self.node_url = '%s:%s/api/v0/cat?arg=' % (server if '://' in server else 'http://' + server, port)
         if data_dir not in os.getcwd():
             os.chdir(data_dir)
+        if self.cache is None and self.cache_size > 0:
+            self.cache = IpfsBlobCache(cache_dir=os.path.join(os.getcwd(), 'cache'),
+                                       max_bytes=self.cache_size)
+            self.logger.info('IPFS blob cache located in %s, %s bytes used',
+                             self.cache.cache_dir, self.cache.total_bytes)
         return self.connector
 
-    # new version for data downloader implementation
-    def download_file(self, file_address: str):
+    def download_file(self, file_address: str, directory: str = None):
+        # file is placed into directory under its address, current working directory by default
+        directory = directory or os.getcwd()
+        if self.cache is None:
+            file_path = os.path.join(directory, file_address)
+            self.fetch_file(file_address, file_path)
+            return file_path
+
         try:
-            # for downloading use https getaway
-            host_remote = 'https://gateway.ipfs.io/ipfs/'
-            with open(file_address, "wb") as f:
-                self.logger.info("Search IPFS for data : " + file_address)
-                start = time.time()
+            if self.cache.lookup(file_address) is not None:
+                self.logger.info("IPFS cache hit for : " + file_address)
+            else:
+                self.logger.info("IPFS cache miss for : " + file_address)
+                temp_file = self.cache.temp_path(file_address)
                 try:
-                    return self.connector.get(file_address)
-                    # response = requests.get(host_remote + file_address, stream=True, timeout=120)
-                except Exception as ex:
-                    if isinstance(ex.args, tuple):
-                        str_exception = ex.args[0].args[0]
-                        if 'Read timed out' in str(str_exception):
-                            self.logger.info('Get file by getaway timed out try get by ipfs API')
-                            return self.connector.get(file_address)
-                # for getting data vs ipfs https comment sting below
-                response = requests.get(host_remote + file_address, stream=True, timeout=120)
-                total_length = response.headers.get('content-length')
+                    self.fetch_file(file_address, temp_file)
+                    self.cache.publish(file_address, temp_file)
+                except Exception:
+                    self.cache.discard(temp_file)
+                    raise
+        finally:
+            # hits and misses are published alike
+            self.update_cache_stats()
+        file_path = self.cache.link(file_address, directory)
+        if file_path is None:
+            # blob is evicted by concurrent publish after lookup, job gets its own copy
+            self.logger.info("IPFS cached blob evicted before linking : " + file_address)
+            file_path = os.path.join(directory, file_address)
+            if os.path.lexists(file_path):
+                # previous copy may be hard link of other cached blob, it is not overwritten in place
+                os.remove(file_path)
+            self.fetch_file(file_address, file_path)
+        return file_path
+
+    def update_cache_stats(self):
+        stats = self.cache.stats()
+        Manager.get_instance().set_ipfs_cache_stats(hits=stats['hits'],
+                                                    misses=stats['misses'],
+                                                    evicted_bytes=stats['evicted_bytes'])
 
-                if total_length is None:  # no content length header
-                    f.write(response.content)
-                else:
-                    total_iterations = math.ceil(int(total_length) / self.chunk_size)
-                    if total_iterations > 1:
-                        self.print_progress_bar(0,
-                                                total_iterations,
-                                                prefix='Download:',
-                                                suffix='Complete',
-                                                length=50)
-                    current_iteration = 0
-                    for data in response.iter_content(chunk_size=self.chunk_size):
-                        f.write(data)
-                        current_iteration = current_iteration + 1
-                        self.print_progress_bar(current_iteration,
-                                                total_iterations,
-                                                prefix='Download:',
-                                                suffix='Complete',
-                                                length=50)
-                    end = time.time()
-                    elapse = end - start
-                    self.logger.info("File size                        : " + str(total_length))
-                    self.logger.info("Operation complete success. time : " + str(elapse))
+    # streaming data downloader implementation
+    def fetch_file(self, file_address: str, file_path: str):
+        self.logger.info("Search IPFS for data : " + file_address)
+        start = time.time()
+        try:
+            # stream object from configured node by large chunks
+            self.downloader.download(self.node_url + file_address, file_path, method='POST')
         except Exception as ex:
-            self.logger.info("Operation exception.")
+            if not self.gateway:
+                raise
+            self.logger.info('Get file by ipfs node failed, try public gateway')
             self.logger.info(ex.args)
-        return f
-
-# old download impl by sync library
-#    def download_file(self, file_address: str):
-#        return self.connector.get(file_address)
+            self.gateway_downloader.download(self.gateway + file_address, file_path)
+        self.logger.info("File size                        : " + str(os.path.getsize(file_path)))
+        self.logger.info("Operation complete success. time : " + str(time.time() - start))
 
     def upload_file(self, file_name: str):
         return self.connector.add(file_name)['Hash']
-
-    # -------------------------------------
-    # Print iterations progress
-    # -------------------------------------
-    @staticmethod
-    def print_progress_bar(iteration, total, prefix='', suffix='', decimals=1, length=100, fill='█'):
-        """
-        Call in a loop to create terminal progress bar
-        @params:
-            iteration   - Required  : current iteration (Int)
-            total       - Required  : total iterations (Int)
-            prefix      - Optional  : prefix string (Str)
-            suffix      - Optional  : suffix string (Str)
-            decimals    - Optional  : positive number of decimals in percent complete (Int)
-            length      - Optional  : character length of bar (Int)
-            fill        - Optional  : bar fill character (Str)
-        """
-        percent = ("{0:." + str(decimals) + "f}").format(100 * (iteration / float(total)))
-        filled_length = int(length * iteration // total)
-        bar = fill * filled_length + '-' * (length - filled_length)
-        message = '\r%s |%s| %s%% %s' % (prefix, bar, percent, suffix)
-        # simple solution working correctly only on unix like systems
-        # self.logger.info(message)
-        sys.stdout.write(message)
-        sys.stdout.flush()
-        # Print New Line on Complete
-        if iteration == total:
-            sys.stdout.write('\r\n')
-            sys.stdout.flush()
@@ -0,0 +1,124 @@
+import os
+import time
+import logging
+import requests
+
+
+class IncompleteDownloadError(Exception):
+    pass
+
+
+class DownloadMetrics:
+    """ Download progress values, reported instead of terminal progress bar """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.total_bytes = None
+        self.received_bytes = 0
+        self.resumes = 0
+        self.start_time = time.time()
+        self.finish_time = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finish_time or time.time()) - self.start_time
+
+    @property
+    def throughput(self) -> float:
+        # bytes per second
+        elapsed = self.elapsed
+        return self.received_bytes / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        # seconds left, None while total size or throughput is unknown
+        throughput = self.throughput
+        if self.total_bytes is None or throughput <= 0:
+            return None
+        return max(self.total_bytes - self.received_bytes, 0) / throughput
+
+
+class StreamingDownloader:
+    """
+    Streams HTTP objects to disk by large chunks.
+    Interrupted transfers are resumed from the last written byte by Range requests, or by offset
+    query parameter for servers ignoring ranges such as ipfs node API, file is flushed and fsync'ed on complete.
+    """
+
+    logger = logging.getLogger("StreamingDownloader")
+
+    def __init__(self, chunk_size: int = 1024 * 1024, timeout: int = 120, retries: int = 5,
+                 report_interval: float = 5.0, offset_param: str = None):
+        self.chunk_size = int(chunk_size)
+        self.timeout = timeout
+        self.retries = retries
+        self.report_interval = report_interval
+        # query parameter of resume offset, None - Range header
+        self.offset_param = offset_param
+        self.session = requests.Session()
+
+    def download(self, url: str, file_path: str, method: str = 'GET') -> DownloadMetrics:
+        metrics = DownloadMetrics(url)
+        attempt = 0
+        with open(file_path, 'wb') as f:
+            while True:
+                try:
+                    self.__stream(url, f, metrics, method)
+                    break
+                except (requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout,
+                        requests.exceptions.ChunkedEncodingError,
+                        IncompleteDownloadError) as ex:
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise
+                    metrics.resumes += 1
+                    self.logger.info('Download of %s interrupted at %s bytes, resume (%s of %s)',
+                                     url, metrics.received_bytes, attempt, self.retries)
+                    self.logger.info(ex.args)
+            f.flush()
+            os.fsync(f.fileno())
+        metrics.finish_time = time.time()
+        self.logger.info('Downloaded %s bytes in %.2f s (%.2f MB/s, resumes : %s)',
+                         metrics.received_bytes, metrics.elapsed, metrics.throughput / 1048576, metrics.resumes)
+        return metrics
+
+    def __stream(self, url: str, f, metrics: DownloadMetrics, method: str):
+        offset = metrics.received_bytes
+        headers = {}
+        if offset and self.offset_param:
+            url = '%s%s%s=%d' % (url, '&' if '?' in url else '?', self.offset_param, offset)
+        elif offset:
+            headers['Range'] = 'bytes=%d-' % offset
+        with self.session.request(method, url, stream=True, timeout=self.timeout, headers=headers) as response:
+            response.raise_for_status()
+            if offset and not self.offset_param and response.status_code != 206:
+                # server ignores ranges, start from scratch
+                self.logger.info('Range requests are not supported by server, restart download')
+                offset = 0
+                metrics.received_bytes = 0
+                f.seek(0)
+                f.truncate()
+            content_length = response.headers.get('content-length')
+            if content_length is not None:
+                metrics.total_bytes = offset + int(content_length)
+
+            last_report = time.time()
+            for data in response.iter_content(chunk_size=self.chunk_size):
+                f.write(data)
+                metrics.received_bytes += len(data)
+                if time.time() - last_report >= self.report_interval:
+                    last_report = time.time()
+                    self.report(metrics)
+
+        if metrics.total_bytes is not None and metrics.received_bytes < metrics.total_bytes:
+            raise IncompleteDownloadError('Connection closed before all data received',
+                                          metrics.received_bytes, metrics.total_bytes)
+
+    def report(self, metrics: DownloadMetrics):
+        eta = metrics.eta
+        self.logger.info('Download progress : %s of %s bytes, %.2f MB/s, ETA : %s',
+                         metrics.received_bytes,
+                         metrics.total_bytes if metrics.total_bytes is not None else 'unknown',
+                         metrics.throughput / 1048576,
+                         ('%.0f s' % eta) if eta is not None else 'unknown')
@@ -0,0 +1,82 @@
+import time
+import logging
+
+from threading import Thread, RLock
+from typing import Union
+
+from integration.event_source import EventSourceAbstract, Subscription
+
+
+class LogPoller(EventSourceAbstract):
+    """
+    Polling event source over HTTP provider.
+    Block number is polled once per interval, logs of new blocks are read by eth_getLogs,
+    so there are no node side filters to expire.
+    """
+
+    logger = logging.getLogger("LogPoller")
+
+    def __init__(self, web3, poll_interval: float = 2):
+        self.web3 = web3
+        self.poll_interval = poll_interval
+        self.running = False
+        self.thread = None
+        self.__lock = RLock()
+        self.__subscriptions = []
+        self.__last_block = None
+
+    @property
+    def last_block(self) -> Union[int, None]:
+        return self.__last_block
+
+    def subscribe(self, subscription: Subscription):
+        with self.__lock:
+            if subscription not in self.__subscriptions:
+                self.__subscriptions.append(subscription)
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.__lock:
+            if subscription in self.__subscriptions:
+                self.__subscriptions.remove(subscription)
+
+    def start(self, from_block: int = None) -> bool:
+        # without start block only blocks after the current one are delivered
+        self.__last_block = from_block - 1 if from_block is not None else self.web3.eth.blockNumber
+        self.running = True
+        self.thread = Thread(target=self.__poll_loop, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+
+    def poll(self):
+        """ Deliver logs and heads of blocks after the last delivered one """
+        block_number = self.web3.eth.blockNumber
+        if block_number <= self.__last_block:
+            return
+        with self.__lock:
+            subscriptions = list(self.__subscriptions)
+        for subscription in subscriptions:
+            if subscription.kind != 'logs':
+                continue
+            logs = self.web3.eth.getLogs({'fromBlock': self.__last_block + 1,
+                                          'toBlock': block_number,
+                                          'address': subscription.address,
+                                          'topics': subscription.topics})
+            for log in logs:
+                subscription.notify(log)
+        for subscription in subscriptions:
+            if subscription.kind == 'newHeads':
+                subscription.notify(block_number)
+        self.__last_block = block_number
+
+    def __poll_loop(self):
+        while self.running:
+            try:
+                self.poll()
+            except Exception as ex:
+                # the same blocks range is repeated on next poll
+                self.logger.info('Exception on logs polling.')
+                self.logger.info(ex.args)
+            time.sleep(self.poll_interval)
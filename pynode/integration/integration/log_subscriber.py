@@ -0,0 +1,182 @@
+import json
+import asyncio
+import logging
+
+from threading import Thread, Event, RLock
+from typing import Union
+
+import websockets
+from web3.middleware.pythonic import log_entry_formatter
+
+from integration.event_source import EventSourceAbstract, Subscription
+
+
+class IpcStream:
+    """ JSON-RPC messages stream over node IPC socket """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.buffer = ''
+        self.decoder = json.JSONDecoder()
+
+    async def send(self, message: str):
+        self.writer.write(message.encode('utf-8'))
+        await self.writer.drain()
+
+    async def recv(self) -> str:
+        while True:
+            buffer = self.buffer.lstrip()
+            if buffer:
+                try:
+                    _, end = self.decoder.raw_decode(buffer)
+                    self.buffer = buffer[end:]
+                    return buffer[:end]
+                except ValueError:
+                    pass  # message is not complete yet
+            chunk = await self.reader.read(65536)
+            if not chunk:
+                raise ConnectionError('IPC connection closed')
+            self.buffer = buffer + chunk.decode('utf-8')
+
+    async def close(self):
+        self.writer.close()
+
+
+class LogSubscriber(EventSourceAbstract):
+    """
+    Push event source, logs and new heads are delivered by eth_subscribe notifications
+    over WebSocket (ws://, wss://) or IPC (socket path) connection.
+    Subscription error or connection loss is reported by on_failure.
+    """
+
+    logger = logging.getLogger("LogSubscriber")
+
+    def __init__(self, uri: str, connect_timeout: float = 10):
+        self.uri = uri
+        self.connect_timeout = connect_timeout
+        self.thread = None
+        self.loop = None
+        self.stream = None
+        self.connected = Event()
+        self.failed = Event()
+        self.__lock = RLock()
+        self.__request_id = 0
+        # new heads are always subscribed to know the last pushed block
+        self.__subscriptions = [Subscription('newHeads', lambda block_number: None)]
+        self.__requests = {}  # request id -> subscription
+        self.__remote = {}  # node subscription id -> subscription
+        self.__last_block = None
+        self.__subscribed = False  # initial subscriptions are sent
+
+    @property
+    def last_block(self) -> Union[int, None]:
+        return self.__last_block
+
+    def subscribe(self, subscription: Subscription):
+        with self.__lock:
+            if subscription in self.__subscriptions:
+                return
+            self.__subscriptions.append(subscription)
+            if self.__subscribed:
+                self.__call_soon(self.__subscribe(subscription))
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.__lock:
+            if subscription not in self.__subscriptions:
+                return
+            self.__subscriptions.remove(subscription)
+            if subscription.remote_id is not None and self.__subscribed:
+                self.__remote.pop(subscription.remote_id, None)
+                self.__call_soon(self.__send('eth_unsubscribe', [subscription.remote_id]))
+
+    def start(self, from_block: int = None) -> bool:
+        """ Connect and subscribe, returns False if node subscriptions are not available """
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.loop.run_until_complete, args=(self.__serve(),), daemon=True)
+        self.thread.start()
+        self.connected.wait(self.connect_timeout)
+        return self.connected.is_set() and not self.failed.is_set()
+
+    def stop(self):
+        if self.failed.is_set():
+            return
+        self.failed.set()  # no failure is reported after stop
+        if self.stream is not None:
+            self.__call_soon(self.stream.close())
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    async def __serve(self):
+        try:
+            if self.uri.startswith(('ws://', 'wss://')):
+                self.stream = await websockets.connect(self.uri, max_size=None)
+            else:
+                self.stream = IpcStream(*await asyncio.open_unix_connection(self.uri))
+            with self.__lock:
+                for subscription in self.__subscriptions:
+                    await self.__subscribe(subscription)
+                self.__subscribed = True
+            while not self.failed.is_set():
+                # the first answers confirm subscriptions
+                if not self.connected.is_set() and not self.__requests:
+                    self.connected.set()
+                self.__on_message(json.loads(await self.stream.recv()))
+        except Exception as ex:
+            if not self.failed.is_set():
+                self.logger.info('Node subscriptions failed : %s', type(ex))
+                self.logger.info(ex.args)
+                self.__fail()
+        finally:
+            if self.stream is not None:
+                await self.stream.close()
+
+    async def __subscribe(self, subscription: Subscription):
+        if subscription.kind == 'logs':
+            params = ['logs', {'address': subscription.address, 'topics': subscription.topics}]
+        else:
+            params = ['newHeads']
+        request_id = await self.__send('eth_subscribe', params)
+        self.__requests[request_id] = subscription
+
+    async def __send(self, method: str, params: list) -> int:
+        with self.__lock:
+            self.__request_id += 1
+            request_id = self.__request_id
+        await self.stream.send(json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}))
+        return request_id
+
+    def __on_message(self, message: dict):
+        if message.get('method') == 'eth_subscription':
+            params = message['params']
+            subscription = self.__remote.get(params['subscription'])
+            if subscription is not None:
+                self.__notify(subscription, params['result'])
+            return
+        subscription = self.__requests.pop(message.get('id'), None)
+        if subscription is None:
+            return
+        if 'error' in message:
+            # node does not support subscriptions on this transport
+            raise ValueError(message['error'])
+        subscription.remote_id = message['result']
+        self.__remote[subscription.remote_id] = subscription
+
+    def __notify(self, subscription: Subscription, result: dict):
+        if subscription.kind == 'newHeads':
+            self.__last_block = int(result['number'], 16)
+            subscription.notify(self.__last_block)
+        elif result.get('removed'):
+            self.logger.info('Log removed by chain reorganization : %s', result.get('transactionHash'))
+        else:
+            subscription.notify(log_entry_formatter(result))
+
+    def __call_soon(self, coroutine):
+        asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def __fail(self):
+        self.failed.set()
+        self.connected.set()
+        if self.on_failure is not None:
+            self.on_failure()
@@ -0,0 +1,148 @@
+import os
+import shutil
+import logging
+import threading
+
+from collections import OrderedDict
+
+
+class IpfsBlobCache:
+    """
+    Persistent content-addressed store for IPFS blobs.
+    Blobs are kept under cache_dir by their IPFS hash, evicted in LRU order when the
+    byte budget is exceeded and published atomically (temp file + rename).
+    """
+
+    temp_suffix = '.part'
+
+    logger = logging.getLogger("IpfsBlobCache")
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = int(max_bytes)
+        # statistics exposed to web socket status
+        self.hits = 0
+        self.misses = 0
+        self.evicted_bytes = 0
+
+        self.__lock = threading.RLock()
+        self.__entries = OrderedDict()  # address -> size, least recently used first
+        self.__total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.__scan()
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    @property
+    def total_bytes(self) -> int:
+        return self.__total_bytes
+
+    def blob_path(self, address: str) -> str:
+        return os.path.join(self.cache_dir, address)
+
+    def temp_path(self, address: str) -> str:
+        return os.path.join(self.cache_dir, address + '.' + str(threading.get_ident()) + self.temp_suffix)
+
+    def lookup(self, address: str):
+        """ Return cached blob path (and mark it as recently used) or None on miss """
+        with self.__lock:
+            path = self.blob_path(address)
+            if address in self.__entries and os.path.isfile(path):
+                self.__entries.move_to_end(address)
+                self.hits += 1
+                try:
+                    # persist recency for next process launch
+                    os.utime(path, None)
+                except OSError:
+                    pass
+                return path
+            if address in self.__entries:  # blob removed from outside
+                self.__total_bytes -= self.__entries.pop(address)
+            self.misses += 1
+            return None
+
+    def publish(self, address: str, temp_file: str) -> str:
+        """ Atomically move downloaded temp file into cache and evict old blobs over budget """
+        path = self.blob_path(address)
+        size = os.path.getsize(temp_file)
+        os.replace(temp_file, path)
+        with self.__lock:
+            if address in self.__entries:
+                self.__total_bytes -= self.__entries.pop(address)
+            self.__entries[address] = size
+            self.__total_bytes += size
+            self.__evict(keep=address)
+        return path
+
+    def discard(self, temp_file: str):
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+
+    def link(self, address: str, target_dir: str) -> str:
+        """
+        Place cached blob into working directory under its address, None when blob is evicted already.
+        Hard link is used when possible so eviction does not affect running job
+        """
+        source = self.blob_path(address)
+        target = os.path.join(os.path.abspath(target_dir), address)
+        # blob is linked under lock, concurrent publish does not evict it in between
+        with self.__lock:
+            if not os.path.isfile(source):
+                if address in self.__entries:
+                    self.__total_bytes -= self.__entries.pop(address)
+                return None
+            if os.path.abspath(source) == target:
+                return target
+            if os.path.lexists(target):
+                os.remove(target)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+        return target
+
+    def stats(self) -> dict:
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evicted_bytes': self.evicted_bytes,
+                'total_bytes': self.__total_bytes}
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __scan(self):
+        # restore LRU order from files access time left by previous launches
+        blobs = []
+        for filename in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, filename)
+            if not os.path.isfile(path):
+                continue
+            if filename.endswith(self.temp_suffix):  # interrupted download
+                self.discard(path)
+                continue
+            stat = os.stat(path)
+            blobs.append((max(stat.st_atime, stat.st_mtime), filename, stat.st_size))
+        for _, filename, size in sorted(blobs):
+            self.__entries[filename] = size
+            self.__total_bytes += size
+        self.__evict()
+
+    def __evict(self, keep: str = None):
+        while self.__total_bytes > self.max_bytes and self.__entries:
+            address, size = next(iter(self.__entries.items()))
+            if address == keep:
+                if len(self.__entries) == 1:
+                    break  # single blob larger than budget stays until next publish
+                self.__entries.move_to_end(address)
+                continue
+            self.__entries.pop(address)
+            self.__total_bytes -= size
+            self.evicted_bytes += size
+            try:
+                os.remove(self.blob_path(address))
+            except OSError:
+                pass
+            self.logger.info('Evicted blob %s (%s bytes) from cache', address, size)
@@ -1,4 +1,5 @@
 from abc import ABCMeta, abstractmethod
+from typing import Callable
 
 
 class IpfsAbstract(metaclass=ABCMeta):
@@ -8,13 +9,17 @@ class IpfsAbstract(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def download_file(self, file_address: str):
+    def download_file(self, file_address: str, directory: str = None):
         pass
 
     @abstractmethod
     def upload_file(self, file_name: str):
         pass
 
+    def prefetch(self, file_address: str, on_landed: Callable[[str], None] = None):
+        # connectors without scheduling download files on demand by download_file
+        pass
+
 
 class IpfsService(IpfsAbstract):
 
@@ -24,10 +29,13 @@ class IpfsService(IpfsAbstract):
     def connect(self, server='localhost', port=5001, data_dir='../tmp'):
         self.strategy.connect(server=server, port=port, data_dir=data_dir)
 
-    def download_file(self, file_address: str):
-        return self.strategy.download_file(file_address=file_address)
+    def download_file(self, file_address: str, directory: str = None):
+        return self.strategy.download_file(file_address=file_address, directory=directory)
 
     def upload_file(self, file_name: str):
         return self.strategy.upload_file(file_name=file_name)
 
+    def prefetch(self, file_address: str, on_landed: Callable[[str], None] = None):
+        return self.strategy.prefetch(file_address=file_address, on_landed=on_landed)
+
 
@@ -0,0 +1,93 @@
+import os
+import json
+import logging
+
+from threading import RLock
+from typing import Union
+
+
+class LogCursor:
+    """
+    Position of the last processed log (block number, log index), checkpointed to JSON file
+    by key (worker node address), so logs dispatching is resumed after process restart.
+    Cursor of logs dispatched for several hosted worker nodes is checkpointed under every node key
+    and resumed from the oldest one. Log index None means the whole block is processed.
+    """
+
+    logger = logging.getLogger("LogCursor")
+
+    def __init__(self, path: str = None, key: str = 'default', keys: list = None):
+        self.path = path
+        self.keys = [item.lower() for item in (keys or [key])]
+        self.block_number = None
+        self.log_index = None
+        self.__lock = RLock()
+        self.__seen = {}  # (block hash, log index) -> block number of logs above checkpoint block
+        self.__checkpoints = {}  # checkpoints of all keys kept in file
+
+    def load(self) -> Union[int, None]:
+        """ Read checkpoint, returns the last fully processed block """
+        with self.__lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as cursor_file:
+                    self.__checkpoints = json.load(cursor_file)
+            except (OSError, TypeError, ValueError):
+                self.__checkpoints = {}
+            checkpoints = [self.__checkpoints.get(key) for key in self.keys]
+            if not all(checkpoints):
+                return None
+            # partially processed block is processed again from its start
+            self.block_number = min(checkpoint['block_number'] if checkpoint['log_index'] is None
+                                    else checkpoint['block_number'] - 1 for checkpoint in checkpoints)
+            self.log_index = None
+            self.logger.info('Logs cursor loaded at block %s', self.block_number)
+            return self.block_number
+
+    @property
+    def next_block(self) -> int:
+        """ The first block with not processed logs """
+        return self.block_number if self.log_index is not None else self.block_number + 1
+
+    def reset(self, block_number: int):
+        with self.__lock:
+            self.block_number = block_number
+            self.log_index = None
+            self.__seen = {}
+            self.save()
+
+    def is_processed(self, log) -> bool:
+        with self.__lock:
+            if (log['blockHash'], log['logIndex']) in self.__seen:
+                return True
+            if self.block_number is None or log['blockNumber'] > self.block_number:
+                return False
+            return log['blockNumber'] < self.block_number or self.log_index is None \
+                or log['logIndex'] <= self.log_index
+
+    def processed_log(self, log):
+        with self.__lock:
+            self.__seen[(log['blockHash'], log['logIndex'])] = log['blockNumber']
+            self.block_number = log['blockNumber']
+            self.log_index = log['logIndex']
+            self.save()
+
+    def processed_block(self, block_number: int):
+        with self.__lock:
+            self.block_number = block_number
+            self.log_index = None
+            self.__seen = {key: number for key, number in self.__seen.items() if number > block_number}
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        for key in self.keys:
+            self.__checkpoints[key] = {'block_number': self.block_number, 'log_index': self.log_index}
+        try:
+            # checkpoint is replaced atomically
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as cursor_file:
+                json.dump(self.__checkpoints, cursor_file)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as ex:
+            self.logger.info('Unable to save logs cursor.')
+            self.logger.info(ex.args)
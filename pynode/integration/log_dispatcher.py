@@ -0,0 +1,158 @@
+import logging
+
+from threading import Thread, Event, RLock
+from typing import Callable
+
+from eth_abi import encode_single
+from eth_utils import encode_hex, event_abi_to_log_topic
+from web3.utils.events import get_event_data
+
+from integration.event_source import EventSource
+from integration.log_cursor import LogCursor
+
+
+class Watch:
+    """ Registered handler of contract event, optionally filtered by event arguments """
+
+    def __init__(self, address: str, event_abi: dict, callback: Callable, argument_filters: dict = None):
+        self.address = address.lower()
+        self.event_abi = event_abi
+        self.callback = callback
+        self.topic = encode_hex(event_abi_to_log_topic(event_abi))
+        self.argument_filters = argument_filters or {}
+        # indexed arguments are matched by log topics before decoding
+        self.topic_filters = {}
+        indexed = [argument for argument in event_abi['inputs'] if argument['indexed']]
+        for position, argument in enumerate(indexed, 1):
+            if argument['name'] in self.argument_filters:
+                value = self.argument_filters[argument['name']]
+                self.topic_filters[position] = encode_hex(encode_single(argument['type'], value))
+        # not indexed arguments are matched after decoding
+        self.data_filters = {name: value for name, value in self.argument_filters.items()
+                             if name not in [argument['name'] for argument in indexed]}
+
+    def match_topics(self, log) -> bool:
+        if log['address'].lower() != self.address or encode_hex(log['topics'][0]) != self.topic:
+            return False
+        return all(len(log['topics']) > position and encode_hex(log['topics'][position]) == topic
+                   for position, topic in self.topic_filters.items())
+
+    def match_args(self, event) -> bool:
+        return all(event['args'][name] == value for name, value in self.data_filters.items())
+
+
+class LogDispatcher:
+    """
+    Reads logs of all watched contract events by single eth_getLogs per new block and routes
+    decoded events to watches. Only blocks with confirmations depth are dispatched, so reorganized
+    logs are never routed. Cursor is advanced by every routed log and checkpointed, failed ranges are
+    repeated on next block without routing processed logs again.
+    """
+
+    logger = logging.getLogger("LogDispatcher")
+
+    def __init__(self, web3, event_source: EventSource, cursor: LogCursor = None, confirmations: int = 0,
+                 max_range: int = 5000, replay_blocks: int = 100):
+        self.web3 = web3
+        self.event_source = event_source
+        self.cursor = cursor or LogCursor()
+        self.confirmations = confirmations
+        self.max_range = max_range  # max blocks per logs request on catching up
+        # max blocks of logs replayed after loaded checkpoint, state of older blocks may be pruned by node
+        self.replay_blocks = replay_blocks
+        self.running = False
+        self.thread = None
+        self.new_block = Event()
+        self.__lock = RLock()
+        self.__watches = []
+        self.__head = None
+
+    def watch(self, address: str, event_abi: dict, callback: Callable, argument_filters: dict = None) -> Watch:
+        """ Callback receives decoded events of address matching argument filters """
+        watch = Watch(address, event_abi, callback, argument_filters)
+        with self.__lock:
+            self.__watches.append(watch)
+        return watch
+
+    def unwatch(self, watch: Watch):
+        with self.__lock:
+            if watch in self.__watches:
+                self.__watches.remove(watch)
+
+    def resume_block(self) -> int:
+        """
+        Load checkpoint and return the block logs are dispatched after. Contract state is read at returned
+        block, so logs after checkpoint are replayed on top of the state they were emitted from, processed
+        logs are not routed again. Checkpoint older than replay blocks is moved to the latest confirmed block,
+        events of skipped blocks are reflected in contract state read there.
+        """
+        checkpoint = self.cursor.load()
+        confirmed_block = self.web3.eth.blockNumber - self.confirmations
+        if checkpoint is None or checkpoint < confirmed_block - self.replay_blocks:
+            self.cursor.reset(confirmed_block)
+        elif checkpoint < confirmed_block:
+            self.logger.info('Logs of %s blocks after checkpoint are replayed', confirmed_block - checkpoint)
+        return self.cursor.block_number
+
+    def start(self, from_block: int = None):
+        # without start block logs are resumed from loaded checkpoint or the current block
+        if from_block is not None:
+            self.cursor.reset(from_block - 1)
+        elif self.cursor.block_number is None:
+            self.cursor.reset(self.web3.eth.blockNumber - self.confirmations)
+        self.event_source.subscribe_new_heads(self.__on_new_head)
+        self.running = True
+        self.thread = Thread(target=self.__dispatch_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.new_block.set()
+
+    def dispatch(self, block_number: int):
+        """ Dispatch logs of confirmed blocks after cursor, block number is the chain head """
+        confirmed_block = block_number - self.confirmations
+        while self.cursor.next_block <= confirmed_block:
+            from_block = self.cursor.next_block
+            to_block = min(confirmed_block, from_block + self.max_range - 1)
+            with self.__lock:
+                watches = list(self.__watches)
+            if watches:
+                logs = self.web3.eth.getLogs({'fromBlock': from_block,
+                                              'toBlock': to_block,
+                                              'address': sorted({watch.address for watch in watches}),
+                                              'topics': [sorted({watch.topic for watch in watches})]})
+                for log in logs:
+                    if self.cursor.is_processed(log):
+                        continue
+                    self.__route(log, watches)
+                    self.cursor.processed_log(log)
+            self.cursor.processed_block(to_block)
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __on_new_head(self, block_number: int):
+        # called by event source thread, logs are read by dispatcher thread
+        self.__head = block_number
+        self.new_block.set()
+
+    def __dispatch_loop(self):
+        while self.running:
+            self.new_block.wait()
+            self.new_block.clear()
+            if not self.running or self.__head is None:
+                continue
+            try:
+                self.dispatch(self.__head)
+            except Exception as ex:
+                self.logger.info('Exception on logs dispatching.')
+                self.logger.info(ex.args)
+
+    def __route(self, log, watches: list):
+        for watch in watches:
+            if not watch.match_topics(log):
+                continue
+            event = get_event_data(watch.event_abi, log)
+            if watch.match_args(event):
+                watch.callback(event)
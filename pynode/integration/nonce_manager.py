@@ -0,0 +1,78 @@
+import logging
+
+from threading import RLock
+
+
+class NonceManager:
+    """
+    Allocates transaction nonces of one account locally, so several signed transactions may be in flight.
+    Nonce is resynchronized with node pending transactions count on first use, after gaps
+    (transaction not reached node) and on 'nonce too low' errors.
+    """
+
+    logger = logging.getLogger("NonceManager")
+
+    # node errors meaning local nonce is behind the account
+    resync_errors = ('nonce too low', 'known transaction', 'already known', 'replacement transaction underpriced')
+
+    def __init__(self, web3, account: str):
+        self.web3 = web3
+        self.account = account
+        self.__lock = RLock()
+        self.__next_nonce = None
+
+    def allocate(self) -> int:
+        with self.__lock:
+            if self.__next_nonce is None:
+                self.resync()
+            nonce = self.__next_nonce
+            self.__next_nonce += 1
+            return nonce
+
+    def peek(self) -> int:
+        """ Nonce of the next allocation """
+        with self.__lock:
+            if self.__next_nonce is None:
+                self.resync()
+            return self.__next_nonce
+
+    def allocate_if(self, nonce: int) -> bool:
+        """ Allocate nonce only if it is the next one, e.g. for transaction signed in advance """
+        with self.__lock:
+            if self.__next_nonce != nonce:
+                return False
+            self.__next_nonce += 1
+            return True
+
+    def release(self, nonce: int, error: Exception = None):
+        """ Return nonce of transaction not accepted by node """
+        with self.__lock:
+            if self.__next_nonce is None:
+                return
+            if error is not None and self.is_resync_error(error):
+                self.logger.info('Nonce %s rejected by node, resync : %s', nonce, str(error))
+                self.__next_nonce = None
+            elif nonce == self.__next_nonce - 1:
+                # the last allocated nonce, no gap is left
+                self.__next_nonce = nonce
+            else:
+                # later nonces are already in flight, gap is filled after resync
+                self.__next_nonce = None
+
+    def reset(self):
+        """ Drop local state, next allocation is resynchronized with node """
+        with self.__lock:
+            self.__next_nonce = None
+
+    def is_mined(self, nonce: int) -> bool:
+        """ Transaction with nonce is included in the latest block, by any transaction of account """
+        return self.web3.eth.getTransactionCount(self.account, 'latest') > nonce
+
+    def resync(self):
+        with self.__lock:
+            self.__next_nonce = self.web3.eth.getTransactionCount(self.account, 'pending')
+            self.logger.info('Nonce of %s resynchronized to %s', self.account, self.__next_nonce)
+
+    def is_resync_error(self, error: Exception) -> bool:
+        message = str(error.args).lower()
+        return any(reason in message for reason in self.resync_errors)
@@ -0,0 +1,78 @@
+import time
+import logging
+
+from threading import Thread, Event, Lock
+from typing import Callable
+
+
+class ProgressReporter(Thread):
+    """
+    Sends training progress from dedicated thread, so keras callbacks are never blocked by transactions.
+    Progress is handed off through single slot overwritten by every update, only the latest percent
+    is sent, not more often than once per interval and while fee budget of the job is not spent.
+    """
+
+    logger = logging.getLogger("ProgressReporter")
+
+    def __init__(self, send: Callable[[int], int], interval: float = 300, gas_budget: int = 0):
+        super().__init__(daemon=True)
+        self.send = send  # sends progress transaction, returns its max fee in wei
+        self.interval = interval
+        self.gas_budget = gas_budget  # max fee in wei per job, 0 is unlimited
+        self.running = False
+        self.spent = 0
+        self.last_sent = time.time()
+        self.__latest = None
+        self.__sent_percent = None
+        self.__updated = Event()
+        self.__stopped = Event()
+        self.__sending = Lock()
+
+    def report(self, percent: int):
+        """ Called by training callbacks, returns immediately """
+        self.__latest = percent
+        self.__updated.set()
+
+    def reset(self):
+        """ Start reporting of new training, waits for progress transaction being sent """
+        with self.__sending:
+            self.__latest = None
+            self.__sent_percent = None
+            self.spent = 0
+            self.last_sent = time.time()
+
+    def start(self):
+        self.running = True
+        super().start()
+
+    def stop(self):
+        self.running = False
+        self.__stopped.set()
+        self.__updated.set()
+
+    def run(self):
+        while self.running:
+            self.__updated.wait()
+            delay = self.last_sent + self.interval - time.time()
+            if delay > 0 and self.__stopped.wait(delay):
+                break
+            self.__updated.clear()
+            with self.__sending:
+                percent = self.__latest
+                if percent is None or percent == self.__sent_percent:
+                    continue
+                if self.gas_budget and self.spent >= self.gas_budget:
+                    self.logger.info('Progress gas budget is spent, %s%% is not reported', percent)
+                    self.__sent_percent = percent
+                    continue
+                try:
+                    self.spent += self.send(percent)
+                    self.__sent_percent = percent
+                    self.last_sent = time.time()
+                    self.logger.info('Progress %s%% reported', percent)
+                except Exception as ex:
+                    # the latest progress is repeated after interval
+                    self.logger.info('Unable to report progress.')
+                    self.logger.info(ex.args)
+                    self.last_sent = time.time()
+                    self.__updated.set()
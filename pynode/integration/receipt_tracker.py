@@ -0,0 +1,169 @@
+import time
+import logging
+
+from concurrent.futures import Future
+from threading import Thread, RLock
+from typing import Callable
+
+from web3.middleware.pythonic import receipt_formatter
+
+
+class TrackedTransaction:
+    """ Submitted transaction awaiting receipt """
+
+    def __init__(self, tx_hash, transaction: dict, block_number: int):
+        self.tx_hashes = [tx_hash]  # hashes of transaction and its gas bumped replacements
+        self.transaction = transaction
+        self.first_block = block_number
+        self.sent_block = block_number
+        self.bumps = 0
+        self.timeouts = 0
+        self.future = Future()
+
+
+class ReceiptTracker(Thread):
+    """
+    Confirms submitted transactions off the caller thread.
+    Receipts of all pending transactions are checked together once per new block,
+    transactions without receipt for stuck blocks are resent with bumped gas price (the same nonce).
+    Transaction not mined in timeout blocks is resent at the same nonce again, so it never lands twice,
+    and is completed with None receipt after max timeouts or when its nonce is taken by other transaction.
+    """
+
+    logger = logging.getLogger("ReceiptTracker")
+
+    def __init__(self, web3, resend: Callable = None, stuck_blocks: int = 8, timeout_blocks: int = 40,
+                 max_bumps: int = 3, max_timeouts: int = 3, gas_bump: float = 1.125, poll_interval: int = 1):
+        super().__init__(daemon=True)
+        self.web3 = web3
+        self.resend = resend  # signs and sends transaction dict, returns tx hash
+        self.stuck_blocks = stuck_blocks
+        self.timeout_blocks = timeout_blocks
+        self.max_bumps = max_bumps
+        self.max_timeouts = max_timeouts
+        self.gas_bump = gas_bump
+        self.poll_interval = poll_interval
+        self.running = False
+
+        self.__lock = RLock()
+        self.__pending = []
+        self.__block_number = None
+
+    # -------------------------------------
+    # public methods
+    # -------------------------------------
+    def start(self):
+        self.running = True
+        super().start()
+
+    def stop(self):
+        self.running = False
+
+    @property
+    def pending_count(self) -> int:
+        with self.__lock:
+            return len(self.__pending)
+
+    def track(self, tx_hash, transaction: dict = None, callback: Callable = None) -> Future:
+        """
+        Track submitted transaction, returned future is completed with receipt (None on timeout).
+        Callback is called with the same receipt and the last sent transaction on tracker thread.
+        """
+        with self.__lock:
+            if self.__block_number is None:
+                self.__block_number = self.web3.eth.blockNumber
+            tracked = TrackedTransaction(tx_hash, transaction, self.__block_number)
+            self.__pending.append(tracked)
+        if callback is not None:
+            tracked.future.add_done_callback(lambda future: callback(future.result(), tracked.transaction))
+        return tracked.future
+
+    def check(self, block_number: int):
+        """ Check receipts of all pending transactions on block """
+        with self.__lock:
+            self.__block_number = block_number
+            pending = list(self.__pending)
+        if not pending:
+            return
+        receipts = self.__fetch_receipts([tx_hash for tracked in pending for tx_hash in tracked.tx_hashes])
+        for tracked in pending:
+            receipt = next((receipts[tx_hash] for tx_hash in tracked.tx_hashes if receipts.get(tx_hash)), None)
+            if receipt is not None:
+                self.__complete(tracked, receipt)
+            elif block_number - tracked.first_block >= self.timeout_blocks:
+                self.__on_timeout(tracked, block_number)
+            elif block_number - tracked.sent_block >= self.stuck_blocks:
+                self.__bump(tracked, block_number)
+
+    def run(self):
+        while self.running:
+            try:
+                block_number = self.web3.eth.blockNumber
+                if block_number != self.__block_number:
+                    self.check(block_number)
+            except Exception as ex:
+                self.logger.info('Exception on receipts checking.')
+                self.logger.info(ex.args)
+            time.sleep(self.poll_interval)
+
+    # -------------------------------------
+    # internal methods
+    # -------------------------------------
+    def __fetch_receipts(self, tx_hashes: list) -> dict:
+        provider = self.web3.providers[0]
+        if hasattr(provider, 'make_batch_request'):
+            # one JSON-RPC batch for all pending receipts
+            results = provider.make_batch_request([('eth_getTransactionReceipt', [tx_hash.hex()])
+                                                   for tx_hash in tx_hashes])
+            return {tx_hash: receipt_formatter(result) if result else None
+                    for tx_hash, result in zip(tx_hashes, results)}
+        return {tx_hash: self.web3.eth.getTransactionReceipt(tx_hash) for tx_hash in tx_hashes}
+
+    def __complete(self, tracked: TrackedTransaction, receipt):
+        with self.__lock:
+            self.__pending.remove(tracked)
+        if receipt is not None:
+            self.logger.info('TX_RECEIPT : ' + str(receipt))
+        tracked.future.set_result(receipt)
+
+    def __on_timeout(self, tracked: TrackedTransaction, block_number: int):
+        self.logger.error('Transaction %s is not mined in %s blocks', tracked.tx_hashes[0].hex(),
+                          block_number - tracked.first_block)
+        # pending transaction is replaced at its nonce, new nonce would let both of them land
+        if tracked.transaction is not None and self.resend is not None and tracked.timeouts < self.max_timeouts:
+            try:
+                mined = self.web3.eth.getTransactionCount(tracked.transaction['from'], 'latest') \
+                    > tracked.transaction['nonce']
+            except Exception as ex:
+                self.logger.info('Unable to read transactions count.')
+                self.logger.info(ex.args)
+                return
+            if not mined:
+                tracked.timeouts += 1
+                tracked.first_block = block_number
+                self.__resend(tracked, block_number)
+                return
+        self.__complete(tracked, None)
+
+    def __bump(self, tracked: TrackedTransaction, block_number: int):
+        tracked.sent_block = block_number
+        if tracked.transaction is None or self.resend is None or tracked.bumps >= self.max_bumps:
+            return
+        self.__resend(tracked, block_number)
+
+    def __resend(self, tracked: TrackedTransaction, block_number: int):
+        tracked.sent_block = block_number
+        transaction = dict(tracked.transaction)
+        transaction['gasPrice'] = int(transaction['gasPrice'] * self.gas_bump)
+        try:
+            tx_hash = self.resend(transaction)
+        except Exception as ex:
+            # previous transaction may be mined meanwhile, it is checked on next block
+            self.logger.info('Unable to resend transaction %s', tracked.tx_hashes[0].hex())
+            self.logger.info(ex.args)
+            return
+        tracked.transaction = transaction
+        tracked.tx_hashes.append(tx_hash)
+        tracked.bumps += 1
+        self.logger.info('Transaction %s resent with gas price %s : %s', tracked.tx_hashes[0].hex(),
+                         transaction['gasPrice'], tx_hash.hex())
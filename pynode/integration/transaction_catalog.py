@@ -0,0 +1,71 @@
+import logging
+
+from eth_abi import encode_abi
+from eth_utils import encode_hex, function_abi_to_4byte_selector
+
+
+def encode_uint8(value: int) -> bytes:
+    if not 0 <= value < 256:
+        raise ValueError('Value %s is out of uint8 range' % value)
+    return value.to_bytes(32, 'big')
+
+
+def encode_bytes(value: bytes) -> bytes:
+    # single dynamic argument: offset, length and right padded data
+    return (32).to_bytes(32, 'big') + len(value).to_bytes(32, 'big') + value + b'\0' * (-len(value) % 32)
+
+
+class CatalogCall:
+    """ Encoded contract function call, supports gas estimation as web3 contract function """
+
+    def __init__(self, web3, to: str, data: str, chain_id):
+        self.web3 = web3
+        self.to = to
+        self.data = data
+        self.chain_id = chain_id
+
+    def estimateGas(self, transaction: dict) -> int:
+        return self.web3.eth.estimateGas(dict(transaction, to=self.to, data=self.data))
+
+    def transaction(self, fields: dict) -> dict:
+        """ Transaction ready for signing, fields are from, nonce, gas and gasPrice """
+        return dict(fields, to=self.to, data=self.data, value=0, chainId=self.chain_id)
+
+
+class TransactionCatalog:
+    """
+    Transactions of contract functions by name. Function selectors are resolved from ABI once on register,
+    calldata of functions without arguments is encoded once, arguments of common single argument
+    functions are encoded directly, others by eth_abi.
+    """
+
+    logger = logging.getLogger("TransactionCatalog")
+
+    # argument types encoded without eth_abi
+    fast_encoders = {('uint8',): encode_uint8,
+                     ('bytes',): encode_bytes}
+
+    def __init__(self):
+        self.__entries = {}  # name -> (contract, selector, argument types, calldata without arguments, chain id)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__entries
+
+    def register(self, contract, name: str):
+        function_abi = next((item for item in contract.abi
+                             if item.get('type') == 'function' and item.get('name') == name), None)
+        if function_abi is None:
+            raise ValueError('Function %s is not found in contract ABI' % name)
+        selector = function_abi_to_4byte_selector(function_abi)
+        types = tuple(argument['type'] for argument in function_abi['inputs'])
+        calldata = encode_hex(selector) if not types else None
+        # chain id is read once, as buildTransaction default
+        self.__entries[name] = (contract, selector, types, calldata, contract.web3.net.chainId)
+
+    def call(self, name: str, *args) -> CatalogCall:
+        contract, selector, types, calldata, chain_id = self.__entries[name]
+        if calldata is None:
+            encoder = self.fast_encoders.get(types)
+            arguments = encoder(*args) if encoder is not None else encode_abi(list(types), list(args))
+            calldata = encode_hex(selector + arguments)
+        return CatalogCall(contract.web3, contract.address, calldata, chain_id)
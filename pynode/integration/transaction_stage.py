@@ -0,0 +1,49 @@
+import logging
+
+from threading import RLock
+from typing import Union
+
+from integration.nonce_manager import NonceManager
+
+
+class TransactionStage:
+    """
+    Transactions signed in advance for the next account nonce, broadcast without building and signing
+    when expected event comes. Staged transaction is valid while its nonce is still the next one
+    (no other transaction was sent) and its gas price is not below current one.
+    """
+
+    logger = logging.getLogger("TransactionStage")
+
+    def __init__(self, nonce_manager: NonceManager, max_overprice: float = 1.25):
+        self.nonce_manager = nonce_manager
+        self.max_overprice = max_overprice
+        self.__lock = RLock()
+        self.__staged = {}  # transaction name -> (transaction, signed transaction)
+
+    def stage(self, name: str, transaction: dict, signed_transaction):
+        with self.__lock:
+            self.__staged[name] = (transaction, signed_transaction)
+        self.logger.info('Transaction %s is signed in advance with nonce %s', name, transaction['nonce'])
+
+    def take(self, name: str, gas_price: int) -> Union[tuple, None]:
+        """ Staged (transaction, signed transaction) if it is still valid, its nonce is allocated """
+        with self.__lock:
+            staged = self.__staged.pop(name, None)
+        if staged is None:
+            return None
+        transaction, signed_transaction = staged
+        if not gas_price <= transaction['gasPrice'] <= gas_price * self.max_overprice:
+            self.logger.info('Transaction %s signed in advance is discarded by gas price', name)
+            return None
+        if not self.nonce_manager.allocate_if(transaction['nonce']):
+            self.logger.info('Transaction %s signed in advance is discarded by nonce', name)
+            return None
+        return staged
+
+    def discard(self, keep: str = None):
+        """ Discard staged transactions of not taken chain path """
+        with self.__lock:
+            for name in [name for name in self.__staged if name != keep]:
+                self.logger.info('Transaction %s signed in advance is discarded', name)
+                del self.__staged[name]
@@ -1,3 +1,6 @@
+import time
+launch_time = time.time()  # startup time breakdown starts before heavy imports
+
 import os
 import sys
 import argparse
@@ -8,10 +11,14 @@ from configparser import ConfigParser
 
 from core.manager import Manager
 from core.broker import Broker
+from core.broker_services import BrokerServices
+from core.processor.compute_worker import start_worker_server
 from core.patterns.exceptions import ContractsAbiNotFound
 
 from service.webapi.web_socket_listener import WebSocket
 
+imported_time = time.time()
+
 
 # -------------------------------------
 # main pynode launcher
@@ -19,6 +26,9 @@ from service.webapi.web_socket_listener import WebSocket
 def run_pynode():
     try:
         manager = Manager.get_instance()
+        if len(manager.eth_worker_nodes) > 1:
+            run_hosted_worker_nodes()
+            return
         # startup broker main process
         broker = Broker(eth_server=manager.eth_host,
                         abi_path=manager.eth_abi_path,
@@ -27,6 +37,7 @@ def run_pynode():
                         data_dir=manager.ipfs_storage,
                         ipfs_server=manager.ipfs_host,
                         ipfs_port=manager.ipfs_port)
+        manager.mark_startup_stage('broker')
     except Exception as ex:
         logging.error("Error broker initialization: %s, exiting", type(ex))
         logging.error(ex.args)
@@ -40,6 +51,39 @@ def run_pynode():
         broker.join()
 
 
+def run_hosted_worker_nodes():
+    """
+    Several worker node contracts are hosted by one process: every worker node has its own broker,
+    account vault and nonces, while connections, caches and compute workers are shared
+    """
+    manager = Manager.get_instance()
+    services = BrokerServices(nodes=[node for node, _ in manager.eth_worker_nodes])
+    brokers = []
+    for node, account in manager.eth_worker_nodes:
+        brokers.append(Broker(eth_server=manager.eth_host,
+                              abi_path=manager.eth_abi_path,
+                              pandora=manager.eth_pandora,
+                              node=node,
+                              data_dir=manager.ipfs_storage,
+                              ipfs_server=manager.ipfs_host,
+                              ipfs_port=manager.ipfs_port,
+                              account=account,
+                              services=services,
+                              vault_name='worker_node_key_%s.pri' % account.lower()))
+    manager.mark_startup_stage('broker')
+    # all worker nodes states are read at the same block before logs dispatching is started
+    for broker in brokers:
+        if broker.connect(start_events=False) is not True:
+            logging.error("Worker node %s connection failure, exiting", broker.node)
+            return
+    services.start_events()
+    manager.mark_startup_stage('first state')
+    brokers[0].log_startup_breakdown()
+    if manager.launch_mode == "0":  # join threads only in production mode
+        for broker in brokers:
+            broker.worker_node_state_machine.get_worker_node_event_thread().join()
+
+
 # -------------------------------------
 # primary pynode enter point
 # -------------------------------------
@@ -153,26 +197,59 @@ def main(argv):
             eth_contracts = config['Contracts']
             ipfs_section = config['IPFS']
             web_section = config['Web']
+            processor_section = config['Processor'] if config.has_section('Processor') else {}
             eth_host = eth_section[results.ethereum_use]
+            eth_pool_size = eth_section.get('connection_pool', '10')
+            eth_sync_check_ttl = eth_section.get('sync_check_ttl', '60')
+            eth_gas_refresh_interval = eth_section.get('gas_refresh_interval', '60')
+            eth_gas_max_age = eth_section.get('gas_max_age', '300')
+            eth_gas_limit = eth_section.get('gas_limit', '1000000')
+            eth_receipt_stuck_blocks = eth_section.get('receipt_stuck_blocks', '8')
+            eth_receipt_timeout_blocks = eth_section.get('receipt_timeout_blocks', '40')
+            eth_progress_interval = eth_section.get('progress_interval', '300')
+            eth_progress_gas_budget_gwei = eth_section.get('progress_gas_budget_gwei', '0')
+            eth_subscription_host = eth_section.get('subscriptions', '')
+            eth_poll_interval = eth_section.get('poll_interval', '2')
+            eth_confirmations = eth_section.get('confirmations', '1')
+            eth_log_cursor_file = eth_section.get('log_cursor', 'log_cursor.json')
+            eth_log_replay_blocks = eth_section.get('log_replay_blocks', '100')
             eth_worker_node_account = account_section['worker_node_account']
+            vault_idle_timeout = account_section.get('vault_idle_timeout', '0')
             pandora_address = eth_contracts['pandora']
             worker_address = eth_contracts['worker_node']
             eth_hooks = eth_contracts['hooks']
             pynode_start_on_launch = eth_contracts['start_on_launch']
             ipfs_storage = ipfs_section['store_in']
+            ipfs_cache_size_mb = ipfs_section.get('cache_size_mb', '0')
+            ipfs_fetch_workers = ipfs_section.get('fetch_workers', '4')
+            ipfs_chunk_size_kb = ipfs_section.get('chunk_size_kb', '1024')
             ipfs_use_section = config['IPFS.%s' % results.ipfs_use]
             ipfs_host = ipfs_use_section['server']
             ipfs_port = ipfs_use_section['port']
+            ipfs_gateway = ipfs_use_section.get('gateway', 'https://gateway.ipfs.io/ipfs/')
             socket_enable = web_section['enable']
             socket_host = web_section['host']
             socket_port = web_section['port']
             socket_listen = web_section['connections']
+            dataset_load_mode = processor_section.get('dataset_load_mode', 'mmap')
+            batch_prefetch = processor_section.get('batch_prefetch', '4')
+            model_pool_size_mb = processor_section.get('model_pool_size_mb', '1024')
+            model_pool_recycle = processor_section.get('model_pool_recycle', '8')
+            compute_retries = processor_section.get('compute_retries', '3')
+            processor_warm_up = processor_section.get('warm_up', 'True')
+            prediction_processes = processor_section.get('prediction_processes', '1')
+            inference_tuning = processor_section.get('inference_tuning', 'True')
+            inference_tuning_file = processor_section.get('inference_tuning_file', 'inference_tuning.json')
+            predict_batch_size = processor_section.get('predict_batch_size', '0')
+            intra_op_threads = processor_section.get('intra_op_threads', '0')
+            inter_op_threads = processor_section.get('inter_op_threads', '0')
         except Exception as ex:
             print("Error reading config: %s, exiting", type(ex))
             logging.error(ex.args)
             return
     print("Config reading success")
     manager = Manager.get_instance()
+    manager.startup_stages = [('launch', launch_time), ('import', imported_time)]
     if not results.vault_key:
         print('Vault key is necessary for launch (use -p key for provide if)')
         return
@@ -181,23 +258,62 @@ def main(argv):
     # -------------------------------------
     # launch pynode
     # -------------------------------------
-    worker_contract_address = worker_address
+    # comma separated worker node contracts are hosted by one process, owned by accounts at the same positions
+    worker_addresses = [address.strip() for address in worker_address.split(',')]
+    worker_accounts = [account.strip() for account in eth_worker_node_account.split(',')]
+    if len(worker_addresses) != len(worker_accounts):
+        print('Every worker node contract should have its owner account configured, exiting')
+        return
+    worker_nodes = list(zip(worker_addresses, worker_accounts))
+    worker_contract_address, eth_worker_node_account = worker_nodes[0]
 
     manager.pynode_config_file_path = results.configuration_file
     manager.launch_mode = "0"  # results.launch_mode
     manager.eth_use = results.ethereum_use
     manager.eth_host = eth_host
+    manager.eth_pool_size = int(eth_pool_size)
+    manager.eth_sync_check_ttl = int(eth_sync_check_ttl)
+    manager.eth_gas_refresh_interval = int(eth_gas_refresh_interval)
+    manager.eth_gas_max_age = int(eth_gas_max_age)
+    manager.eth_gas_limit = int(eth_gas_limit)
+    manager.eth_receipt_stuck_blocks = int(eth_receipt_stuck_blocks)
+    manager.eth_receipt_timeout_blocks = int(eth_receipt_timeout_blocks)
+    manager.eth_progress_interval = int(eth_progress_interval)
+    manager.eth_progress_gas_budget = int(eth_progress_gas_budget_gwei) * 10 ** 9
+    manager.eth_subscription_host = eth_subscription_host
+    manager.eth_poll_interval = float(eth_poll_interval)
+    manager.eth_confirmations = int(eth_confirmations)
+    manager.eth_log_cursor_file = eth_log_cursor_file
+    manager.eth_log_replay_blocks = int(eth_log_replay_blocks)
 
     manager.eth_worker_node_account = eth_worker_node_account
+    manager.vault_idle_timeout = int(vault_idle_timeout)
 
     manager.eth_abi_path = results.abi_path
     manager.eth_pandora = pandora_address
     manager.eth_worker = worker_contract_address
+    manager.eth_worker_nodes = worker_nodes
     manager.ipfs_use = results.ipfs_use
     manager.ipfs_host = ipfs_host
     manager.ipfs_port = ipfs_port
     manager.ipfs_storage = ipfs_storage
+    manager.ipfs_cache_size = int(ipfs_cache_size_mb) * 1024 * 1024
+    manager.ipfs_fetch_workers = int(ipfs_fetch_workers)
+    manager.ipfs_gateway = ipfs_gateway
+    manager.ipfs_chunk_size = int(ipfs_chunk_size_kb) * 1024
     manager.pynode_start_on_launch = pynode_start_on_launch
+    manager.dataset_load_mode = dataset_load_mode
+    manager.batch_prefetch = int(batch_prefetch)
+    manager.model_pool_size = int(model_pool_size_mb) * 1024 * 1024
+    manager.model_pool_recycle = int(model_pool_recycle)
+    manager.compute_retries = int(compute_retries)
+    manager.processor_warm_up = processor_warm_up
+    manager.prediction_processes = int(prediction_processes)
+    manager.inference_tuning = inference_tuning
+    manager.inference_tuning_file = inference_tuning_file
+    manager.predict_batch_size = int(predict_batch_size)
+    manager.intra_op_threads = int(intra_op_threads)
+    manager.inter_op_threads = int(inter_op_threads)
     manager.web_socket_enable = socket_enable
     manager.web_socket_host = socket_host
     manager.web_socket_port = socket_port
@@ -207,19 +323,54 @@ def main(argv):
     print("Node launch mode             : " + str(manager.launch_mode))
     print("Ethereum use                 : " + str(results.ethereum_use))
     print("Ethereum host                : " + str(eth_host))
+    print("Ethereum connections pool    : " + str(eth_pool_size))
+    print("Ethereum sync check TTL (s)  : " + str(eth_sync_check_ttl))
+    print("Gas price refresh (s)        : " + str(eth_gas_refresh_interval))
+    print("Gas price max age (s)        : " + str(eth_gas_max_age))
+    print("Default gas limit            : " + str(eth_gas_limit))
+    print("Receipt stuck blocks         : " + str(eth_receipt_stuck_blocks))
+    print("Receipt timeout blocks       : " + str(eth_receipt_timeout_blocks))
+    print("Progress interval (s)        : " + str(eth_progress_interval))
+    print("Progress gas budget (gwei)   : " + str(eth_progress_gas_budget_gwei))
+    print("Events subscriptions host    : " + str(eth_subscription_host))
+    print("Events poll interval (s)     : " + str(eth_poll_interval))
+    print("Events confirmations         : " + str(eth_confirmations))
+    print("Events log cursor file       : " + str(eth_log_cursor_file))
+    print("Events log replay blocks     : " + str(eth_log_replay_blocks))
     print("Worker node account owner    : " + str(eth_worker_node_account))
+    print("Vault idle timeout (s)       : " + str(vault_idle_timeout))
     print("Use vault password           : " + str(manager.vault_key))
     print("Primary contracts addresses")
     print("Pandora main contract        : " + str(pandora_address))
     print("Worker node contract         : " + str(worker_contract_address))
+    print("Hosted worker nodes          : " + str(len(worker_nodes)))
     print("IPFS configuration")
     print("IPFS use                     : " + str(results.ipfs_use))
     print("IPFS host                    : " + str(ipfs_host))
     print("IPFS port                    : " + str(ipfs_port))
     print("IPFS file storage            : " + str(ipfs_storage))
+    print("IPFS cache size (MB)         : " + str(ipfs_cache_size_mb))
+    print("IPFS fetch workers           : " + str(ipfs_fetch_workers))
+    print("IPFS gateway                 : " + str(ipfs_gateway))
+    print("IPFS chunk size (KB)         : " + str(ipfs_chunk_size_kb))
+    print("Dataset load mode            : " + str(dataset_load_mode))
+    print("Batches prefetch             : " + str(batch_prefetch))
+    print("Model pool size (MB)         : " + str(model_pool_size_mb))
+    print("Model pool recycle threshold : " + str(model_pool_recycle))
+    print("Compute retries              : " + str(compute_retries))
+    print("Processor warm up            : " + str(processor_warm_up))
+    print("Prediction processes         : " + str(prediction_processes))
+    print("Inference tuning             : " + str(inference_tuning))
+    print("Inference tuning file        : " + str(inference_tuning_file))
+    print("Predict batch size           : " + str(predict_batch_size))
+    print("Intra-op threads             : " + str(intra_op_threads))
+    print("Inter-op threads             : " + str(inter_op_threads))
     print("Web socket enable            : " + str(socket_enable))
     # inst contracts
     instantiate_contracts(results.abi_path, eth_hooks)
+    manager.mark_startup_stage('abi')
+    # compute workers are forked from single-threaded server, started before socket listener and broker threads
+    start_worker_server()
     # launch socket web listener
     if socket_enable == 'True':
         print("Launch client socket listener")
@@ -1,9 +1,14 @@
 import os
+import time
+import atexit
+import weakref
 import logging
 from pathlib import Path
+from threading import RLock, Timer
 from hashlib import md5
 from base64 import b64decode
 from Crypto.Cipher import AES
+from eth_account import Account
 
 
 class KeyTools:
@@ -18,17 +23,40 @@ class KeyTools:
     vault_folder = 'vault'
     vault_name = 'worker_node_key.pri'
 
-    def __init__(self):
+    # key tools of process, their signing sessions are locked by single exit handler
+    __instances = weakref.WeakSet()
+    __exit_registered = False
+
+    def __init__(self, vault_name: str = None):
         self.logger = logging.getLogger("Key Tool")
+        if vault_name:
+            # every worker node account hosted by process is kept in its own vault file
+            self.vault_name = vault_name
         self.pad = lambda s: s + (self.BLOCK_SIZE - len(s) % self.BLOCK_SIZE) * \
                          chr(self.BLOCK_SIZE - len(s) % self.BLOCK_SIZE)
         self.unpad = lambda s: s[:-ord(s[len(s) - 1:])]
+        # signing session, vault is decrypted once and local account is kept in memory
+        self.idle_timeout = 0  # seconds, 0 - session is kept for process life
+        self.__session_lock = RLock()
+        self.__account = None
+        self.__vault_account = None
+        self.__last_used = 0
+        self.__idle_timer = None
+        KeyTools.__instances.add(self)
+        if not KeyTools.__exit_registered:
+            KeyTools.__exit_registered = True
+            atexit.register(KeyTools.lock_all)
 
     def check_vault(self):
         vault_folder = Path(os.getcwd()+'/'+self.vault_folder)
         if os.path.exists(vault_folder) is False:
             os.makedirs(vault_folder)
         vault_file = Path(str(vault_folder)+'/'+self.vault_name)
+        shared_file = Path(str(vault_folder)+'/'+KeyTools.vault_name)
+        if vault_file != shared_file and self.is_filled(vault_file) is False and self.is_filled(shared_file):
+            # account vault is not created, account may be kept in shared vault, it is checked by broker
+            self.logger.info('Account vault %s not found, shared vault is used', self.vault_name)
+            vault_file = shared_file
         if os.path.isfile(vault_file) is False:
             open(vault_file, 'a').close()
             self.vault_path = vault_file
@@ -39,6 +67,10 @@ class KeyTools:
         self.vault_path = vault_file
         return True
 
+    @staticmethod
+    def is_filled(vault_file) -> bool:
+        return os.path.isfile(vault_file) and os.path.getsize(vault_file) > 0
+
     def obtain_key(self, vault_password: str) -> str:
         try:
             vault_password = md5(vault_password.encode('utf8')).hexdigest()
@@ -54,3 +86,76 @@ class KeyTools:
         return result
 
 
+
+    # -------------------------------------
+    # signing session
+    # -------------------------------------
+    def unlock(self, vault_password: str, idle_timeout: int = 0) -> bool:
+        """ Decrypt vault once and keep local account for transactions signing """
+        with self.__session_lock:
+            self.idle_timeout = idle_timeout
+            if self.__account is not None:
+                return True
+            vault_data = self.obtain_key(vault_password)
+            if not vault_data:
+                return False
+            try:
+                vault_account, private_key = vault_data.split("_", 1)
+                self.__account = Account.privateKeyToAccount(bytes.fromhex(private_key.replace('0x', '', 1)))
+            except Exception as ex:
+                self.logger.info('Exception on unlock account vault.')
+                self.logger.info(ex.args)
+                return False
+            self.__vault_account = vault_account
+            self.__last_used = time.time()
+            self.__schedule_idle_lock(self.idle_timeout)
+            self.logger.info('Signing session unlocked')
+            return True
+
+    def lock(self):
+        """ Drop signing session account, vault is decrypted again by next signing """
+        with self.__session_lock:
+            if self.__idle_timer is not None:
+                self.__idle_timer.cancel()
+                self.__idle_timer = None
+            if self.__account is not None:
+                self.__account = None
+                self.logger.info('Signing session locked')
+
+    @staticmethod
+    def lock_all():
+        for key_tools in list(KeyTools.__instances):
+            key_tools.lock()
+
+    def is_unlocked(self) -> bool:
+        return self.__account is not None
+
+    @property
+    def vault_account(self) -> str:
+        """ Account address stored in vault along with key, known after unlock """
+        return self.__vault_account
+
+    def sign_transaction(self, transaction: dict, vault_password: str):
+        """ Sign transaction by session account, session is unlocked again after idle lock """
+        with self.__session_lock:
+            if self.__account is None and not self.unlock(vault_password, self.idle_timeout):
+                raise ValueError('Unable to unlock account vault.')
+            self.__last_used = time.time()
+            return self.__account.signTransaction(transaction)
+
+    def __schedule_idle_lock(self, delay: float):
+        if not self.idle_timeout:
+            return
+        self.__idle_timer = Timer(delay, self.__on_idle_timer)
+        self.__idle_timer.daemon = True
+        self.__idle_timer.start()
+
+    def __on_idle_timer(self):
+        with self.__session_lock:
+            if self.__account is None:
+                return
+            idle = time.time() - self.__last_used
+            if idle >= self.idle_timeout:
+                self.lock()
+            else:
+                self.__schedule_idle_lock(self.idle_timeout - idle)
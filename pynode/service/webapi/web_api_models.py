@@ -117,6 +117,13 @@ class PynodeStatus:
     dataset_address = None
     # ipfs result address from last job
     job_result_address = None
+    # -----------------------
+    # local ipfs blob cache statistics
+    ipfs_cache_hits = None
+    ipfs_cache_misses = None
+    ipfs_cache_evicted_bytes = None
+    # peak resident memory of last job processing
+    job_peak_resident_bytes = None
 
     def define_object(self,
                       state: str,
@@ -130,7 +137,12 @@ class PynodeStatus:
                       job_status: str,
                       kernel_address: str,
                       dataset_address: str,
-                      job_result_address: str):
+                      job_result_address: str,
+
+                      ipfs_cache_hits: int = 0,
+                      ipfs_cache_misses: int = 0,
+                      ipfs_cache_evicted_bytes: int = 0,
+                      job_peak_resident_bytes: int = 0):
         self.state = state
         self.ethereum_host = ethereum_host
         self.ipfs_host = ipfs_host
@@ -142,5 +154,9 @@ class PynodeStatus:
         self.kernel_address = kernel_address
         self.dataset_address = dataset_address
         self.job_result_address = job_result_address
+        self.ipfs_cache_hits = ipfs_cache_hits
+        self.ipfs_cache_misses = ipfs_cache_misses
+        self.ipfs_cache_evicted_bytes = ipfs_cache_evicted_bytes
+        self.job_peak_resident_bytes = job_peak_resident_bytes
 
 
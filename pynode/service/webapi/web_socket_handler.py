@@ -77,7 +77,11 @@ class WebSocketHandler:
                                job_status=self.manager.job_contract_state,
                                kernel_address=self.manager.job_kernel_ipfs_address,
                                dataset_address=self.manager.job_dataset_ipfs_address,
-                               job_result_address=self.manager.job_result_ipfs_address)
+                               job_result_address=self.manager.job_result_ipfs_address,
+                               ipfs_cache_hits=self.manager.ipfs_cache_hits,
+                               ipfs_cache_misses=self.manager.ipfs_cache_misses,
+                               ipfs_cache_evicted_bytes=self.manager.ipfs_cache_evicted_bytes,
+                               job_peak_resident_bytes=self.manager.job_peak_resident_bytes)
         return response
 
 
@@ -72,7 +72,11 @@ class WebSocket(threading.Thread):
                                    job_status=manager.job_contract_state,
                                    kernel_address=manager.job_kernel_ipfs_address,
                                    dataset_address=manager.job_dataset_ipfs_address,
-                                   job_result_address=manager.job_result_ipfs_address)
+                                   job_result_address=manager.job_result_ipfs_address,
+                                   ipfs_cache_hits=manager.ipfs_cache_hits,
+                                   ipfs_cache_misses=manager.ipfs_cache_misses,
+                                   ipfs_cache_evicted_bytes=manager.ipfs_cache_evicted_bytes,
+                                   job_peak_resident_bytes=manager.job_peak_resident_bytes)
             if self.client is not None:
                 self.client.send(str.encode(ClassApiSerializer().serialize(response)))
         except Exception as ex:
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from pynode.core.processor.entities.prediction_pool import PredictionPool, PredictionModel
+
+
+# ---------------------------------
+# sharded prediction scaling by prediction processes count,
+# launched from tests folder : python ./test_tools/prediction_scaling_benchmark.py [rows]
+# ---------------------------------
+def save_model(directory: str, features: int, outputs: int) -> PredictionModel:
+    import keras
+    model = keras.models.Sequential([keras.layers.Dense(256, activation='relu', input_shape=(features,)),
+                                     keras.layers.Dense(outputs, activation='softmax')])
+    model_file = os.path.join(directory, 'QmModel')
+    weights_file = os.path.join(directory, 'QmWeights')
+    with open(model_file, 'w') as json_file:
+        json_file.write(model.to_json())
+    model.save_weights(weights_file)
+    return PredictionModel(key=('QmModel', 'QmWeights'), model_file=model_file, weights_file=weights_file)
+
+
+def benchmark(*args):
+    rows_count = int(args[0][1]) if len(args[0]) > 1 else 20000
+    with tempfile.TemporaryDirectory() as directory:
+        model = save_model(directory, features=256, outputs=10)
+        path = os.path.join(directory, 'rows.npy')
+        np.save(path, np.random.RandomState(1).rand(rows_count, 256).astype(np.float32))
+        rows = np.load(path, mmap_mode='r')
+        timings = {}
+        for processes in range(1, max(2, min(4, os.cpu_count() or 1)) + 1):
+            PredictionPool._PredictionPool__instance = None
+            pool = PredictionPool(processes=processes)
+            # the first prediction spawns workers and builds their models
+            pool.predict(model, rows[:processes * 100], 100, directory=directory)
+            started = time.time()
+            pool.predict(model, rows, batch_size=100)
+            timings[processes] = time.time() - started
+            pool.stop()
+        print('prediction of %s rows on %s cores : ' % (rows_count, os.cpu_count())
+              + ', '.join('%s processes %.2fs' % (processes, seconds) for processes, seconds in timings.items()))
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv)
@@ -0,0 +1,43 @@
+import sys
+import timeit
+
+from web3 import Web3
+
+from pynode.integration.transaction_catalog import TransactionCatalog
+
+
+# ---------------------------------
+# transaction catalog micro benchmark against web3 contract functions path,
+# launched from tests folder : python ./test_tools/transaction_catalog_benchmark.py [transactions]
+# ---------------------------------
+def function_abi(name: str, input_type: str = None) -> dict:
+    inputs = [{'name': 'value', 'type': input_type}] if input_type else []
+    return {'constant': False, 'inputs': inputs, 'name': name, 'outputs': [], 'payable': False,
+            'stateMutability': 'nonpayable', 'type': 'function'}
+
+
+def benchmark(*args):
+    number = int(args[0][1]) if len(args[0]) > 1 else 200
+    account = Web3.toChecksumAddress('0x5677db552d5fd9911a5560cb0bd40be90a70eff2')
+    fields = {'from': account, 'nonce': 7, 'gas': 100000, 'gasPrice': 20000000000}
+    # contract functions are encoded without provider
+    contract = Web3().eth.contract(address=account,
+                                   abi=[function_abi('alive'),
+                                        function_abi('provideResults', 'bytes'),
+                                        function_abi('reportProgress', 'uint8')])
+    catalog = TransactionCatalog()
+    for name in ('alive', 'provideResults', 'reportProgress'):
+        catalog.register(contract, name)
+
+    results = b'QmWATWQ7fVPP2EFGu71UkfnqhYXDYH566qy47CnJDgvs8u'
+    for name, function_args in (('alive', ()), ('provideResults', (results,)), ('reportProgress', (42,))):
+        contract_time = timeit.timeit(
+            lambda: getattr(contract.functions, name)(*function_args).buildTransaction(fields), number=number)
+        catalog_time = timeit.timeit(
+            lambda: catalog.call(name, *function_args).transaction(fields), number=number)
+        print('%s : buildTransaction %.3f ms, catalog %.3f ms per transaction'
+              % (name, contract_time * 1000 / number, catalog_time * 1000 / number))
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv)
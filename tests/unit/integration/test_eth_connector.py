@@ -0,0 +1,119 @@
+import json
+import threading
+import unittest
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+from eth_abi import encode_abi
+
+from pynode.integration.integration.eth_connector import EthConnector
+
+
+class RpcRequestHandler(BaseHTTPRequestHandler):
+    # local http stand-in for ethereum node answering sync state, block number and contract calls
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        self.server.requests += 1
+        self.server.connections.add(self.client_address)
+        if isinstance(request, list):
+            response = [self.answer(item) for item in reversed(request)]
+        else:
+            response = self.answer(request)
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def answer(self, request: dict) -> dict:
+        self.server.methods.append(request['method'])
+        result = False
+        if request['method'] == 'eth_blockNumber':
+            result = '0x10'
+        elif request['method'] == 'eth_call':
+            transaction, block = request['params']
+            self.server.call_blocks.append(block)
+            result = self.server.call_results[transaction['to'].lower()]
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': result}
+
+    def log_message(self, *args):
+        pass
+
+
+class RpcServer(ThreadingMixIn, HTTPServer):
+    # keep-alive connections are served by own threads
+    daemon_threads = True
+
+
+class TestEthConnector(unittest.TestCase):
+
+    abi = [{'constant': True, 'inputs': [], 'name': 'activeJob', 'outputs': [{'name': '', 'type': 'bytes32'}],
+            'payable': False, 'stateMutability': 'view', 'type': 'function'}]
+    address = '0x5677db552d5fd9911a5560cb0bd40be90a70eff2'
+    ipfs_abi = [{'constant': True, 'inputs': [], 'name': 'ipfsAddress', 'outputs': [{'name': '', 'type': 'bytes'}],
+                 'payable': False, 'stateMutability': 'view', 'type': 'function'}]
+    kernel_address = '0x2c2b9c9a4a25e24b174f26114e8926a9f2128fe4'
+    dataset_address = '0xf23f45caa5c697c54d2e92ecbee48855233040e1'
+
+    def setUp(self):
+        self.server = RpcServer(('127.0.0.1', 0), RpcRequestHandler)
+        self.server.methods = []
+        self.server.requests = 0
+        self.server.call_blocks = []
+        self.server.call_results = {
+            self.kernel_address: '0x' + encode_abi(['bytes'], [b'QmKernel']).hex(),
+            self.dataset_address: '0x' + encode_abi(['bytes'], [b'QmDataset']).hex()}
+        self.server.connections = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.host = 'http://127.0.0.1:%s' % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_provider_and_contract_are_shared(self):
+        contract = EthConnector().init_contract(self.host, self.address, self.abi)
+        same = EthConnector().init_contract(self.host, self.address.upper().replace('0X', '0x'), self.abi)
+        assert same is contract
+        other_abi = EthConnector().init_contract(self.host, self.address, self.abi + [])
+        assert other_abi is contract  # equal ABI content
+        assert contract.web3 is EthConnector.web3
+
+    def test_sync_check_cached_by_ttl(self):
+        connector = EthConnector(sync_check_ttl=60)
+        for _ in range(3):
+            connector.init_contract(self.host, self.address, self.abi)
+        assert self.server.methods == ['eth_syncing']
+
+        expired = EthConnector(sync_check_ttl=0)
+        expired.init_contract(self.host, self.address, self.abi)
+        expired.init_contract(self.host, self.address, self.abi)
+        assert self.server.methods == ['eth_syncing'] * 3
+        # keep-alive session reuses one connection
+        assert len(self.server.connections) == 1
+
+    def test_calls_batched_and_pinned_to_block(self):
+        connector = EthConnector()
+        kernel = connector.init_contract(self.host, self.kernel_address, self.ipfs_abi)
+        dataset = connector.init_contract(self.host, self.dataset_address, self.ipfs_abi)
+        block = connector.block_number(kernel)
+        requests = self.server.requests
+        results = connector.call_batch([kernel.functions.ipfsAddress(), dataset.functions.ipfsAddress()], block)
+        assert block == 16
+        assert results == [b'QmKernel', b'QmDataset']
+        assert self.server.requests == requests + 1
+        assert self.server.call_blocks == ['0x10', '0x10']
+
+    def test_block_number_read_in_calls_batch(self):
+        connector = EthConnector()
+        kernel = connector.init_contract(self.host, self.kernel_address, self.ipfs_abi)
+        requests = self.server.requests
+        block, results = connector.call_batch_with_block([kernel.functions.ipfsAddress()])
+        assert block == 16
+        assert results == [b'QmKernel']
+        assert self.server.requests == requests + 1
+        assert self.server.methods[-2:] == ['eth_call', 'eth_blockNumber']
@@ -0,0 +1,169 @@
+import json
+import asyncio
+import threading
+import unittest
+
+from queue import Queue
+from types import SimpleNamespace
+
+import websockets
+
+from pynode.integration.event_source import EventSource, EventSourceAbstract, Subscription
+from pynode.integration.integration.log_poller import LogPoller
+from pynode.integration.integration.log_subscriber import LogSubscriber
+
+
+class WebSocketNode:
+    # local websocket stand-in for ethereum node answering eth_subscribe and pushing notifications
+
+    log = {'address': '0x5677db552d5fd9911a5560cb0bd40be90a70eff2', 'blockNumber': '0x11', 'logIndex': '0x0',
+           'transactionIndex': '0x0', 'data': '0x', 'topics': ['0x' + '11' * 32], 'removed': False,
+           'blockHash': '0x' + '22' * 32, 'transactionHash': '0x' + '33' * 32}
+
+    def __init__(self, support_subscriptions: bool = True, close_after_push: bool = False):
+        self.support_subscriptions = support_subscriptions
+        self.close_after_push = close_after_push
+        self.requests = []
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(websockets.serve(self.handler, '127.0.0.1', 0, loop=self.loop))
+        self.uri = 'ws://127.0.0.1:%s' % self.server.sockets[0].getsockname()[1]
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def handler(self, websocket, path):
+        subscriptions = {}
+        async for message in websocket:
+            request = json.loads(message)
+            self.requests.append(request)
+            if not self.support_subscriptions:
+                await websocket.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'],
+                                                 'error': {'code': -32601, 'message': 'method not found'}}))
+                continue
+            subscription_id = '0x%x' % (len(subscriptions) + 1)
+            subscriptions[request['params'][0]] = subscription_id
+            await websocket.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': subscription_id}))
+            if 'logs' in subscriptions and 'newHeads' in subscriptions:
+                await self.notify(websocket, subscriptions['newHeads'], {'number': '0x11'})
+                await self.notify(websocket, subscriptions['logs'], self.log)
+                if self.close_after_push:
+                    await websocket.close()
+
+    @staticmethod
+    async def notify(websocket, subscription_id: str, result: dict):
+        await websocket.send(json.dumps({'jsonrpc': '2.0', 'method': 'eth_subscription',
+                                         'params': {'subscription': subscription_id, 'result': result}}))
+
+    async def shutdown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class FakePolling(EventSourceAbstract):
+    # polling source recording the block it is started from
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.from_block = None
+        self.subscriptions = []
+
+    @property
+    def last_block(self):
+        return None
+
+    def subscribe(self, subscription):
+        self.subscriptions.append(subscription)
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.remove(subscription)
+
+    def start(self, from_block: int = None) -> bool:
+        self.from_block = from_block
+        self.started.set()
+        return True
+
+    def stop(self):
+        pass
+
+
+class TestEventSource(unittest.TestCase):
+
+    def setUp(self):
+        self.logs = Queue()
+        self.polling = FakePolling()
+        self.event_source = None
+        self.node = None
+
+    def tearDown(self):
+        if self.event_source is not None:
+            self.event_source.stop()
+        if self.node is not None:
+            self.node.close()
+
+    def start(self, node: WebSocketNode):
+        self.node = node
+        self.event_source = EventSource(polling=self.polling, push=LogSubscriber(node.uri, connect_timeout=5))
+        self.event_source.subscribe_logs('0x5677db552d5fd9911a5560cb0bd40be90a70eff2', ['0x' + '11' * 32],
+                                         self.logs.put)
+        self.event_source.start()
+
+    def test_logs_pushed_by_subscription(self):
+        self.start(WebSocketNode())
+        assert self.event_source.mode == 'push'
+        log = self.logs.get(timeout=5)
+        assert log['blockNumber'] == 17
+        assert self.node.requests[0]['method'] == 'eth_subscribe'
+        assert not self.polling.started.is_set()
+
+    def test_fallback_to_polling_without_subscriptions(self):
+        self.start(WebSocketNode(support_subscriptions=False))
+        assert self.event_source.mode == 'polling'
+        assert self.polling.from_block is None
+        assert len(self.polling.subscriptions) == 1
+
+    def test_fallback_to_polling_on_connection_loss(self):
+        self.start(WebSocketNode(close_after_push=True))
+        assert self.polling.started.wait(5)
+        assert self.event_source.mode == 'polling'
+        # the last pushed block is polled again
+        assert self.polling.from_block == 17
+
+
+class FakeEth:
+    # node with logs of every block
+
+    def __init__(self, block_number: int):
+        self.block_number = block_number
+        self.block_number_read = threading.Event()
+        self.requests = []
+
+    @property
+    def blockNumber(self):
+        self.block_number_read.set()
+        return self.block_number
+
+    def getLogs(self, params: dict):
+        self.requests.append(params)
+        return [{'blockNumber': block} for block in range(params['fromBlock'], params['toBlock'] + 1)]
+
+
+class TestLogPoller(unittest.TestCase):
+
+    def test_new_blocks_logs_polled_once(self):
+        eth = FakeEth(10)
+        poller = LogPoller(SimpleNamespace(eth=eth), poll_interval=60)
+        logs = []
+        heads = []
+        poller.subscribe(Subscription('logs', logs.append, address='0xAddress', topics=['0xTopic']))
+        poller.subscribe(Subscription('newHeads', heads.append))
+        poller.start()
+        self.addCleanup(poller.stop)
+        assert eth.block_number_read.wait(5)
+        eth.block_number = 12
+        poller.poll()
+        poller.poll()
+        assert [(params['fromBlock'], params['toBlock']) for params in eth.requests] == [(11, 12)]
+        assert logs == [{'blockNumber': 11}, {'blockNumber': 12}]
+        assert heads == [12]
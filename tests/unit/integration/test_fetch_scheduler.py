@@ -0,0 +1,98 @@
+import time
+import unittest
+
+from threading import Lock
+
+from pynode.integration.fetch_scheduler import FetchScheduler
+from pynode.integration.ipfs_service import IpfsAbstract
+
+
+class SlowIpfsConnector(IpfsAbstract):
+    # fake connector counting downloads and concurrency
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+        self.lock = Lock()
+        self.downloads = []
+        self.active = 0
+        self.max_active = 0
+
+    def connect(self, server='localhost', port=5001, data_dir='../tmp'):
+        pass
+
+    def download_file(self, file_address: str, directory: str = None):
+        with self.lock:
+            self.downloads.append(file_address)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if file_address == 'broken':
+            raise IOError('download failed')
+        return (directory or '/tmp') + '/' + file_address
+
+    def upload_file(self, file_name: str):
+        return 'QmResult'
+
+
+class TestFetchScheduler(unittest.TestCase):
+
+    def test_concurrent_bounded_fetch(self):
+        connector = SlowIpfsConnector()
+        scheduler = FetchScheduler(strategic=connector, workers=3)
+        start = time.time()
+        for address in ['a', 'b', 'c', 'd', 'e', 'f']:
+            scheduler.prefetch(address)
+        for address in ['a', 'b', 'c', 'd', 'e', 'f']:
+            assert scheduler.download_file(address) == '/tmp/' + address
+        elapsed = time.time() - start
+        scheduler.shutdown()
+        assert connector.max_active == 3
+        assert elapsed < 0.5  # two waves instead of six serial downloads
+
+    def test_single_fetch_per_address(self):
+        connector = SlowIpfsConnector(delay=0.01)
+        scheduler = FetchScheduler(strategic=connector, workers=2)
+        scheduler.prefetch('a')
+        scheduler.download_file('a')
+        scheduler.download_file('a')
+        scheduler.shutdown()
+        assert connector.downloads == ['a']
+
+    def test_dependent_files_scheduled_on_landing(self):
+        connector = SlowIpfsConnector(delay=0.01)
+        scheduler = FetchScheduler(strategic=connector, workers=2)
+        landed = []
+
+        def on_root_landed(file_path: str):
+            landed.append(file_path)
+            scheduler.prefetch('model')
+            scheduler.prefetch('weights')
+
+        scheduler.prefetch('kernel', on_landed=on_root_landed)
+        scheduler.download_file('kernel')
+        assert landed == ['/tmp/kernel']
+        assert scheduler.download_file('model') == '/tmp/model'
+        assert scheduler.download_file('weights') == '/tmp/weights'
+        scheduler.shutdown()
+
+    def test_errors_raised_to_waiter(self):
+        connector = SlowIpfsConnector(delay=0.01)
+        scheduler = FetchScheduler(strategic=connector, workers=2)
+
+        def on_landed(file_path: str):
+            raise ValueError('invalid header')
+
+        scheduler.prefetch('data', on_landed=on_landed)
+        with self.assertRaises(IOError):
+            scheduler.download_file('broken')
+        with self.assertRaises(ValueError):
+            scheduler.download_file('data')
+        scheduler.shutdown()
+
+    def test_files_landed_into_scheduler_directory(self):
+        connector = SlowIpfsConnector(delay=0.01)
+        scheduler = FetchScheduler(strategic=connector, workers=2, directory='/tmp/jobs/0x01')
+        assert scheduler.download_file('a') == '/tmp/jobs/0x01/a'
+        scheduler.shutdown()
@@ -0,0 +1,63 @@
+import unittest
+
+from types import SimpleNamespace
+
+from pynode.integration.gas_oracle import GasOracle
+
+
+class FakeEth:
+    # node with gas price strategy and latest block
+
+    def __init__(self):
+        self.strategy_calls = 0
+        self.blockNumber = 10
+        self.block_gas_limit = 8000000
+
+    def generateGasPrice(self):
+        self.strategy_calls += 1
+        return 20000000000
+
+    def getBlock(self, block_identifier):
+        return {'number': self.blockNumber, 'gasLimit': self.block_gas_limit}
+
+
+class FakeFunction:
+    # contract function with gas estimation
+
+    def __init__(self, estimate: int):
+        self.estimate = estimate
+        self.estimations = 0
+
+    def estimateGas(self, transaction):
+        self.estimations += 1
+        return self.estimate
+
+
+class TestGasOracle(unittest.TestCase):
+
+    def setUp(self):
+        self.eth = FakeEth()
+        self.oracle = GasOracle(SimpleNamespace(eth=self.eth), refresh_interval=60, max_age=300)
+
+    def test_gas_price_served_from_memory(self):
+        assert [self.oracle.gas_price() for _ in range(3)] == [20000000000] * 3
+        assert self.eth.strategy_calls == 1
+
+    def test_gas_limit_estimated_once_until_invalidated(self):
+        function = FakeFunction(100000)
+        assert self.oracle.gas_limit('provideResults', function, '0xAccount') == 120000
+        assert self.oracle.gas_limit('provideResults', function, '0xAccount') == 120000
+        assert function.estimations == 1
+        self.oracle.invalidate('provideResults')
+        self.oracle.gas_limit('provideResults', function, '0xAccount')
+        assert function.estimations == 2
+
+    def test_gas_limit_capped_by_block_gas_limit(self):
+        self.eth.block_gas_limit = 110000
+        self.oracle.refresh()
+        assert self.oracle.gas_limit('provideResults', FakeFunction(100000), '0xAccount') == 110000
+
+    def test_default_gas_limit_on_failed_estimation(self):
+        function = FakeFunction(100000)
+        function.estimateGas = None  # not callable in current contract state
+        assert self.oracle.gas_limit('checkJobQueue', function, '0xAccount') == 1000000
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pynode.integration.ipfs_cache import IpfsBlobCache
+
+
+class TestIpfsBlobCache(unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.root_dir, 'cache')
+        self.work_dir = os.path.join(self.root_dir, 'work')
+        os.makedirs(self.work_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def store(self, cache: IpfsBlobCache, address: str, size: int):
+        temp_file = cache.temp_path(address)
+        with open(temp_file, 'wb') as f:
+            f.write(b'x' * size)
+        return cache.publish(address, temp_file)
+
+    def test_miss_publish_hit(self):
+        cache = IpfsBlobCache(cache_dir=self.cache_dir, max_bytes=1000)
+        assert cache.lookup('QmA') is None
+        path = self.store(cache, 'QmA', 10)
+        assert os.path.isfile(path)
+        assert cache.lookup('QmA') == path
+        assert cache.hits == 1
+        assert cache.misses == 1
+        # no temp files left after atomic publish
+        assert os.listdir(self.cache_dir) == ['QmA']
+
+    def test_lru_eviction(self):
+        cache = IpfsBlobCache(cache_dir=self.cache_dir, max_bytes=100)
+        self.store(cache, 'QmA', 40)
+        self.store(cache, 'QmB', 40)
+        cache.lookup('QmA')  # QmB becomes least recently used
+        self.store(cache, 'QmC', 40)
+        assert cache.lookup('QmB') is None
+        assert cache.lookup('QmA') is not None
+        assert cache.lookup('QmC') is not None
+        assert cache.evicted_bytes == 40
+        assert cache.total_bytes == 80
+
+    def test_link_survives_eviction(self):
+        cache = IpfsBlobCache(cache_dir=self.cache_dir, max_bytes=50)
+        self.store(cache, 'QmA', 40)
+        linked = cache.link('QmA', self.work_dir)
+        self.store(cache, 'QmB', 40)
+        assert cache.lookup('QmA') is None
+        assert os.path.getsize(linked) == 40
+
+    def test_link_of_evicted_blob(self):
+        cache = IpfsBlobCache(cache_dir=self.cache_dir, max_bytes=50)
+        self.store(cache, 'QmA', 40)
+        assert cache.lookup('QmA') is not None
+        # concurrent publish evicts blob between lookup and link
+        self.store(cache, 'QmB', 40)
+        assert cache.link('QmA', self.work_dir) is None
+        assert not os.path.exists(os.path.join(self.work_dir, 'QmA'))
+
+    def test_persistent_between_instances(self):
+        cache = IpfsBlobCache(cache_dir=self.cache_dir, max_bytes=1000)
+        self.store(cache, 'QmA', 10)
+        # interrupted download must be dropped on next launch
+        with open(cache.temp_path('QmB'), 'wb') as f:
+            f.write(b'partial')
+        cache = IpfsBlobCache(cache_dir=self.cache_dir, max_bytes=1000)
+        assert cache.total_bytes == 10
+        assert cache.lookup('QmA') is not None
+        assert os.listdir(self.cache_dir) == ['QmA']
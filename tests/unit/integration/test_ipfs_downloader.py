@@ -0,0 +1,184 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from urllib.parse import urlsplit, parse_qs
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from pynode.integration.ipfs_cache import IpfsBlobCache
+from pynode.integration.integration import ipfs_connector
+from pynode.integration.integration.ipfs_downloader import StreamingDownloader
+from pynode.integration.integration.ipfs_connector import IpfsConnector
+
+
+class BlobRequestHandler(BaseHTTPRequestHandler):
+    # local http stand-in for ipfs gateway serving fixture blobs
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get('Range'))
+        server.paths.append((self.command, self.path))
+        # ipfs node API takes object address and offset by arguments and ignores ranges, gateway takes path
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        name = query['arg'][0] if 'arg' in query else url.path.rsplit('/', 1)[-1]
+        blob = server.blobs.get(name)
+        if blob is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        offset = 0
+        range_header = self.headers.get('Range')
+        if 'arg' in query:
+            offset = int(query.get('offset', ['0'])[0])
+            self.send_response(200)
+        elif range_header and server.support_ranges:
+            offset = int(range_header.split('=')[1].split('-')[0])
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (offset, len(blob) - 1, len(blob)))
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(blob) - offset))
+        self.end_headers()
+        body = blob[offset:]
+        if server.drop_after is not None:
+            # emulate broken connection in the middle of transfer
+            body = body[:server.drop_after]
+            server.drop_after = None
+            self.close_connection = True
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestStreamingDownloader(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), BlobRequestHandler)
+        self.server.blobs = {'QmBlob': os.urandom(300000)}
+        self.server.requests = []
+        self.server.paths = []
+        self.server.support_ranges = True
+        self.server.drop_after = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:%s/ipfs/' % self.server.server_port
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, 'QmBlob')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir)
+
+    def read_file(self):
+        with open(self.file_path, 'rb') as f:
+            return f.read()
+
+    def test_download_by_chunks(self):
+        downloader = StreamingDownloader(chunk_size=65536, timeout=5)
+        metrics = downloader.download(self.url + 'QmBlob', self.file_path)
+        assert self.read_file() == self.server.blobs['QmBlob']
+        assert metrics.total_bytes == 300000
+        assert metrics.received_bytes == 300000
+        assert metrics.resumes == 0
+        assert metrics.throughput > 0
+        assert metrics.eta == 0
+
+    def test_resume_by_range(self):
+        self.server.drop_after = 100000
+        downloader = StreamingDownloader(chunk_size=65536, timeout=5)
+        metrics = downloader.download(self.url + 'QmBlob', self.file_path)
+        assert self.read_file() == self.server.blobs['QmBlob']
+        assert metrics.resumes == 1
+        # second request continues from the last written chunk
+        assert self.server.requests[0] is None
+        resume_offset = int(self.server.requests[1].split('=')[1].rstrip('-'))
+        assert 0 < resume_offset <= 100000
+
+    def test_restart_without_ranges_support(self):
+        self.server.drop_after = 100000
+        self.server.support_ranges = False
+        downloader = StreamingDownloader(chunk_size=65536, timeout=5)
+        downloader.download(self.url + 'QmBlob', self.file_path)
+        assert self.read_file() == self.server.blobs['QmBlob']
+
+    def test_missing_blob(self):
+        downloader = StreamingDownloader(chunk_size=65536, timeout=5, retries=1)
+        with self.assertRaises(Exception):
+            downloader.download(self.url + 'QmMissing', self.file_path)
+
+    def test_connector_streams_from_node_before_gateway(self):
+        connector = IpfsConnector(gateway=self.url, gateway_timeout=1)
+        connector.node_url = 'http://127.0.0.1:%s/api/v0/cat?arg=' % self.server.server_port
+        connector.fetch_file('QmBlob', self.file_path)
+        assert self.read_file() == self.server.blobs['QmBlob']
+        assert self.server.paths == [('POST', '/api/v0/cat?arg=QmBlob')]
+
+    def test_connector_resumes_node_download_by_offset(self):
+        self.server.drop_after = 100000
+        connector = IpfsConnector(chunk_size=65536)
+        connector.node_url = 'http://127.0.0.1:%s/api/v0/cat?arg=' % self.server.server_port
+        connector.fetch_file('QmBlob', self.file_path)
+        assert self.read_file() == self.server.blobs['QmBlob']
+        # node ignores Range header, download is continued by offset argument instead of restart
+        assert self.server.paths[0] == ('POST', '/api/v0/cat?arg=QmBlob')
+        method, path = self.server.paths[1]
+        resume_offset = int(parse_qs(urlsplit(path).query)['offset'][0])
+        assert method == 'POST' and 0 < resume_offset <= 100000
+        assert len(self.server.paths) == 2
+
+    def test_connector_gateway_fallback(self):
+        # public gateway is used by default, empty gateway disables fallback
+        assert IpfsConnector().gateway == 'https://gateway.ipfs.io/ipfs/'
+        # configured node is not reachable
+        connector = IpfsConnector(chunk_size=65536, gateway='')
+        connector.downloader.retries = 0
+        connector.node_url = 'http://127.0.0.1:1/api/v0/cat?arg='
+        with self.assertRaises(Exception):
+            connector.fetch_file('QmBlob', self.file_path)
+        assert self.server.paths == []
+        connector.gateway = self.url
+        connector.fetch_file('QmBlob', self.file_path)
+        assert self.read_file() == self.server.blobs['QmBlob']
+        # missing object is not retried on gateway
+        with self.assertRaises(Exception):
+            connector.fetch_file('QmMissing', self.file_path)
+        assert self.server.paths[-1] == ('GET', '/ipfs/QmMissing') and len(self.server.paths) == 2
+
+    def test_connector_cache_stats_published_on_hit(self):
+        connector = IpfsConnector(chunk_size=65536)
+        connector.node_url = 'http://127.0.0.1:%s/api/v0/cat?arg=' % self.server.server_port
+        connector.cache = IpfsBlobCache(cache_dir=os.path.join(self.temp_dir, 'cache'), max_bytes=10 ** 6)
+        job_dir = os.path.join(self.temp_dir, 'job')
+        os.makedirs(job_dir)
+        manager = ipfs_connector.Manager.get_instance()
+        connector.download_file('QmBlob', job_dir)
+        assert (manager.ipfs_cache_hits, manager.ipfs_cache_misses) == (0, 1)
+        connector.download_file('QmBlob', job_dir)
+        assert (manager.ipfs_cache_hits, manager.ipfs_cache_misses) == (1, 1)
+        assert len(self.server.paths) == 1
+
+    def test_connector_downloads_blob_evicted_after_lookup(self):
+        connector = IpfsConnector(chunk_size=65536)
+        connector.node_url = 'http://127.0.0.1:%s/api/v0/cat?arg=' % self.server.server_port
+        connector.cache = IpfsBlobCache(cache_dir=os.path.join(self.temp_dir, 'cache'), max_bytes=10 ** 6)
+        job_dir = os.path.join(self.temp_dir, 'job')
+        os.makedirs(job_dir)
+        connector.download_file('QmBlob', job_dir)
+        lookup = connector.cache.lookup
+
+        def evicting_lookup(address):
+            # concurrent publish evicts blob right after cache hit
+            path = lookup(address)
+            os.remove(path)
+            return path
+        connector.cache.lookup = evicting_lookup
+        file_path = connector.download_file('QmBlob', job_dir)
+        with open(file_path, 'rb') as f:
+            assert f.read() == self.server.blobs['QmBlob']
+        assert len(self.server.paths) == 2
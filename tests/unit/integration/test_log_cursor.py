@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+
+from types import SimpleNamespace
+
+from eth_abi import encode_abi
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+
+from pynode.integration.log_cursor import LogCursor
+from pynode.integration.log_dispatcher import LogDispatcher
+
+
+state_changed_abi = {'anonymous': False, 'name': 'StateChanged', 'type': 'event',
+                     'inputs': [{'name': 'oldState', 'type': 'uint8', 'indexed': False},
+                                {'name': 'newState', 'type': 'uint8', 'indexed': False}]}
+
+
+def make_log(address: str, block_number: int, log_index: int, states: tuple) -> dict:
+    # formatted StateChanged log entry as returned by web3 eth.getLogs
+    return {'address': address, 'topics': [HexBytes(event_abi_to_log_topic(state_changed_abi))],
+            'data': '0x' + encode_abi(['uint8', 'uint8'], list(states)).hex(),
+            'blockNumber': block_number, 'logIndex': log_index, 'transactionIndex': 0,
+            'transactionHash': HexBytes('0x' + '33' * 32), 'blockHash': HexBytes(block_number.to_bytes(32, 'big'))}
+
+
+class FakeEth:
+    # node answering logs requests with prepared logs of block range
+
+    def __init__(self, logs: list):
+        self.blockNumber = 10
+        self.logs = logs
+
+    def getLogs(self, params: dict):
+        return [log for log in self.logs if params['fromBlock'] <= log['blockNumber'] <= params['toBlock']]
+
+
+class TestLogCursor(unittest.TestCase):
+
+    worker = '0x5677DB552d5fd9911a5560CB0Bd40be90A70eFf2'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'log_cursor.json')
+        self.eth = FakeEth([make_log(self.worker, 11, 0, states=(1, 2)),
+                            make_log(self.worker, 11, 1, states=(2, 3)),
+                            make_log(self.worker, 12, 0, states=(3, 4))])
+
+    def dispatcher(self, callback, confirmations: int = 0, replay_blocks: int = 5) -> LogDispatcher:
+        dispatcher = LogDispatcher(SimpleNamespace(eth=self.eth),
+                                   event_source=SimpleNamespace(subscribe_new_heads=lambda callback: None),
+                                   cursor=LogCursor(self.path, key=self.worker),
+                                   confirmations=confirmations,
+                                   replay_blocks=replay_blocks)
+        dispatcher.watch(self.worker, state_changed_abi, callback)
+        self.addCleanup(dispatcher.stop)
+        return dispatcher
+
+    def test_checkpoint_resumed_after_restart(self):
+        events = []
+        dispatcher = self.dispatcher(events.append)
+        assert dispatcher.resume_block() == 10
+        dispatcher.start()
+        dispatcher.dispatch(11)
+        # new process reads state at checkpoint and replays logs of blocks mined while it was down
+        self.eth.blockNumber = 14
+        restarted = self.dispatcher(events.append)
+        assert restarted.resume_block() == 11
+        restarted.start()
+        restarted.dispatch(14)
+        assert [event['args']['newState'] for event in events] == [2, 3, 4]
+        assert restarted.cursor.block_number == 14
+        # checkpoint older than replay blocks is moved to confirmed block, state is read there
+        self.eth.blockNumber = 20
+        assert self.dispatcher(events.append).resume_block() == 20
+
+    def test_processed_logs_not_routed_on_repeated_range(self):
+        events = []
+
+        def fail_on_third(event):
+            if event['args']['newState'] == 4 and 4 not in events:
+                events.append(4)
+                raise ValueError('handler failure')
+            events.append(event['args']['newState'])
+
+        dispatcher = self.dispatcher(fail_on_third)
+        dispatcher.start(from_block=11)
+        with self.assertRaises(ValueError):
+            dispatcher.dispatch(12)
+        assert dispatcher.cursor.block_number == 11
+        # partially processed block is repeated from the failed log
+        dispatcher.dispatch(12)
+        assert events == [2, 3, 4, 4]
+        assert dispatcher.cursor.block_number == 12 and dispatcher.cursor.log_index is None
+
+    def test_duplicated_log_skipped(self):
+        cursor = LogCursor(self.path)
+        log = {'blockHash': HexBytes('0x' + '22' * 32), 'logIndex': 3, 'blockNumber': 20}
+        cursor.reset(15)
+        assert not cursor.is_processed(log)
+        cursor.processed_log(log)
+        assert cursor.is_processed(log)
+
+    def test_only_confirmed_blocks_dispatched(self):
+        events = []
+        dispatcher = self.dispatcher(events.append, confirmations=1)
+        dispatcher.start(from_block=11)
+        dispatcher.dispatch(12)
+        assert [event['args']['newState'] for event in events] == [2, 3]
+        assert dispatcher.cursor.block_number == 11
+
+    def test_hosted_worker_nodes_checkpointed_by_node(self):
+        second = '0x' + '44' * 20
+        cursor = LogCursor(self.path, keys=[self.worker, second])
+        cursor.reset(15)
+        # order of hosted worker nodes does not matter
+        assert LogCursor(self.path, keys=[second, self.worker]).load() == 15
+        # worker node added to configuration has no checkpoint yet
+        assert LogCursor(self.path, keys=[self.worker, '0x' + '55' * 20]).load() is None
+        # single node cursor reads its own checkpoint, the oldest one is resumed
+        cursor = LogCursor(self.path, key=second)
+        assert cursor.load() == 15
+        cursor.processed_block(17)
+        assert LogCursor(self.path, key=second).load() == 17
+        assert LogCursor(self.path, keys=[self.worker, second]).load() == 15
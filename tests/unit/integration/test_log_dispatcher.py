@@ -0,0 +1,85 @@
+import unittest
+
+from types import SimpleNamespace
+
+from eth_abi import encode_abi
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+
+from pynode.integration.log_dispatcher import LogDispatcher
+
+
+def event_abi(name: str, job_id_indexed: bool = None) -> dict:
+    inputs = [{'name': 'oldState', 'type': 'uint8', 'indexed': False},
+              {'name': 'newState', 'type': 'uint8', 'indexed': False}]
+    if job_id_indexed is not None:
+        inputs.insert(0, {'name': 'jobId', 'type': 'bytes32', 'indexed': job_id_indexed})
+    return {'anonymous': False, 'inputs': inputs, 'name': name, 'type': 'event'}
+
+
+def make_log(address: str, abi: dict, block_number: int, log_index: int, job_id: bytes = None, states=(1, 2)):
+    # formatted log entry as returned by web3 eth.getLogs
+    topics = [HexBytes(event_abi_to_log_topic(abi))]
+    types, values = ['uint8', 'uint8'], list(states)
+    if job_id is not None:
+        if abi['inputs'][0]['indexed']:
+            topics.append(HexBytes(job_id))
+        else:
+            types, values = ['bytes32'] + types, [job_id] + values
+    return {'address': address, 'topics': topics, 'data': '0x' + encode_abi(types, values).hex(),
+            'blockNumber': block_number, 'logIndex': log_index, 'transactionIndex': 0,
+            'transactionHash': HexBytes('0x' + '33' * 32), 'blockHash': HexBytes(block_number.to_bytes(32, 'big'))}
+
+
+class FakeEth:
+    # node answering logs requests with prepared logs of block range
+
+    def __init__(self, logs: list):
+        self.blockNumber = 10
+        self.logs = logs
+        self.requests = []
+
+    def getLogs(self, params: dict):
+        self.requests.append(params)
+        return [log for log in self.logs if params['fromBlock'] <= log['blockNumber'] <= params['toBlock']]
+
+
+class TestLogDispatcher(unittest.TestCase):
+
+    worker = '0x5677DB552d5fd9911a5560CB0Bd40be90A70eFf2'
+    controller = '0xF23F45CAA5c697c54D2E92ecBEe48855233040E1'
+    job_id = b'\x01' * 32
+    other_job_id = b'\x02' * 32
+
+    def dispatch(self, job_abi: dict) -> tuple:
+        worker_abi = event_abi('StateChanged')
+        eth = FakeEth([make_log(self.worker, worker_abi, 11, 0),
+                       make_log(self.controller, job_abi, 11, 1, self.other_job_id),
+                       make_log(self.controller, job_abi, 12, 0, self.job_id, states=(2, 3))])
+        # blocks are dispatched by test, no heads are delivered
+        dispatcher = LogDispatcher(SimpleNamespace(eth=eth),
+                                   event_source=SimpleNamespace(subscribe_new_heads=lambda callback: None))
+        worker_events, job_events = [], []
+        dispatcher.watch(self.worker, worker_abi, worker_events.append)
+        dispatcher.watch(self.controller, job_abi, job_events.append, argument_filters={'jobId': self.job_id})
+        dispatcher.start(from_block=11)
+        self.addCleanup(dispatcher.stop)
+        dispatcher.dispatch(12)
+        dispatcher.dispatch(12)
+        return eth.requests, worker_events, job_events
+
+    def test_single_request_per_block_range(self):
+        requests, worker_events, job_events = self.dispatch(event_abi('JobStateChanged', job_id_indexed=True))
+        assert len(requests) == 1
+        assert (requests[0]['fromBlock'], requests[0]['toBlock']) == (11, 12)
+        assert requests[0]['address'] == sorted([self.worker.lower(), self.controller.lower()])
+        assert len(requests[0]['topics'][0]) == 2
+        assert [event['args']['newState'] for event in worker_events] == [2]
+
+    def test_events_routed_by_indexed_job_id(self):
+        _, _, job_events = self.dispatch(event_abi('JobStateChanged', job_id_indexed=True))
+        assert [(event['args']['jobId'], event['args']['newState']) for event in job_events] == [(self.job_id, 3)]
+
+    def test_events_routed_by_not_indexed_job_id(self):
+        _, _, job_events = self.dispatch(event_abi('JobStateChanged', job_id_indexed=False))
+        assert [(event['args']['jobId'], event['args']['newState']) for event in job_events] == [(self.job_id, 3)]
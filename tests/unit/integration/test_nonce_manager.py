@@ -0,0 +1,51 @@
+import unittest
+
+from types import SimpleNamespace
+
+from pynode.integration.nonce_manager import NonceManager
+
+
+class FakeEth:
+    # pending transactions count of node
+
+    def __init__(self, count: int):
+        self.count = count
+        self.queries = 0
+
+    def getTransactionCount(self, account, block_identifier):
+        self.queries += 1
+        return self.count
+
+
+class TestNonceManager(unittest.TestCase):
+
+    def setUp(self):
+        self.eth = FakeEth(5)
+        self.nonce_manager = NonceManager(SimpleNamespace(eth=self.eth), '0xAccount')
+
+    def test_allocated_locally_after_first_sync(self):
+        assert [self.nonce_manager.allocate() for _ in range(3)] == [5, 6, 7]
+        assert self.eth.queries == 1
+
+    def test_released_last_nonce_is_reused(self):
+        self.nonce_manager.allocate()
+        nonce = self.nonce_manager.allocate()
+        self.nonce_manager.release(nonce, ValueError({'code': -32000, 'message': 'insufficient funds'}))
+        assert self.nonce_manager.allocate() == nonce
+        assert self.eth.queries == 1
+
+    def test_gap_resynchronized(self):
+        first = self.nonce_manager.allocate()
+        self.nonce_manager.allocate()
+        # first transaction is not accepted while the next one is in flight
+        self.nonce_manager.release(first)
+        self.eth.count = 5
+        assert self.nonce_manager.allocate() == 5
+        assert self.eth.queries == 2
+
+    def test_nonce_too_low_resynchronized(self):
+        nonce = self.nonce_manager.allocate()
+        # transactions were sent by the same account elsewhere
+        self.eth.count = 9
+        self.nonce_manager.release(nonce, ValueError({'code': -32000, 'message': 'nonce too low'}))
+        assert self.nonce_manager.allocate() == 9
@@ -0,0 +1,69 @@
+import time
+import threading
+import unittest
+
+from pynode.integration.progress_reporter import ProgressReporter
+
+
+class FakeSender:
+    # progress transactions sender, the first send is held until released
+
+    def __init__(self, fee: int = 10):
+        self.fee = fee
+        self.sent = []
+        self.release = threading.Event()
+        self.sending = threading.Event()
+
+    def send(self, percent: int) -> int:
+        self.sending.set()
+        self.release.wait(5)
+        self.sent.append(percent)
+        return self.fee
+
+
+class TestProgressReporter(unittest.TestCase):
+
+    def reporter(self, sender: FakeSender, interval: float = 0, gas_budget: int = 0) -> ProgressReporter:
+        reporter = ProgressReporter(sender.send, interval=interval, gas_budget=gas_budget)
+        reporter.start()
+        self.addCleanup(reporter.stop)
+        return reporter
+
+    def test_report_not_blocked_by_sending(self):
+        sender = FakeSender()
+        reporter = self.reporter(sender)
+        reporter.report(10)
+        assert sender.sending.wait(5)
+        started = time.time()
+        # updates while transaction is sent are coalesced to the latest one
+        for percent in (20, 30, 40):
+            reporter.report(percent)
+        assert time.time() - started < 0.1
+        sender.release.set()
+        self.wait_sent(sender, 2)
+        time.sleep(0.2)
+        assert sender.sent == [10, 40]
+
+    def test_reports_limited_by_interval(self):
+        sender = FakeSender()
+        sender.release.set()
+        reporter = self.reporter(sender, interval=60)
+        reporter.report(10)
+        time.sleep(0.2)
+        assert sender.sent == []
+
+    def test_reports_limited_by_gas_budget(self):
+        sender = FakeSender(fee=10)
+        sender.release.set()
+        reporter = self.reporter(sender, gas_budget=10)
+        reporter.report(10)
+        self.wait_sent(sender, 1)
+        reporter.report(20)
+        time.sleep(0.2)
+        assert sender.sent == [10]
+
+    @staticmethod
+    def wait_sent(sender: FakeSender, count: int):
+        deadline = time.time() + 5
+        while len(sender.sent) < count and time.time() < deadline:
+            time.sleep(0.01)
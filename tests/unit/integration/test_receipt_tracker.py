@@ -0,0 +1,74 @@
+import unittest
+
+from types import SimpleNamespace
+
+from pynode.integration.receipt_tracker import ReceiptTracker
+
+
+class FakeEth:
+    # node mining transactions put into receipts
+
+    def __init__(self):
+        self.blockNumber = 100
+        self.receipts = {}
+        self.queries = 0
+        self.mined_nonces = 0
+
+    def getTransactionCount(self, account, block_identifier):
+        return self.mined_nonces
+
+    def getTransactionReceipt(self, tx_hash):
+        self.queries += 1
+        return self.receipts.get(tx_hash)
+
+
+class TestReceiptTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.eth = FakeEth()
+        self.resent = []
+        self.tracker = ReceiptTracker(SimpleNamespace(eth=self.eth, providers=[object()]),
+                                      resend=self.resend, stuck_blocks=2, timeout_blocks=10)
+
+    def resend(self, transaction: dict):
+        self.resent.append(transaction)
+        return b'replacement-%d' % len(self.resent)
+
+    def test_receipts_completed_on_new_block(self):
+        receipts = []
+        first = self.tracker.track(b'first', callback=lambda receipt, transaction: receipts.append(receipt))
+        second = self.tracker.track(b'second')
+        self.eth.receipts[b'first'] = {'status': 1}
+        self.tracker.check(101)
+        assert first.result(0) == {'status': 1}
+        assert receipts == [{'status': 1}]
+        assert not second.done()
+        assert self.tracker.pending_count == 1
+
+    def test_stuck_transaction_resent_with_bumped_gas(self):
+        future = self.tracker.track(b'stuck', {'nonce': 5, 'gasPrice': 8000})
+        self.tracker.check(102)
+        assert self.resent == [{'nonce': 5, 'gasPrice': 9000}]
+        # replacement is mined
+        self.eth.receipts[b'replacement-1'] = {'status': 1}
+        self.tracker.check(103)
+        assert future.result(0) == {'status': 1}
+
+    def test_timed_out_transaction_completed_without_receipt(self):
+        future = self.tracker.track(b'dropped')
+        self.tracker.check(110)
+        assert future.result(0) is None
+        assert self.tracker.pending_count == 0
+
+    def test_timed_out_transaction_replaced_at_the_same_nonce(self):
+        self.tracker.max_bumps = 0
+        future = self.tracker.track(b'pending', {'from': '0xAccount', 'nonce': 5, 'gasPrice': 8000})
+        self.tracker.check(110)
+        # not mined transaction is resent with its nonce, tracking is continued
+        assert self.resent == [{'from': '0xAccount', 'nonce': 5, 'gasPrice': 9000}]
+        assert not future.done()
+        # nonce is taken by other transaction, no receipt of tracked hashes is expected anymore
+        self.eth.mined_nonces = 6
+        self.tracker.check(120)
+        assert future.result(0) is None
+        assert len(self.resent) == 1
@@ -0,0 +1,43 @@
+import unittest
+
+from web3 import Web3
+
+from pynode.integration.transaction_catalog import TransactionCatalog
+
+
+def function_abi(name: str, input_type: str = None) -> dict:
+    inputs = [{'name': 'value', 'type': input_type}] if input_type else []
+    return {'constant': False, 'inputs': inputs, 'name': name, 'outputs': [], 'payable': False,
+            'stateMutability': 'nonpayable', 'type': 'function'}
+
+
+class TestTransactionCatalog(unittest.TestCase):
+
+    account = Web3.toChecksumAddress('0x5677db552d5fd9911a5560cb0bd40be90a70eff2')
+    fields = {'from': account, 'nonce': 7, 'gas': 100000, 'gasPrice': 20000000000}
+
+    def setUp(self):
+        # contract functions are encoded without provider
+        self.contract = Web3().eth.contract(address=self.account,
+                                            abi=[function_abi('alive'),
+                                                 function_abi('provideResults', 'bytes'),
+                                                 function_abi('reportProgress', 'uint8'),
+                                                 function_abi('setWeights', 'uint256[]')])
+        self.catalog = TransactionCatalog()
+        for name in ('alive', 'provideResults', 'reportProgress', 'setWeights'):
+            self.catalog.register(self.contract, name)
+
+    def test_transactions_equal_to_contract_functions(self):
+        results = b'QmWATWQ7fVPP2EFGu71UkfnqhYXDYH566qy47CnJDgvs8u'
+        calls = [(self.catalog.call('alive'), self.contract.functions.alive()),
+                 (self.catalog.call('provideResults', results), self.contract.functions.provideResults(results)),
+                 (self.catalog.call('reportProgress', 42), self.contract.functions.reportProgress(42)),
+                 (self.catalog.call('setWeights', [1, 2]), self.contract.functions.setWeights([1, 2]))]
+        for call, function in calls:
+            assert call.transaction(self.fields) == function.buildTransaction(self.fields)
+
+    def test_unknown_function_rejected(self):
+        assert 'checkJobQueue' not in self.catalog
+        with self.assertRaises(ValueError):
+            self.catalog.register(self.contract, 'checkJobQueue')
+
@@ -0,0 +1,53 @@
+import unittest
+
+from types import SimpleNamespace
+
+from pynode.integration.nonce_manager import NonceManager
+from pynode.integration.transaction_stage import TransactionStage
+
+
+class FakeEth:
+    # pending transactions count of node
+
+    def __init__(self, count: int):
+        self.count = count
+
+    def getTransactionCount(self, account, block_identifier):
+        return self.count
+
+
+class TestTransactionStage(unittest.TestCase):
+
+    def setUp(self):
+        self.nonce_manager = NonceManager(SimpleNamespace(eth=FakeEth(5)), '0xAccount')
+        self.stage = TransactionStage(self.nonce_manager)
+
+    def stage_transaction(self, name: str, gas_price: int = 20):
+        transaction = {'nonce': self.nonce_manager.peek(), 'gasPrice': gas_price}
+        self.stage.stage(name, transaction, 'signed ' + name)
+
+    def test_staged_transaction_takes_its_nonce(self):
+        self.stage_transaction('acceptAssignment')
+        assert self.stage.take('acceptAssignment', 20) == ({'nonce': 5, 'gasPrice': 20}, 'signed acceptAssignment')
+        assert self.nonce_manager.allocate() == 6
+        # staged transaction is sent once
+        assert self.stage.take('acceptAssignment', 20) is None
+
+    def test_staged_transaction_discarded_after_other_transaction(self):
+        self.stage_transaction('processToCognition')
+        # path changed, other transaction took the nonce
+        self.nonce_manager.allocate()
+        assert self.stage.take('processToCognition', 20) is None
+        assert self.nonce_manager.allocate() == 6
+
+    def test_underpriced_transaction_discarded(self):
+        self.stage_transaction('acceptAssignment', gas_price=20)
+        assert self.stage.take('acceptAssignment', 30) is None
+        assert self.nonce_manager.allocate() == 5
+
+    def test_not_taken_path_discarded(self):
+        self.stage_transaction('acceptAssignment')
+        self.stage_transaction('processToCognition')
+        self.stage.discard(keep='processToCognition')
+        assert self.stage.take('acceptAssignment', 20) is None
+        assert self.stage.take('processToCognition', 20) is not None
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from queue import Queue
+
+from pynode.core.job.job_context import JobContext
+from pynode.core.processor.processor import Processor
+from pynode.integration.ipfs_service import IpfsService
+from pynode.integration.dummy.ipfs_connector import IpfsConnectorDummy
+
+
+class TestJobContext(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = os.path.join(directory.name, 'jobs')
+
+    def create_job(self, job_id_hex: str, files: list) -> JobContext:
+        job = JobContext(job_id_hex)
+        job.create_workspace(self.root)
+        for name in files:
+            with open(os.path.join(job.workspace, name), 'w') as job_file:
+                job_file.write(name)
+        return job
+
+    def test_clean_up_removes_only_job_files(self):
+        committed = self.create_job('0x01', ['QmModel', 'QmData', '0x01.out.h5'])
+        validated = self.create_job('0x02', ['QmModel', 'QmData'])
+        processor = Processor(ipfs_api=None, processor_id='node:0x01', delegate=None,
+                              workspace=committed.workspace, job_id_hex='0x01')
+        processor.clean_up()
+        assert os.listdir(committed.workspace) == ['0x01.out.h5']
+        assert sorted(os.listdir(validated.workspace)) == ['QmData', 'QmModel']
+
+    def test_clean_up_without_workspace_keeps_files(self):
+        job = self.create_job('0x01', ['QmModel'])
+        processor = Processor(ipfs_api=None, processor_id='node:0x01', delegate=None, job_id_hex='0x01')
+        cwd = os.getcwd()
+        self.addCleanup(os.chdir, cwd)
+        os.chdir(job.workspace)
+        processor.clean_up()
+        assert os.listdir(job.workspace) == ['QmModel']
+
+    def test_job_files_resolved_in_workspace(self):
+        job = self.create_job('0x01', [])
+        processor = Processor(ipfs_api=IpfsService(strategic=IpfsConnectorDummy()), processor_id='node:0x01',
+                              delegate=None, workspace=job.workspace, job_id_hex='0x01')
+        processor.prefetch_kernel({'model': 'QmModel', 'weights': ''})
+        processor.prefetch_dataset({'batches': ['QmBatch']}, batch=0)
+        assert processor.kernel.file_path('QmModel') == os.path.join(self.root, '0x01', 'QmModel')
+        assert processor.dataset.file_path('QmBatch') == os.path.join(self.root, '0x01', 'QmBatch')
+
+    def test_listener_stopped_on_close(self):
+        job = self.create_job('0x01', [])
+        handled = Queue()
+
+        def listener(context: JobContext, events: Queue):
+            while context.listening:
+                handled.put(events.get())
+
+        events = Queue()
+        job.listen(listener, events)
+        events.put('event')
+        assert handled.get(timeout=5) == 'event'
+        job.close()
+        events.put('last event')
+        job.event_thread.join(5)
+        assert not job.event_thread.is_alive()
+
+    def test_workspace_removed_with_results(self):
+        job = self.create_job('0x01', ['QmModel', '0x01.out.h5'])
+        other = self.create_job('0x02', ['QmModel'])
+        job.remove_workspace()
+        assert os.listdir(self.root) == ['0x02']
+        assert os.listdir(other.workspace) == ['QmModel']
+        # released twice by failure paths
+        job.remove_workspace()
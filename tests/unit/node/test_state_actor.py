@@ -0,0 +1,83 @@
+import time
+import threading
+import unittest
+
+from queue import Queue
+
+from core.node.worker_node import WorkerNode, WorkerNodeDelegate
+from core.patterns.state_actor import StateActor
+
+
+class ComputingNode(WorkerNodeDelegate):
+    # worker node delegate computing job on state actor executor until released
+
+    def __init__(self):
+        self.worker_node = WorkerNode(delegate=self, contract_container='')
+        self.actor = StateActor(handler=self.on_event)
+        self.release = threading.Event()
+        self.handled = Queue()
+        self.completions = Queue()
+
+    def on_event(self, event: dict):
+        self.worker_node.state = event['newState']
+        self.handled.put((event['newState'], time.time() - event['posted']))
+
+    def post(self, new_state: int):
+        self.actor.post({'newState': new_state, 'posted': time.time()})
+
+    def compute(self) -> str:
+        self.release.wait(5)
+        return 'results'
+
+    def on_computed(self, result, error):
+        self.completions.put((result, error, self.worker_node.state, threading.current_thread()))
+
+    def create_cognitive_job(self):
+        pass
+
+    def start_validating(self):
+        pass
+
+    def start_computing(self):
+        self.actor.submit(self.compute, self.on_computed)
+
+    def state_transact(self, name: str):
+        pass
+
+
+class TestStateActor(unittest.TestCase):
+
+    def setUp(self):
+        self.node = ComputingNode()
+        self.node.worker_node.state = WorkerNode.READY_FOR_COMPUTING
+        self.node.actor.start()
+        self.addCleanup(self.node.actor.stop)
+        self.addCleanup(self.node.release.set)
+
+    def test_events_consumed_while_job_computes(self):
+        self.node.post(WorkerNode.COMPUTING)
+        assert self.node.handled.get(timeout=1)[0] == WorkerNode.COMPUTING
+        # job is computing, next event is handled without waiting for it
+        self.node.post(WorkerNode.OFFLINE)
+        new_state, latency = self.node.handled.get(timeout=1)
+        assert new_state == WorkerNode.OFFLINE
+        assert latency < 0.5
+        assert self.node.completions.empty()
+
+    def test_completion_handled_by_state_thread(self):
+        self.node.post(WorkerNode.COMPUTING)
+        self.node.handled.get(timeout=1)
+        self.node.release.set()
+        result, error, state, thread = self.node.completions.get(timeout=5)
+        assert (result, error, state) == ('results', None, WorkerNode.COMPUTING)
+        assert thread is self.node.actor
+
+    def test_work_failure_reported_as_error(self):
+        completions = Queue()
+
+        def fail():
+            raise ValueError('download failure')
+
+        self.node.actor.submit(fail, lambda result, error: completions.put((result, error)))
+        result, error = completions.get(timeout=5)
+        assert result is None and isinstance(error, ValueError)
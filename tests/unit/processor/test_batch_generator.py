@@ -0,0 +1,77 @@
+import os
+import h5py
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from pynode.core.processor.entities.batch_generator import BatchGenerator
+
+
+class TestBatchGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, 'dataset.h5')
+        self.x = np.arange(250, dtype=np.float32).reshape(125, 2)
+        self.y = np.arange(125, dtype=np.uint8)
+        with h5py.File(self.file_path, 'w') as h5f:
+            h5f.create_dataset('train_x', data=self.x, chunks=(10, 2), compression='gzip')
+        self.h5f = h5py.File(self.file_path, 'r')
+
+    def tearDown(self):
+        self.h5f.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_prediction_batches_order(self):
+        generator = BatchGenerator(self.h5f['train_x'], batch_size=20, prefetch=3)
+        assert generator.steps == 7
+        batches = [next(generator) for _ in range(generator.steps)]
+        generator.close()
+        assert batches[-1].shape == (5, 2)
+        assert np.array_equal(np.concatenate(batches), self.x)
+
+    def test_generator_loops_over_epochs(self):
+        generator = BatchGenerator(self.x, self.y, batch_size=50)
+        batches = [next(generator) for _ in range(generator.steps * 2)]
+        generator.close()
+        first, second = batches[:3], batches[3:]
+        for (x1, y1), (x2, y2) in zip(first, second):
+            assert np.array_equal(x1, x2)
+            assert np.array_equal(y1, y2)
+
+    def test_shuffle_keeps_pairs(self):
+        generator = BatchGenerator(self.h5f['train_x'], self.y, batch_size=16, shuffle=True)
+        batches = [next(generator) for _ in range(generator.steps)]
+        generator.close()
+        x = np.concatenate([batch[0] for batch in batches])
+        y = np.concatenate([batch[1] for batch in batches])
+        # every row is used once per epoch and stays paired with its label
+        assert sorted(y.tolist()) == self.y.tolist()
+        assert np.array_equal(x[:, 0], y.astype(np.float32) * 2)
+
+    def test_shuffle_permutes_rows_over_epoch(self):
+        np.random.seed(5)
+        generator = BatchGenerator(self.h5f['train_x'], self.y, batch_size=25, start=25, shuffle=True)
+        epochs = [[next(generator) for _ in range(generator.steps)] for _ in range(2)]
+        generator.close()
+        first = np.concatenate([y for _, y in epochs[0]])
+        second = np.concatenate([y for _, y in epochs[1]])
+        assert sorted(first.tolist()) == list(range(25, 125))
+        # rows are not kept in their contiguous batches, every epoch has its own order
+        assert any(y.max() - y.min() >= 25 for _, y in epochs[0])
+        assert not np.array_equal(first, second)
+
+    def test_validation_split(self):
+        split_at = BatchGenerator.split(125, 0.2)
+        assert split_at == 100
+        assert BatchGenerator.split(125, 0) == 125
+        train = BatchGenerator(self.x, self.y, batch_size=32, stop=split_at)
+        validation = BatchGenerator(self.x, self.y, batch_size=32, start=split_at)
+        assert train.steps == 4
+        assert validation.steps == 1
+        x, y = next(validation)
+        train.close()
+        validation.close()
+        assert np.array_equal(x, self.x[100:])
+        assert np.array_equal(y, self.y[100:])
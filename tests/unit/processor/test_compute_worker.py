@@ -0,0 +1,185 @@
+import os
+import time
+import unittest
+
+from threading import Event
+from types import SimpleNamespace
+from pynode.core.processor.compute_worker import ComputeSupervisor
+
+
+def echo_worker(conn, settings):
+    # fake worker completing every computation
+    while True:
+        command = conn.recv()
+        if command[0] == 'stop':
+            break
+        if command[0] == 'compute':
+            conn.send(('delegate', 'processor_computing_complete',
+                       {'processor_id': command[1], 'results_file': 'QmResult'}))
+
+
+def progress_worker(conn, settings):
+    # fake worker reporting progress of slow computation
+    while True:
+        command = conn.recv()
+        if command[0] == 'stop':
+            break
+        if command[0] == 'compute':
+            time.sleep(0.2)
+            conn.send(('delegate', 'on_epoch_end', {'epoch': 1, 'epochs': 1, 'logs': {}}))
+            conn.send(('delegate', 'processor_computing_complete',
+                       {'processor_id': command[1], 'results_file': 'QmResult'}))
+
+
+class NodeDelegate:
+    # broker of one hosted worker node
+
+    def __init__(self, calls: list, called: Event):
+        self.calls = calls
+        self.called = called
+
+    def on_epoch_end(self, epoch, epochs, logs):
+        self.calls.append('progress')
+
+    def processor_computing_complete(self, processor_id: str, results_file: str):
+        self.calls.append(processor_id)
+        self.called.set()
+
+
+def settings_worker(conn, settings):
+    # fake worker computing with configuration received from broker process
+    assert 'vault_key' not in settings
+    while True:
+        command = conn.recv()
+        if command[0] == 'stop':
+            break
+        if command[0] == 'compute':
+            conn.send(('delegate', 'processor_computing_complete',
+                       {'processor_id': command[1], 'results_file': settings['ipfs_host']}))
+
+
+def crash_worker(conn, settings):
+    # fake worker dying inside computation
+    while True:
+        command = conn.recv()
+        if command[0] == 'compute':
+            os._exit(1)
+
+
+def tuning_worker(conn, settings):
+    # fake worker probing inference throughput in its own spawned process
+    import keras
+    import numpy as np
+    from pynode.core.processor.entities.inference_tuner import InferenceTuner
+    json_model = keras.models.Sequential([keras.layers.Dense(4, input_shape=(8,))]).to_json()
+    tuner = InferenceTuner(batch_sizes=(16, 32), thread_counts=(1,))
+    while True:
+        command = conn.recv()
+        if command[0] == 'stop':
+            break
+        if command[0] == 'compute':
+            throughputs = tuner.probe(json_model, np.zeros((64, 8), dtype=np.float32), (1,))
+            conn.send(('delegate', 'processor_computing_complete',
+                       {'processor_id': command[1], 'results_file': len(throughputs)}))
+
+
+class TestComputeSupervisor(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.called = Event()
+        self.processor = SimpleNamespace(id='node:0x01', job_id_hex='0x01', workspace='/tmp/jobs/0x01',
+                                         kernel=SimpleNamespace(json_kernel={'model': 'QmModel'}),
+                                         dataset=SimpleNamespace(json_dataset={}, batch_no=0))
+        self.supervisor = None
+
+    def tearDown(self):
+        if self.supervisor is not None:
+            self.supervisor.stop()
+
+    # delegate methods
+    def processor_computing_complete(self, processor_id: str, results_file: str):
+        self.calls.append(('complete', processor_id, results_file))
+        self.called.set()
+
+    def processor_computing_failure(self, processor_id: str):
+        self.calls.append(('failure', processor_id))
+        self.called.set()
+
+    def start_supervisor(self, worker):
+        # all workers run fake loop, including replacement spares
+        self.supervisor = ComputeSupervisor(delegate=self, poll_interval=0.1, worker_target=worker)
+        self.supervisor.start()
+
+    def test_computing_result_dispatched_to_delegate(self):
+        self.start_supervisor(echo_worker)
+        pid = self.supervisor.active.process.pid
+        self.supervisor.compute(self.processor)
+        assert self.called.wait(5)
+        assert self.calls == [('complete', 'node:0x01', 'QmResult')]
+        assert self.supervisor.active.process.pid == pid
+        assert self.supervisor.active.pending is None
+
+    def test_crashed_worker_replaced_by_spare(self):
+        self.start_supervisor(crash_worker)
+        pid = self.supervisor.active.process.pid
+        self.supervisor.compute(self.processor)
+        assert self.called.wait(5)
+        assert self.calls == [('failure', 'node:0x01')]
+        assert self.supervisor.active.process.pid != pid
+        assert self.supervisor.active.is_alive()
+        assert self.supervisor.replaced_workers == 1
+
+    def test_worker_nodes_jobs_queued_and_routed_by_node(self):
+        self.start_supervisor(progress_worker)
+        first_calls, second_calls = [], []
+        first_done, second_done = Event(), Event()
+        self.supervisor.register_delegate('0xFirst', NodeDelegate(first_calls, first_done))
+        self.supervisor.register_delegate('0xSecond', NodeDelegate(second_calls, second_done))
+        second_processor = SimpleNamespace(**dict(vars(self.processor), id='0xsecond:0x02', job_id_hex='0x02'))
+        self.processor.id = '0xfirst:0x01'
+        self.supervisor.compute(self.processor)
+        self.supervisor.compute(second_processor)
+        # the second job waits for the first one computed by active worker
+        assert self.supervisor.queued() == 1
+        assert first_done.wait(5) and second_done.wait(5)
+        assert first_calls == ['progress', '0xfirst:0x01']
+        assert second_calls == ['progress', '0xsecond:0x02']
+        assert self.supervisor.queued() == 0
+
+    def test_workers_started_from_forkserver_with_configuration(self):
+        self.supervisor = ComputeSupervisor(delegate=self, poll_interval=0.1, worker_target=settings_worker)
+        # configured values are set on manager instance by launcher
+        manager = self.supervisor.manager
+        manager.ipfs_host = 'http://ipfs.local'
+        manager.vault_key = 'secret'
+        self.addCleanup(vars(manager).pop, 'ipfs_host')
+        self.addCleanup(vars(manager).pop, 'vault_key')
+        self.supervisor.start()
+        assert self.supervisor.context.get_start_method() == 'forkserver'
+        self.supervisor.compute(self.processor)
+        assert self.called.wait(5)
+        assert self.calls == [('complete', 'node:0x01', 'http://ipfs.local')]
+
+    def test_inference_probed_inside_worker(self):
+        self.start_supervisor(tuning_worker)
+        self.supervisor.compute(self.processor)
+        assert self.called.wait(120)
+        assert self.calls == [('complete', 'node:0x01', 2)]
+        assert self.supervisor.replaced_workers == 0
+
+    def test_warmed_up_worker_starts_prediction_workers(self):
+        self.supervisor = ComputeSupervisor(delegate=self, poll_interval=0.1)
+        manager = self.supervisor.manager
+        manager.prediction_processes = 2
+        self.addCleanup(vars(manager).pop, 'prediction_processes')
+        self.supervisor.start()
+        worker = self.supervisor.active
+        self.supervisor.warm_up()
+        # real worker loads keras backend and spawns its prediction workers
+        deadline = time.time() + 120
+        while worker.prediction_workers is None and time.time() < deadline:
+            time.sleep(0.5)
+        assert worker.prediction_workers == 2
+        assert self.supervisor.active is worker
+        assert self.supervisor.replaced_workers == 0
@@ -0,0 +1,68 @@
+import os
+import h5py
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from pynode.core.processor.entities.dataset_loader import DatasetLoader
+
+
+class TestDatasetLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, 'dataset.h5')
+        self.contiguous = np.arange(600, dtype=np.float32).reshape(200, 3)
+        self.compressed = (np.arange(1000) % 250).astype(np.uint8).reshape(100, 10)
+        with h5py.File(self.file_path, 'w') as h5f:
+            h5f.create_dataset('train_x', data=self.contiguous)
+            h5f.create_dataset('train_y', data=self.compressed, chunks=(16, 10), compression='gzip')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_memory_map_contiguous_dataset(self):
+        loader = DatasetLoader(mode=DatasetLoader.MODE_MMAP)
+        data = loader.load(self.file_path, 'train_x')
+        assert isinstance(data, np.memmap)
+        assert data.dtype == np.float32
+        assert np.array_equal(data, self.contiguous)
+        assert loader.resident_bytes == 0
+
+    def test_chunked_read_of_compressed_dataset(self):
+        loader = DatasetLoader(mode=DatasetLoader.MODE_MMAP)
+        data = loader.load(self.file_path, 'train_y')
+        assert not isinstance(data, np.memmap)
+        assert data.dtype == np.uint8
+        assert np.array_equal(data, self.compressed)
+        assert loader.resident_bytes == self.compressed.nbytes
+
+    def test_memory_mode(self):
+        loader = DatasetLoader(mode=DatasetLoader.MODE_MEMORY)
+        loader.read_block_size = 100  # force several blocks reading
+        data = loader.load(self.file_path, 'train_x')
+        assert not isinstance(data, np.memmap)
+        assert data.dtype == np.float32
+        assert np.array_equal(data, self.contiguous)
+        assert loader.resident_bytes == self.contiguous.nbytes
+
+    def test_process_resident_bytes(self):
+        assert DatasetLoader.process_resident_bytes() > 0
+
+    def test_peak_resident_bytes_counts_released_memory(self):
+        DatasetLoader.reset_peak_resident_bytes()
+        before = DatasetLoader.process_resident_bytes()
+        # memory touched and released between samples
+        block = np.ones(64 * 1024 * 1024, dtype=np.uint8)
+        del block
+        assert DatasetLoader.process_peak_resident_bytes() >= before + 60 * 1024 * 1024
+
+    def test_stream_compressed_dataset(self):
+        loader = DatasetLoader(mode=DatasetLoader.MODE_STREAM)
+        data = loader.load(self.file_path, 'train_y')
+        assert isinstance(data, h5py.Dataset)
+        assert np.array_equal(data[10:20], self.compressed[10:20])
+        assert loader.resident_bytes == 0
+        loader.close()
+        assert loader.files == []
@@ -0,0 +1,125 @@
+import os
+import time
+import tempfile
+import unittest
+import numpy as np
+
+from unittest import mock
+
+from pynode.core.processor.entities.inference_tuner import InferenceTuner, InferenceSettings
+
+
+class TestInferenceTuner(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'inference_tuning.json')
+        self.rows = np.zeros((300, 16), dtype=np.float32)
+        # throughput of (batch size, threads) pairs, the best one is batch 64 on 2 threads
+        self.throughputs = [(32, 1, 100.0), (64, 1, 150.0), (32, 2, 120.0), (64, 2, 300.0)]
+
+    def tearDown(self):
+        InferenceTuner._InferenceTuner__instance = None
+
+    def tuner(self, **kwargs) -> InferenceTuner:
+        InferenceTuner._InferenceTuner__instance = None
+        return InferenceTuner(path=self.path, batch_sizes=(32, 64), thread_counts=(1, 2), **kwargs)
+
+    def model_file(self) -> str:
+        import keras
+        model = keras.models.Sequential([keras.layers.Dense(8, input_shape=(16,))])
+        model_file = os.path.join(self.directory, 'QmModel')
+        with open(model_file, 'w') as json_file:
+            json_file.write(model.to_json())
+        return model_file
+
+    def test_tuned_in_background_persisted_and_reused(self):
+        tuner = self.tuner()
+        model_file = self.model_file()
+        with mock.patch.object(tuner, 'probe', return_value=self.throughputs) as probe:
+            # the first job is computed with default settings
+            assert tuner.settings('QmModel', self.rows) == tuner.default
+            assert tuner.tune_later('QmModel', model_file, self.rows)
+            # probing waits for idle compute worker
+            assert tuner.settings('QmModel', self.rows) == tuner.default and probe.call_count == 0
+            tuner.tune_idle().join()
+            assert tuner.settings('QmModel', self.rows) == InferenceSettings(64, 2, 1)
+            assert not tuner.tune_later('QmModel', model_file, self.rows)
+        assert probe.call_count == 1
+        # settings are read by next process for the same kernel and input shape
+        restarted = self.tuner()
+        assert restarted.settings('QmModel', self.rows) == InferenceSettings(64, 2, 1)
+        assert not restarted.tune_later('QmModel', model_file, self.rows)
+
+    def test_session_threads_tuned_once_per_host(self):
+        tuner = self.tuner()
+        model_file = self.model_file()
+        with mock.patch.object(tuner, 'probe', return_value=self.throughputs):
+            tuner.tune_later('QmModel', model_file, self.rows)
+            tuner.tune_idle().join()
+        # other kernel is probed with session threads of host, its best threads are not applied
+        with mock.patch.object(tuner, 'probe', return_value=[(32, 2, 200.0), (64, 2, 100.0)]) as probe:
+            tuner.tune_later('QmOther', model_file, self.rows)
+            tuner.tune_idle().join()
+        assert probe.call_args[0][2] == (2,)
+        assert tuner.settings('QmOther', self.rows) == InferenceSettings(32, 2, 1)
+        assert tuner.settings('QmModel', self.rows) == InferenceSettings(64, 2, 1)
+
+    def test_configured_values_override_tuned(self):
+        tuner = self.tuner(overrides=InferenceSettings(0, 4, 4))
+        model_file = self.model_file()
+        with mock.patch.object(tuner, 'probe', return_value=self.throughputs) as probe:
+            tuner.tune_later('QmModel', model_file, self.rows)
+            tuner.tune_idle().join()
+            assert tuner.settings('QmModel', self.rows) == InferenceSettings(64, 4, 4)
+        # configured threads are pinned
+        assert probe.call_args[0][2] == (4,)
+        # nothing to tune when every value is configured
+        tuner = self.tuner(overrides=InferenceSettings(128, 8, 4))
+        assert not tuner.tune_later('QmModel', model_file, self.rows)
+        assert tuner.settings('QmModel', self.rows) == InferenceSettings(128, 8, 4)
+
+    def test_probe_failure_keeps_default(self):
+        tuner = self.tuner()
+        model_file = self.model_file()
+        with mock.patch.object(tuner, 'probe', side_effect=TimeoutError()) as probe:
+            tuner.tune_later('QmModel', model_file, self.rows)
+            tuner.tune_idle().join()
+            # failed kernel is not probed after every job
+            assert not tuner.tune_later('QmModel', model_file, self.rows)
+        assert probe.call_count == 1
+        assert tuner.settings('QmModel', self.rows) == tuner.default
+        assert not os.path.exists(self.path)
+
+    def test_interrupted_probe_continued_when_idle(self):
+        tuner = self.tuner()
+        model_file = self.model_file()
+        with mock.patch.object(tuner, 'probe', return_value=None):
+            tuner.tune_later('QmModel', model_file, self.rows)
+            tuner.tune_idle().join()
+        # interrupted tuning stays scheduled and is not counted as failed
+        assert tuner.pending
+        with mock.patch.object(tuner, 'probe', return_value=self.throughputs):
+            tuner.tune_idle().join()
+        assert not tuner.pending
+        assert tuner.settings('QmModel', self.rows) == InferenceSettings(64, 2, 1)
+
+    def test_probe_interrupted_by_command(self):
+        tuner = self.tuner()
+        tuner.tune_later('QmModel', self.model_file(), self.rows)
+        started = time.time()
+        tuning = tuner.tune_idle()
+        tuner.interrupt()
+        # spawned probe is terminated without waiting for its throughputs
+        assert not tuning.is_alive()
+        assert time.time() - started < tuner.timeout
+        assert tuner.pending and tuner.probes == 0
+
+    def test_throughput_probed_in_spawned_process(self):
+        with open(self.model_file(), 'r') as json_file:
+            throughputs = self.tuner().probe(json_file.read(), self.rows, (1, 2))
+        assert sorted((batch_size, threads) for batch_size, threads, _ in throughputs) == \
+            [(32, 1), (32, 2), (64, 1), (64, 2)]
+        assert all(rows_per_second > 0 for _, _, rows_per_second in throughputs)
@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+
+from unittest import mock
+
+from pynode.core.processor.entities.model_pool import ModelPool
+
+
+class FakeModel:
+
+    def __init__(self, size: int):
+        self.weights = [np.zeros(size, dtype=np.uint8)]
+
+    def get_weights(self):
+        return [w.copy() for w in self.weights]
+
+    def set_weights(self, weights):
+        self.weights = [w.copy() for w in weights]
+
+
+class TestModelPool(unittest.TestCase):
+
+    def setUp(self):
+        ModelPool._ModelPool__instance = None
+        self.pool = ModelPool(budget_bytes=1000, recycle_threshold=2)
+        self.builds = 0
+
+    def tearDown(self):
+        ModelPool._ModelPool__instance = None
+
+    def build(self, size: int = 100):
+        self.builds += 1
+        return FakeModel(size)
+
+    def test_reuse_restores_initial_weights(self):
+        key = ('QmModel', 'mse', 'sgd')
+        model = self.pool.acquire(key, self.build)
+        model.weights[0][:] = 7  # job weights loading
+        self.pool.release(key, model)
+        reused = self.pool.acquire(key, self.build)
+        assert reused is model
+        assert self.builds == 1
+        assert not reused.weights[0].any()
+        assert self.pool.hits == 1
+
+    def test_busy_model_is_not_shared(self):
+        key = ('QmModel', 'mse', 'sgd')
+        first = self.pool.acquire(key, self.build)
+        second = self.pool.acquire(key, self.build)
+        assert first is not second
+        assert self.builds == 2
+
+    def test_compile_options_are_part_of_key(self):
+        model = self.pool.acquire(('QmModel', 'mse', 'sgd'), self.build)
+        self.pool.release(('QmModel', 'mse', 'sgd'), model)
+        other = self.pool.acquire(('QmModel', 'mse', 'adam'), self.build)
+        assert other is not model
+
+    def test_budget_eviction(self):
+        for address in ('QmA', 'QmB', 'QmC'):
+            key = (address, 'mse', 'sgd')
+            self.pool.release(key, self.pool.acquire(key, lambda: self.build(size=200)))
+        # each model takes 400 bytes (weights and snapshot)
+        assert self.pool.total_bytes == 800
+        assert self.pool.stale_models == 1
+        self.pool.acquire(('QmB', 'mse', 'sgd'), self.build)
+        assert self.pool.hits == 1
+
+    def test_invalidated_models_recycle_session(self):
+        key = ('QmModel', 'mse', 'sgd')
+        with mock.patch.object(ModelPool, 'clear_session') as clear_session:
+            for _ in range(2):
+                self.pool.release(key, self.pool.acquire(key, self.build), reusable=False)
+            assert self.pool.stale_models == 2
+            clear_session.assert_not_called()
+            self.pool.acquire(key, self.build)
+            clear_session.assert_called_once_with()
+        assert self.pool.stale_models == 0
+        assert self.builds == 3
+
+    def test_session_threads_configured_when_pool_is_idle(self):
+        key = ('QmModel', 'mse', 'sgd')
+        model = self.pool.acquire(key, self.build)
+        with mock.patch.object(ModelPool, 'clear_session'), \
+                mock.patch.object(ModelPool, 'set_session') as set_session:
+            # busy model lives in current session
+            assert not self.pool.configure_session(2, 1)
+            self.pool.release(key, model)
+            assert self.pool.configure_session(2, 1)
+            assert self.pool.configure_session(2, 1)
+            set_session.assert_called_once_with(2, 1)
+            # recycled session keeps configured threads
+            self.pool.recycle()
+            assert set_session.call_count == 2
+        assert self.pool.session_threads == (2, 1)
+        assert self.pool.total_bytes == 0
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from types import SimpleNamespace
+from unittest import mock
+
+from pynode.core.processor.entities.kernel import Kernel
+from pynode.core.processor.entities.prediction_pool import PredictionPool, PredictionModel
+
+
+def save_model(directory: str, features: int, outputs: int) -> PredictionModel:
+    import keras
+    model = keras.models.Sequential([keras.layers.Dense(256, activation='relu', input_shape=(features,)),
+                                     keras.layers.Dense(outputs, activation='softmax')])
+    model_file = os.path.join(directory, 'QmModel')
+    weights_file = os.path.join(directory, 'QmWeights')
+    with open(model_file, 'w') as json_file:
+        json_file.write(model.to_json())
+    model.save_weights(weights_file)
+    return PredictionModel(key=('QmModel', 'QmWeights'), model_file=model_file, weights_file=weights_file)
+
+
+def predict_in_process(model_spec: PredictionModel, rows, batch_size: int) -> np.ndarray:
+    import keras
+    with open(model_spec.model_file, 'r') as json_file:
+        model = keras.models.model_from_json(json_file.read())
+    model.load_weights(model_spec.weights_file)
+    return model.predict(np.asarray(rows), batch_size=batch_size)
+
+
+class TestPredictionPool(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.pool = None
+
+    def tearDown(self):
+        if self.pool is not None:
+            self.pool.stop()
+        PredictionPool._PredictionPool__instance = None
+
+    def start_pool(self, processes: int) -> PredictionPool:
+        PredictionPool._PredictionPool__instance = None
+        self.pool = PredictionPool(processes=processes)
+        return self.pool
+
+    def memory_mapped_rows(self, rows_count: int, features: int) -> np.ndarray:
+        path = os.path.join(self.directory, 'rows.npy')
+        np.save(path, np.random.RandomState(1).rand(rows_count, features).astype(np.float32))
+        return np.load(path, mmap_mode='r')
+
+    def test_shards_are_whole_batches_in_rows_order(self):
+        assert PredictionPool.shards(1000, 3, 100) == [(0, 300), (300, 600), (600, 1000)]
+        assert PredictionPool.shards(250, 4, 100) == [(0, 100), (100, 200), (200, 250)]
+        assert PredictionPool.shards(50, 2, 100) == [(0, 50)]
+
+    def test_memory_mapped_rows_shared_without_copy(self):
+        rows = self.memory_mapped_rows(10, 4)
+        shared, temporary_file = PredictionPool.share(rows, self.directory)
+        assert temporary_file is None and shared.path == rows.filename
+        # slice of memory-mapped rows and in-memory rows are written to workspace file
+        for copied in (rows[2:], np.array(rows)):
+            shared, temporary_file = PredictionPool.share(copied, self.directory)
+            assert temporary_file and os.path.dirname(temporary_file) == self.directory
+            assert np.array_equal(np.load(temporary_file, mmap_mode='r'), copied)
+            os.remove(temporary_file)
+
+    def test_sharded_prediction_matches_single_process(self):
+        model = save_model(self.directory, features=16, outputs=4)
+        rows = self.memory_mapped_rows(1050, 16)
+        expected = predict_in_process(model, rows, batch_size=100)
+        pool = self.start_pool(processes=2)
+        assert np.allclose(pool.predict(model, rows, batch_size=100), expected, atol=1e-6)
+        # in-memory rows are shared by temporary workspace file removed after prediction
+        assert np.allclose(pool.predict(model, np.array(rows), 100, directory=self.directory), expected, atol=1e-6)
+        assert sorted(os.listdir(self.directory)) == ['QmModel', 'QmWeights', 'rows.npy']
+
+    def test_sharded_prediction_kernel_model_not_built(self):
+        save_model(self.directory, features=16, outputs=4)
+        self.start_pool(processes=2)
+        kernel = Kernel(kernel_file={}, ipfs_api=None, delegate=None, workspace=self.directory)
+        kernel.model_address = 'QmModel'
+        assert kernel.is_prediction_sharded(SimpleNamespace(dataset=np.zeros((200, 16))))
+        assert not kernel.is_prediction_sharded(SimpleNamespace(dataset=np.zeros((150, 16))))
+        with mock.patch.object(kernel, 'build_model') as build_model:
+            assert kernel.validate_model()
+        assert not build_model.called
+        with open(os.path.join(self.directory, 'QmModel'), 'w') as json_file:
+            json_file.write('{"weights": []}')
+        assert not kernel.validate_model()
@@ -1,6 +1,8 @@
 import unittest
 import json
 import os
+import sys
+import subprocess
 
 from pynode.core.processor.processor import Processor, ProcessorDelegate
 from pynode.integration.ipfs_service import IpfsService
@@ -155,6 +157,13 @@ class TestProcessor(unittest.TestCase, ProcessorDelegate):
             processor.kernel.model_address = '../tests/data/test_model_1'
         processor.load()
 
+    def test_processor_import_is_lazy(self):
+        # keras/tensorflow and h5py are imported on first use only
+        script = 'import sys; import pynode.core.processor.processor; ' \
+                 'print(\'keras\' in sys.modules, \'h5py\' in sys.modules)'
+        output = subprocess.check_output([sys.executable, '-c', script])
+        assert output.split() == [b'False', b'False']
+
     # ------------------------------------
     # test processor delegate
     # ------------------------------------
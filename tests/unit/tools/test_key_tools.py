@@ -0,0 +1,88 @@
+import os
+import time
+import tempfile
+import unittest
+
+from base64 import b64encode
+from hashlib import md5
+from unittest import mock
+
+from Crypto.Cipher import AES
+
+from pynode.service.tools.key_tools import KeyTools
+
+
+class TestKeyTools(unittest.TestCase):
+
+    password = 'vault password'
+    account = '0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf'
+    private_key = '0x' + '00' * 31 + '01'
+
+    def setUp(self):
+        self.key_tools = KeyTools()
+        # vault encrypted the same way as pynode vault is
+        key = md5(self.password.encode('utf8')).hexdigest().encode('utf8')
+        iv = os.urandom(16)
+        data = self.key_tools.pad(self.account + '_' + self.private_key).encode('utf8')
+        self.vault_data = b64encode(iv + AES.new(key, AES.MODE_CBC, iv).encrypt(data))
+        vault = tempfile.NamedTemporaryFile(delete=False)
+        vault.write(self.vault_data)
+        vault.close()
+        self.addCleanup(os.remove, vault.name)
+        self.key_tools.vault_path = vault.name
+        self.transaction = {'to': self.account, 'value': 0, 'gas': 21000, 'gasPrice': 1, 'nonce': 0}
+
+    def tearDown(self):
+        self.key_tools.lock()
+
+    def test_vault_decrypted_once_per_session(self):
+        with mock.patch.object(self.key_tools, 'obtain_key', wraps=self.key_tools.obtain_key) as obtain_key:
+            assert self.key_tools.unlock(self.password)
+            first = self.key_tools.sign_transaction(self.transaction, self.password)
+            second = self.key_tools.sign_transaction(self.transaction, self.password)
+        assert obtain_key.call_count == 1
+        assert first.rawTransaction == second.rawTransaction
+
+    def test_vault_account_known_after_unlock(self):
+        assert self.key_tools.vault_account is None
+        assert self.key_tools.unlock(self.password)
+        assert self.key_tools.vault_account == self.account
+
+    def test_sessions_locked_by_single_exit_handler(self):
+        with mock.patch('atexit.register') as register:
+            other = KeyTools()
+        assert register.call_count == 0
+        other.vault_path = self.key_tools.vault_path
+        assert other.unlock(self.password) and self.key_tools.unlock(self.password)
+        KeyTools.lock_all()
+        assert not other.is_unlocked() and not self.key_tools.is_unlocked()
+
+    def test_wrong_password_not_unlocked(self):
+        assert not self.key_tools.unlock('wrong password')
+        assert not self.key_tools.is_unlocked()
+
+    def test_session_locked_when_idle(self):
+        assert self.key_tools.unlock(self.password, idle_timeout=0.1)
+        time.sleep(0.3)
+        assert not self.key_tools.is_unlocked()
+        # next signing unlocks session again
+        self.key_tools.sign_transaction(self.transaction, self.password)
+        assert self.key_tools.is_unlocked()
+
+    def test_shared_vault_used_without_account_vault(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        os.makedirs('vault')
+        with open(os.path.join('vault', 'worker_node_key.pri'), 'wb') as vault_file:
+            vault_file.write(self.vault_data)
+        key_tools = KeyTools('worker_node_key_%s.pri' % self.account.lower())
+        assert key_tools.check_vault()
+        assert key_tools.vault_path.name == 'worker_node_key.pri'
+        assert key_tools.obtain_key(self.password) == self.account + '_' + self.private_key
+        # created account vault is preferred
+        with open(os.path.join('vault', key_tools.vault_name), 'wb') as vault_file:
+            vault_file.write(self.vault_data)
+        assert key_tools.check_vault()
+        assert key_tools.vault_path.name == key_tools.vault_name
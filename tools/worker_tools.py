@@ -27,6 +27,7 @@ class MainModel:
     pandora_abi_path = None
     pandora_abi = None
     remove_flag = False
+    host_flag = False
     current_worker_contract = None
 
     new_worker_account = None
@@ -68,7 +69,8 @@ def process_create_worker_contract():
         MainModel.new_worker_account_vault_pass = obtain_local_password()
         vault_result = create_vault(MainModel.new_worker_account_vault_pass,
                                     MainModel.new_worker_account,
-                                    MainModel.new_worker_account_p_key)
+                                    MainModel.new_worker_account_p_key,
+                                    vault_name(MainModel.new_worker_account, MainModel.host_flag))
         if not vault_result:
             print('Unable to create vault.')
             return
@@ -190,9 +192,16 @@ def on_worker_node_event(event: dict):
             config = ConfigParser()
             config.read('../pynode/core/config/pynode.ini')
 
+            worker_nodes = str(address)
+            worker_node_accounts = str(MainModel.new_worker_account)
+            if MainModel.host_flag:
+                # worker node is hosted along with already configured ones, lists are comma-separated
+                worker_nodes = append_value(config.get('Contracts', 'worker_node', fallback=''), worker_nodes)
+                worker_node_accounts = append_value(config.get('Account', 'worker_node_account', fallback=''),
+                                                    worker_node_accounts)
             cfg_file = open('../pynode/core/config/pynode.ini', 'w')
-            config.set('Contracts', 'worker_node', str(address))
-            config.set('Account', 'worker_node_account', str(MainModel.new_worker_account))
+            config.set('Contracts', 'worker_node', worker_nodes)
+            config.set('Account', 'worker_node_account', worker_node_accounts)
             config.write(cfg_file)
             cfg_file.close()
         except Exception as ex:
@@ -238,12 +247,28 @@ def obtain_private_key() -> str:
         obtain_private_key()
 
 
-def create_vault(local_password: str, new_worker_account: str, worker_account_private: str) -> bool:
+def vault_name(account: str, hosted: bool) -> str:
+    # every hosted worker node account is kept in its own vault, pynode reads it by account address
+    if hosted:
+        return 'worker_node_key_%s.pri' % account.lower()
+    return 'worker_node_key.pri'
+
+
+def append_value(values: str, value: str) -> str:
+    # comma-separated config list, existing value is not repeated
+    items = [item.strip() for item in values.split(',') if item.strip()]
+    if value.lower() not in [item.lower() for item in items]:
+        items.append(value)
+    return ','.join(items)
+
+
+def create_vault(local_password: str, new_worker_account: str, worker_account_private: str,
+                 name: str = 'worker_node_key.pri') -> bool:
     # recreate password vault
     vault_folder = Path('../pynode/vault')
     if os.path.exists(vault_folder) is False:
         os.makedirs(vault_folder)
-    vault_file = Path(str(vault_folder) + '/worker_node_key.pri')
+    vault_file = Path(str(vault_folder) + '/' + name)
     if os.path.isfile(vault_file) is False:
         open(vault_file, 'a').close()
     # prepare for encoding
@@ -312,6 +337,10 @@ def main(argv):
                                  (account must be whitelisted for providing this operation,
                                  and must contain about 4ETH on its balance)
                 -r (--remove) - use this flag to destroy worker node contract for your account
+                -n (--host) - use this flag to host created worker node along with already configured ones,
+                              worker node and account are appended to comma-separated worker_node and
+                              worker_node_account lists, private key is stored in its own vault
+                              vault/worker_node_key_<owner_account_address>.pri (the same password for all vaults)
             example >python ./worker_tools.py -a <owner_account_address> -r
                                   
             Current tool try to import your account and ask for local password and account private key,
@@ -319,8 +348,8 @@ def main(argv):
             This password is only actual for pandora ethereum node current instance, do not forget it).
             
             WARNING: Current operation will overwrites your key vault and default config pynode.ini 
-            (worker contract address automatically filled in) please back up your vault and pynode 
-            configuration file to prevent data loss
+            (worker contract address automatically filled in, appended with -n flag) please back up your vault
+            and pynode configuration file to prevent data loss
             """
 
     parser = argparse.ArgumentParser(description=help_message, formatter_class=argparse.RawTextHelpFormatter)
@@ -339,6 +368,12 @@ def main(argv):
                         dest="remove_account",
                         default='False',
                         help='flag for remove account from whitelist')
+    parser.add_argument('-n',
+                        '--host',
+                        action='store_true',
+                        dest="host_account",
+                        default=False,
+                        help='flag for hosting worker node along with configured ones')
 
     results = parser.parse_args()
     print('Try read config, instantiate abi and provide operation')
@@ -357,12 +392,14 @@ def main(argv):
 
     if results.remove_account is not 'False':
         MainModel.remove_flag = True
+    MainModel.host_flag = results.host_account is True
 
     print('Reading properties success')
     print('Eth host                    : ' + MainModel.eth_host)
     print('Pandora contract address    : ' + MainModel.pandora_contract_address)
     print('ABI path                    : ' + MainModel.pandora_abi_path)
     print('Action remove               : ' + str(MainModel.remove_flag))
+    print('Action host                 : ' + str(MainModel.host_flag))
     print('Current worker contract     : ' + MainModel.current_worker_contract)
     if results:
         MainModel.new_worker_account = results.new_worker_account